@@ -1,8 +1,95 @@
+import asyncio
+import json
+import time
+from typing import Any, List, Optional
+
+import openai
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
 from langchain_groq import ChatGroq
 from langchain_openai import ChatOpenAI
 
+from app.backend.core.config import LLM_CACHE, LLM_COMPLETION_TOKENS_ESTIMATE, LLM_MAX_RETRIES
+from app.backend.core.embedding_executor import TRANSIENT_ERRORS, retry_delay
+from app.backend.core.llm_cache import llm_cache
+from app.backend.core.rate_limiter import chat_scheduler, estimate_tokens
+
+
+class ScheduledChatOpenAI(ChatOpenAI):
+    """
+    ChatOpenAI that books each call with the process-wide chat scheduler before
+    sending it, so concurrent agents stay inside the RPM/TPM budget instead of
+    tripping 429s and retrying.
+
+    Build it with max_retries=0: transient errors are retried here, up to
+    LLM_MAX_RETRIES times, and every attempt is booked like a new call.
+    """
+
+    @staticmethod
+    def _message_tokens(message: BaseMessage) -> int:
+        tokens = estimate_tokens(str(message.content))
+        # Tool calls travel as their own JSON next to the (often empty) content
+        for call in getattr(message, "tool_calls", None) or ():
+            tokens += estimate_tokens(call["name"] + json.dumps(call["args"], default=str))
+        return tokens
+
+    def _estimate_call_tokens(self, messages: List[BaseMessage], kwargs: dict) -> int:
+        prompt = sum(self._message_tokens(message) for message in messages)
+        if kwargs.get("tools"):
+            prompt += estimate_tokens(json.dumps(kwargs["tools"], default=str))
+        return prompt + (self.max_tokens or LLM_COMPLETION_TOKENS_ESTIMATE)
+
+    @staticmethod
+    def _used_tokens(result: ChatResult) -> Optional[int]:
+        usage = (result.llm_output or {}).get("token_usage") or {}
+        return usage.get("total_tokens")
+
+    @staticmethod
+    def _failed_attempt(error: Exception, tokens: int) -> None:
+        if isinstance(error, openai.RateLimitError):
+            # A rejected call used no tokens; give the reservation back
+            chat_scheduler.settle(tokens, 0)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        tokens = self._estimate_call_tokens(messages, kwargs)
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            chat_scheduler.acquire(tokens)
+            try:
+                result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except TRANSIENT_ERRORS as e:
+                self._failed_attempt(e, tokens)
+                if attempt == LLM_MAX_RETRIES:
+                    raise
+                time.sleep(retry_delay(e, attempt))
+                continue
+            chat_scheduler.settle(tokens, self._used_tokens(result))
+            return result
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        tokens = self._estimate_call_tokens(messages, kwargs)
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            await chat_scheduler.aacquire(tokens)
+            try:
+                result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except TRANSIENT_ERRORS as e:
+                self._failed_attempt(e, tokens)
+                if attempt == LLM_MAX_RETRIES:
+                    raise
+                await asyncio.sleep(retry_delay(e, attempt))
+                continue
+            chat_scheduler.settle(tokens, self._used_tokens(result))
+            return result
+
+
 # Using gpt-4o-mini as it's a valid, efficient OpenAI model
 # If you want to use Groq instead, uncomment the line below:
 # llm_model = ChatGroq(model="llama-3.3-70b-versatile", temperature=0.3)
 
-llm_model = ChatOpenAI(model="gpt-4o-mini", temperature=0.3, max_retries=5, request_timeout=60)
\ No newline at end of file
+# With LLM_CACHE=true, identical calls (same prompt, tool results and model
+# settings) are replayed from the SQLite response cache without a request
+llm_model = ScheduledChatOpenAI(
+    model="gpt-4o-mini", temperature=0.3, max_retries=0, request_timeout=60,
+    cache=llm_cache if LLM_CACHE else None,
+)
@@ -1,20 +1,13 @@
+import functools
 import json
 from app.backend.core.state import State
 from deepagents import create_deep_agent
 from app.backend.agents.base_agent import llm_model
+from app.backend.core.artifacts import artifact_store
 from app.backend.tools.chunking_tools import extract_pdf, convert_to_md, structure_split, final_chunk
 from app.backend.tools.embedding_tools import create_embeddings, store_in_vectordb
 
-def embedding_agent(state: State = {}):
-    """
-    Agent responsible for the end-to-end process of ingesting a PDF:
-    Extraction -> Content-Based Chunking -> Embedding -> Vector Storage.
-    """
-    
-    file_path = state.get('file_path', 'No file path found')
-    collection_name = state.get('collection_name', 'pdf_chunks')
-    
-    system_prompt = """
+SYSTEM_PROMPT = """
     ### AGENT IDENTITY & PURPOSE
     You are the **Ingestion & Embedding Specialist**, a highly technical agent responsible for transforming raw PDF documents into searchable vector embeddings. You manage the full pipeline: extracting text, structuring it into meaningful chunks, creating embeddings, and storing them in a vector database.
 
@@ -76,24 +69,62 @@ def embedding_agent(state: State = {}):
     ### TERMINATION CRITERIA
     - Your task is complete when `store_in_vectordb` returns success.
     """
-    
-    agent = create_deep_agent(
+
+
+@functools.lru_cache(maxsize=1)
+def _build_agent():
+    # Compiling a deep agent takes ~0.2s; the compiled graph is stateless and
+    # safe to share, so build it once instead of on every upload.
+    return create_deep_agent(
         model=llm_model,
         tools=[create_embeddings, store_in_vectordb],
-        system_prompt=system_prompt
+        system_prompt=SYSTEM_PROMPT
     )
-    
-    print(f"🚀 Starting Embedding Agent Pipeline for: {file_path}")
-    
+
+
+def _agent_input(file_path: str, collection_name: str) -> dict:
     # create_react_agent expects a list of messages or a state with messages
     # We'll pass the user message to trigger the agent
-    response = agent.invoke({
+    return {
         "messages": [{
             "role": "user", 
             "content": f"Process the PDF at '{file_path}' and store in collection '{collection_name}'."
         }]
-    })
+    }
+
+
+def embedding_agent(state: State = {}):
+    """
+    Agent responsible for the end-to-end process of ingesting a PDF:
+    Extraction -> Content-Based Chunking -> Embedding -> Vector Storage.
+    """
+    
+    file_path = state.get('file_path', 'No file path found')
+    collection_name = state.get('collection_name', 'pdf_chunks')
+    agent = _build_agent()
+    
+    print(f"🚀 Starting Embedding Agent Pipeline for: {file_path}")
     
+    # Vectors are handed between the tools as artifacts that only live for this run
+    with artifact_store.request_scope():
+        response = agent.invoke(_agent_input(file_path, collection_name))
+    return _apply_response(state, response)
+
+
+async def aembedding_agent(state: State = {}):
+    """Async variant of embedding_agent that awaits the LLM with ainvoke."""
+    file_path = state.get('file_path', 'No file path found')
+    collection_name = state.get('collection_name', 'pdf_chunks')
+    agent = _build_agent()
+
+    print(f"🚀 Starting Embedding Agent Pipeline (async) for: {file_path}")
+
+    with artifact_store.request_scope():
+        response = await agent.ainvoke(_agent_input(file_path, collection_name))
+    return _apply_response(state, response)
+
+
+def _apply_response(state: State, response: dict) -> State:
     print("EMBEDDING AGENT RESPONSE:", response)
     
     # Parse response to update state
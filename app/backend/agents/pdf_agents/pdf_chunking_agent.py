@@ -1,19 +1,20 @@
+import functools
 import json
 from app.backend.core.state import State
 from deepagents import create_deep_agent
 from app.backend.agents.base_agent import llm_model
-from app.backend.tools.chunking_tools import extract_pdf, convert_to_md, structure_split, final_chunk
+from app.backend.core.config import CHUNKING_MODE
+from app.backend.core.artifacts import artifact_store
+from app.backend.core.executors import run_blocking
+from app.backend.core.ingestion_cache import hash_file
+from app.backend.tools.streaming_tools import stream_ingest
+from app.backend.tools.chunking_tools import (
+    extract_pdf, convert_to_md, structure_split, final_chunk,
+    run_chunking_pipeline, tag_document_id, _serialize_documents
+)
 
 
-def pdf_chunking_agent(state: State = {}):
-    """
-    Agent responsible for extracting PDF content and creating structure-aware, 
-    embedding-ready chunks suitable for vector search and RAG applications.
-    """
-    
-    file_path = state.get('file_path', 'No file path found')
-    
-    system_prompt = """
+SYSTEM_PROMPT = """
     ### AGENT IDENTITY & PURPOSE
     You are the **PDF Chunking Specialist**, an expert agent responsible for transforming raw PDF documents into structured, embedding-ready text chunks. Your goal is to prepare high-quality data for vector search and RAG applications.
 
@@ -65,54 +66,155 @@ def pdf_chunking_agent(state: State = {}):
     ### TERMINATION CRITERIA
     - Your task is complete when `final_chunk` has successfully returned the chunks.
     """
-    
+
+
+def pdf_chunking_agent(state: State = {}):
+    """
+    Agent responsible for extracting PDF content and creating structure-aware, 
+    embedding-ready chunks suitable for vector search and RAG applications.
+
+    Runs the fixed tool pipeline directly in-process by default; set
+    CHUNKING_MODE=agent to let the LLM orchestrate the tools instead.
+    """
+    if CHUNKING_MODE == "agent":
+        return _run_with_agent(state)
+    if CHUNKING_MODE == "stream":
+        return _run_streaming(state)
+    return _run_direct(state)
+
+
+async def apdf_chunking_agent(state: State = {}):
+    """
+    Async variant of pdf_chunking_agent. The LLM-driven mode awaits ainvoke;
+    the in-process modes are CPU/IO heavy and run on the bounded CPU pool.
+    """
+    if CHUNKING_MODE == "agent":
+        return await _arun_with_agent(state)
+    if CHUNKING_MODE == "stream":
+        return await run_blocking(_run_streaming, state)
+    return await run_blocking(_run_direct, state)
+
+
+def _run_direct(state: State):
+    """Calls the chunking steps in order without any LLM round trips."""
+    file_path = state.get('file_path', 'No file path found')
+    try:
+        chunks = run_chunking_pipeline(file_path, doc_id=state.get('file_hash'))
+        state['pdf_chunks'] = _serialize_documents(chunks)
+        state['chunking_status'] = 'success' if chunks else 'partial'
+        state['total_chunks'] = len(chunks)
+        print(f"✓ Successfully created {len(chunks)} chunks")
+    except Exception as e:
+        print(f"✗ Error in direct chunking pipeline: {e}")
+        state['chunking_status'] = 'fail'
+        state['error_message'] = str(e)
+    return state
+
+
+def _run_streaming(state: State):
+    """
+    Streams pages through chunking straight into the vector collection.
+
+    Chunks are not kept in the state: holding them would defeat the bounded
+    memory this mode exists for.
+    """
+    file_path = state.get('file_path', 'No file path found')
+    collection_name = state.get('collection_name') or 'pdf_chunks'
+    try:
+        doc_id = state.get('file_hash') or hash_file(file_path)
+        result = stream_ingest(file_path, collection_name, doc_id)
+        state['chunking_status'] = 'success' if result['added'] else 'partial'
+        state['total_chunks'] = result['added']
+        state['collection_name'] = collection_name
+        state['embedding_status'] = 'success'
+        state['vectorstore_info'] = {
+            "status": "success",
+            "collection_name": collection_name,
+            "document_count": result['added'],
+            "replaced_count": result['replaced'],
+            "collection_size": result['total'],
+            "save_path": result['save_path'],
+            "vectorstore_type": "FAISS",
+            "dedup": result.get('dedup'),
+        }
+        print(f"✓ Streamed {result['added']} chunks into '{collection_name}'")
+    except Exception as e:
+        print(f"✗ Error in streaming chunking pipeline: {e}")
+        state['chunking_status'] = 'fail'
+        state['error_message'] = str(e)
+    return state
+
+
+@functools.lru_cache(maxsize=1)
+def _build_agent():
+    # Compiling a deep agent takes ~0.2s; the compiled graph is stateless and
+    # safe to share, so build it once instead of on every upload.
     # Create the agent with all chunking tools and the system prompt
-    agent = create_deep_agent(
+    return create_deep_agent(
         model=llm_model,
         tools=[extract_pdf, convert_to_md, structure_split, final_chunk],
-        system_prompt=system_prompt
-    )   
+        system_prompt=SYSTEM_PROMPT
+    )
 
-    
-    # Invoke the agent with the file path
-    response = agent.invoke({
+
+def _agent_input(file_path: str) -> dict:
+    return {
         "messages": [{
             "role": "user", 
             "content": f"Process this PDF file: {file_path}"
         }]
-    })
-    
+    }
+
+
+def _apply_agent_response(state: State, response: dict) -> State:
+    """Reads the final_chunk artifact out of the tool messages. Must run inside the request scope."""
     print("CHUNKING AGENT RESPONSE:", response)
     
     try:
         # Extract the final chunks from the tool messages
-        chunks_data = None
+        chunks = None
         for msg in response["messages"]:
             if msg.type == "tool":
                 try:
                     content = json.loads(msg.content)
                     # Look for the final_chunk output
-                    if "file_path" in content and "total_chunks" in content:
-                        # Read the chunks from the temp file
-                        from app.backend.tools.chunking_tools import _read_from_temp_file
-                        chunks_data = _read_from_temp_file(content["file_path"])
+                    if "artifact" in content and "total_chunks" in content:
+                        chunks = artifact_store.get(content["artifact"])
                 except:
                     continue
         
-        if chunks_data:
-            print(f"✓ Successfully created {chunks_data['total_chunks']} chunks")
-            print("chunks_data", chunks_data)
-            state['pdf_chunks'] = chunks_data['chunks']
+        if chunks:
+            tag_document_id(chunks, state.get('file_hash'))
+            print(f"✓ Successfully created {len(chunks)} chunks")
+            state['pdf_chunks'] = _serialize_documents(chunks)
             state['chunking_status'] = 'success'
-            state['total_chunks'] = chunks_data['total_chunks']
+            state['total_chunks'] = len(chunks)
         else:
             print("⚠ Chunking completed but no final chunks found in output")
             state['chunking_status'] = 'partial'
-        print("state", state)
-        return state
         
     except Exception as e:
         print(f"✗ Error processing chunking response: {e}")
         state['chunking_status'] = 'fail'
         state['error_message'] = str(e)
-    return state
\ No newline at end of file
+    return state
+
+
+def _run_with_agent(state: State):
+    """LLM-driven mode: the deep agent decides when to call each tool."""
+    file_path = state.get('file_path', 'No file path found')
+    agent = _build_agent()
+
+    # Intermediate artifacts only live for this run
+    with artifact_store.request_scope():
+        response = agent.invoke(_agent_input(file_path))
+        return _apply_agent_response(state, response)
+
+
+async def _arun_with_agent(state: State):
+    file_path = state.get('file_path', 'No file path found')
+    agent = _build_agent()
+
+    with artifact_store.request_scope():
+        response = await agent.ainvoke(_agent_input(file_path))
+        return _apply_agent_response(state, response)
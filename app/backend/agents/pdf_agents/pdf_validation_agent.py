@@ -1,22 +1,14 @@
+import functools
 import json
+from collections import Counter
+from typing import Optional, Tuple
 from app.backend.core.state import State
+from app.backend.core.executors import run_blocking
 from app.backend.agents.base_agent import llm_model
 from app.backend.tools.pdf_tools import validate_pdf_tool
 from deepagents import create_deep_agent
-import openai
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
-def pdf_validation_agent(state: State = {}):
-    """
-    Agent responsible for validating PDF files against quality, compliance, 
-    and security standards.
-    """
-    
-    print("PDF Validation Agent - File Path:", state.get('file_path', 'No file path found'))
-    
-    file_path = state.get('file_path', 'No file path found')
-    print("Invoking PDF Validation Agent on file:", file_path)
-    system_prompt = """
+SYSTEM_PROMPT = """
     ### AGENT IDENTITY & PURPOSE
     You are the **PDF Validation Specialist**, a dedicated agent responsible for rigorously validating PDF files against defined quality, compliance, and security standards. Your sole purpose is to ensure files meet the necessary criteria before further processing.
 
@@ -80,29 +72,94 @@ def pdf_validation_agent(state: State = {}):
         }}
     """
 
-    agent = create_deep_agent(
+
+# Finding codes whose impact depends on context; these reports go to the LLM
+AMBIGUOUS_CODES = {"ENCRYPTED"}
+FAIL_SEVERITIES = {"CRITICAL", "ERROR"}
+KNOWN_SEVERITIES = FAIL_SEVERITIES | {"WARNING", "INFO"}
+
+# How often each path decided a validation, exposed through /metrics
+_path_counts: Counter = Counter()
+
+
+def classify_report(report: dict) -> Tuple[Optional[str], str]:
+    """
+    Decides the clear-cut validation reports without an LLM call.
+
+    Returns:
+        Tuple[Optional[str], str]: (status, missing_information); status is
+        None when the report is ambiguous and needs the LLM.
+    """
+    if not report:
+        return "fail", "Validation tool returned no data"
+    if "error" in report:
+        return "fail", report["error"]
+
+    findings = report.get("findings", [])
+    summary = report.get("summary", {})
+    file_info = report.get("file_info", {})
+
+    if any(f.get("severity") in FAIL_SEVERITIES for f in findings):
+        return "fail", ""
+    if summary.get("critical_errors", 0) or summary.get("errors", 0):
+        return "fail", ""
+    if file_info.get("page_count") == 0:
+        return "fail", "PDF has no pages"
+
+    if not file_info or not summary:
+        return None, ""
+    if any(f.get("code") in AMBIGUOUS_CODES or f.get("severity") not in KNOWN_SEVERITIES for f in findings):
+        return None, ""
+
+    if summary.get("warnings", 0) or any(f.get("severity") == "WARNING" for f in findings):
+        return "warning", ""
+    return "pass", ""
+
+
+def validation_stats() -> dict:
+    rules = sum(n for (path, _), n in _path_counts.items() if path == "rules")
+    llm = sum(n for (path, _), n in _path_counts.items() if path == "llm")
+    return {
+        "rules": rules,
+        "llm": llm,
+        "rules_ratio": round(rules / (rules + llm), 4) if rules + llm else 0.0,
+        "by_status": {f"{path}:{status}": n for (path, status), n in sorted(_path_counts.items())},
+    }
+
+
+def _apply_rules(state: State, report: dict) -> bool:
+    status, missing = classify_report(report)
+    if status is None:
+        return False
+    print(f"✓ Validation decided by rules: {status}")
+    _path_counts["rules", status] += 1
+    state["pdf_validation_status"] = status
+    state["missing_information"] = missing
+    return True
+
+
+@functools.lru_cache(maxsize=1)
+def _build_agent():
+    # Compiling a deep agent takes ~0.2s; the compiled graph is stateless and
+    # safe to share, so build it once instead of on every upload.
+    return create_deep_agent(
         model=llm_model,
         tools=[validate_pdf_tool],
-        system_prompt=system_prompt
+        system_prompt=SYSTEM_PROMPT
     )
-    
-    # Define retry logic for agent invocation
-    @retry(
-        retry=retry_if_exception_type(openai.RateLimitError),
-        wait=wait_exponential(multiplier=1, min=4, max=60),
-        stop=stop_after_attempt(10),
-        reraise=True
-    )
-    def invoke_with_retry(agent_instance, input_data):
-        print("Invoking validation agent with retry mechanism...")
-        return agent_instance.invoke(input_data)
 
-    response = invoke_with_retry(agent, {
+
+def _agent_input(file_path: str) -> dict:
+    return {
         "messages": [{
             "role": "user", 
             "content": f"Validate the PDF file at path: {file_path}"
         }]
-    })
+    }
+
+
+def _apply_response(state: State, response: dict) -> State:
+    content = ""
     try:
       for msg in response["messages"]:
          if msg.__class__.__name__ == "AIMessage":
@@ -111,16 +168,53 @@ def pdf_validation_agent(state: State = {}):
       data = json.loads(content)
     except json.JSONDecodeError:
       # Fallback if JSON is invalid
-      print("Error decoding JSON response:", response.content)
+      print("Error decoding JSON response:", content)
       data = {
             "pdf_validation_status": "fail",
             "missing_information": "",
       }
 
     print("Intent Agent Response:", data)
+    _path_counts["llm", data["pdf_validation_status"]] += 1
     state["pdf_validation_status"] = data["pdf_validation_status"]
     state["missing_information"] = data["missing_information"]
     return state
+
+
+def pdf_validation_agent(state: State = {}):
+    """
+    Agent responsible for validating PDF files against quality, compliance, 
+    and security standards.
+    """
+    
+    print("PDF Validation Agent - File Path:", state.get('file_path', 'No file path found'))
+    
+    file_path = state.get('file_path', 'No file path found')
+    print("Invoking PDF Validation Agent on file:", file_path)
+
+    # Clear-cut reports are classified locally; only ambiguous ones reach the LLM
+    if _apply_rules(state, validate_pdf_tool.invoke({"file_path": file_path})):
+        return state
+
+    # Rate limits and transient errors are retried (and booked) by llm_model itself
+    response = _build_agent().invoke(_agent_input(file_path))
+    return _apply_response(state, response)
+
+
+async def apdf_validation_agent(state: State = {}):
+    """
+    Async variant of pdf_validation_agent: awaits the LLM with ainvoke, so
+    the event loop stays free while llm_model backs off on rate limits.
+    """
+    file_path = state.get('file_path', 'No file path found')
+    print("Invoking PDF Validation Agent (async) on file:", file_path)
+
+    report = await run_blocking(validate_pdf_tool.invoke, {"file_path": file_path})
+    if _apply_rules(state, report):
+        return state
+
+    response = await _build_agent().ainvoke(_agent_input(file_path))
+    return _apply_response(state, response)
     
     
     
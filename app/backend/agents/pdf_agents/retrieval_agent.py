@@ -1,4 +1,5 @@
 import json
+from app.backend.core.config import RETRIEVAL_MODE
 from app.backend.core.state import State
 from app.backend.tools.embedding_tools import search_vectordb
 
@@ -15,6 +16,7 @@ def retrieval_agent(state: State = {}):
     query = state.get('query', state.get('user_query', ''))
     collection_name = state.get('collection_name', 'pdf_chunks')
     k = state.get('top_k', 5)
+    mode = state.get('retrieval_mode', RETRIEVAL_MODE)
     
     if not query:
         print("⚠ No query provided")
@@ -23,14 +25,15 @@ def retrieval_agent(state: State = {}):
         return state
     
     print(f"🔍 Query: {query}")
-    print(f"📚 Collection: {collection_name}")
+    print(f"📚 Collection: {collection_name} ({mode})")
     
     try:
         # Perform search
         search_result = search_vectordb.invoke({
             "query": query,
             "collection_name": collection_name,
-            "k": k
+            "k": k,
+            "mode": mode
         })
         search_data = json.loads(search_result)
         
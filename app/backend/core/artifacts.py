@@ -0,0 +1,159 @@
+import contextvars
+import os
+import pickle
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import zstandard
+
+from app.backend.core.config import ARTIFACT_DIR, ARTIFACT_TTL_SECONDS
+
+MEMORY_PREFIX = "mem://"
+DISK_PREFIX = "zst://"
+
+_current_request: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "artifact_request_id", default=None
+)
+
+
+class ArtifactNotFound(KeyError):
+    """Raised when a handle is unknown, released or expired."""
+
+
+class ArtifactStore:
+    """
+    Hands intermediate pipeline results between steps by handle.
+
+    Two tiers:
+      - memory: the object itself is kept in-process (no serialization at all),
+        used for steps running in the same process.
+      - disk: zstd-compressed pickle under ARTIFACT_DIR, used for anything that
+        has to cross a process boundary.
+
+    Every artifact is tagged with the request scope that created it so it can be
+    released when the request finishes, and anything older than the TTL is
+    pruned on the next write.
+    """
+
+    def __init__(self, spill_dir: str = ARTIFACT_DIR, ttl_seconds: float = ARTIFACT_TTL_SECONDS):
+        self.spill_dir = spill_dir
+        self.ttl_seconds = ttl_seconds
+        self._memory: Dict[str, Any] = {}
+        self._entries: Dict[str, dict] = {}  # handle -> {"request_id", "created", "path"}
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._compressor = zstandard.ZstdCompressor(level=3)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def put(self, data: Any, persist: bool = False) -> str:
+        """Stores data and returns a handle. persist=True forces the disk tier."""
+        self.prune()
+        artifact_id = uuid.uuid4().hex
+        entry = {"request_id": _current_request.get(), "created": time.time(), "path": None}
+
+        if persist:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"artifact_{artifact_id}.zst")
+            payload = self._compressor.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+            with open(path, "wb") as f:
+                f.write(payload)
+            handle = f"{DISK_PREFIX}{artifact_id}"
+            entry["path"] = path
+        else:
+            handle = f"{MEMORY_PREFIX}{artifact_id}"
+
+        with self._lock:
+            if not persist:
+                self._memory[handle] = data
+            self._entries[handle] = entry
+        return handle
+
+    def get(self, handle: str) -> Any:
+        """Returns the object behind a handle."""
+        if handle.startswith(MEMORY_PREFIX):
+            with self._lock:
+                if handle not in self._memory:
+                    raise ArtifactNotFound(handle)
+                return self._memory[handle]
+
+        if handle.startswith(DISK_PREFIX):
+            # Disk handles may come from another process, so resolve the path
+            # from the id rather than from this process's bookkeeping.
+            path = os.path.join(self.spill_dir, f"artifact_{handle[len(DISK_PREFIX):]}.zst")
+            try:
+                with open(path, "rb") as f:
+                    return pickle.loads(self._decompressor.decompress(f.read()))
+            except FileNotFoundError:
+                raise ArtifactNotFound(handle)
+
+        raise ArtifactNotFound(handle)
+
+    def delete(self, handle: str) -> None:
+        with self._lock:
+            self._memory.pop(handle, None)
+            entry = self._entries.pop(handle, None)
+        if entry and entry["path"]:
+            try:
+                os.remove(entry["path"])
+            except FileNotFoundError:
+                pass
+
+    def release(self, request_id: str) -> int:
+        """Deletes every artifact created inside the given request scope."""
+        with self._lock:
+            handles = [h for h, e in self._entries.items() if e["request_id"] == request_id]
+        for handle in handles:
+            self.delete(handle)
+        return len(handles)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Deletes artifacts older than the TTL, including orphaned files on disk."""
+        now = now or time.time()
+        cutoff = now - self.ttl_seconds
+        with self._lock:
+            expired = [h for h, e in self._entries.items() if e["created"] < cutoff]
+        for handle in expired:
+            self.delete(handle)
+
+        # Files left behind by earlier processes (e.g. after a restart). The
+        # directory scan is throttled so frequent writes stay cheap.
+        removed = len(expired)
+        if now - self._last_sweep < min(60.0, self.ttl_seconds):
+            return removed
+        self._last_sweep = now
+        if os.path.isdir(self.spill_dir):
+            for name in os.listdir(self.spill_dir):
+                if not name.startswith("artifact_"):
+                    continue
+                path = os.path.join(self.spill_dir, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+        return removed
+
+    @contextmanager
+    def request_scope(self, request_id: Optional[str] = None):
+        """Tags artifacts created inside the block and releases them on exit."""
+        request_id = request_id or uuid.uuid4().hex
+        token = _current_request.set(request_id)
+        try:
+            yield request_id
+        finally:
+            _current_request.reset(token)
+            self.release(request_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "memory_artifacts": len(self._memory),
+                "disk_artifacts": sum(1 for e in self._entries.values() if e["path"]),
+            }
+
+
+artifact_store = ArtifactStore()
@@ -0,0 +1,356 @@
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import xxhash
+import zstandard
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from app.backend.core.config import (
+    CHECKPOINT_DB_PATH, CHECKPOINT_MAX_THREADS, CHECKPOINT_PRUNE_INTERVAL_SECONDS, CHECKPOINT_TTL_SECONDS
+)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS checkpoints ("
+    " thread_id TEXT NOT NULL,"
+    " checkpoint_ns TEXT NOT NULL,"
+    " checkpoint_id TEXT NOT NULL,"
+    " parent_id TEXT,"
+    " checkpoint_type TEXT NOT NULL,"
+    " checkpoint BLOB NOT NULL,"
+    " metadata_type TEXT NOT NULL,"
+    " metadata BLOB NOT NULL,"
+    " created_at REAL NOT NULL,"
+    " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id));"
+    "CREATE INDEX IF NOT EXISTS idx_checkpoints_created ON checkpoints(thread_id, created_at);"
+    # channel value of a given version -> content hash (NULL: channel was emptied)
+    "CREATE TABLE IF NOT EXISTS channel_values ("
+    " thread_id TEXT NOT NULL,"
+    " checkpoint_ns TEXT NOT NULL,"
+    " channel TEXT NOT NULL,"
+    " version TEXT NOT NULL,"
+    " blob_hash TEXT,"
+    " PRIMARY KEY (thread_id, checkpoint_ns, channel, version));"
+    "CREATE TABLE IF NOT EXISTS writes ("
+    " thread_id TEXT NOT NULL,"
+    " checkpoint_ns TEXT NOT NULL,"
+    " checkpoint_id TEXT NOT NULL,"
+    " task_id TEXT NOT NULL,"
+    " idx INTEGER NOT NULL,"
+    " channel TEXT NOT NULL,"
+    " blob_hash TEXT NOT NULL,"
+    " task_path TEXT NOT NULL,"
+    " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx));"
+    # Content-addressed, zstd-compressed serialized values shared by all threads
+    "CREATE TABLE IF NOT EXISTS blobs ("
+    " hash TEXT PRIMARY KEY,"
+    " type TEXT NOT NULL,"
+    " data BLOB NOT NULL,"
+    " size INTEGER NOT NULL);"
+)
+
+
+class SqliteCheckpointer(BaseCheckpointSaver[str]):
+    """
+    Durable LangGraph checkpointer backed by a single SQLite file.
+
+    Channel values and pending writes are serialized with the graph's serde,
+    zstd-compressed and stored once per content hash, so the docs/chunks lists
+    repeated across checkpoints (and across threads for the same PDF) cost one
+    row; checkpoints only keep references. Threads idle past the TTL, or
+    beyond the newest max_threads, are pruned together with any blobs no
+    longer referenced.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_DB_PATH, ttl_seconds: float = CHECKPOINT_TTL_SECONDS,
+                 max_threads: int = CHECKPOINT_MAX_THREADS,
+                 prune_interval_seconds: float = CHECKPOINT_PRUNE_INTERVAL_SECONDS, serde=None):
+        super().__init__(serde=serde)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_threads = max_threads
+        self.prune_interval_seconds = prune_interval_seconds
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._last_prune = 0.0
+        self._compressor = zstandard.ZstdCompressor(level=3)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    # -- blobs ---------------------------------------------------------------
+
+    def _put_blob(self, conn: sqlite3.Connection, value: Any) -> str:
+        type_, data = self.serde.dumps_typed(value)
+        blob_hash = xxhash.xxh3_128_hexdigest(data) + ":" + type_
+        exists = conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (blob_hash,)).fetchone()
+        if not exists:
+            compressed = self._compressor.compress(data)
+            conn.execute(
+                "INSERT INTO blobs (hash, type, data, size) VALUES (?, ?, ?, ?)",
+                (blob_hash, type_, compressed, len(compressed)),
+            )
+        return blob_hash
+
+    def _load_blobs(self, conn: sqlite3.Connection, hashes: List[str]) -> Dict[str, Any]:
+        values: Dict[str, Any] = {}
+        unique = list(set(hashes))
+        for start in range(0, len(unique), 500):
+            batch = unique[start:start + 500]
+            rows = conn.execute(
+                f"SELECT hash, type, data FROM blobs WHERE hash IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            for blob_hash, type_, data in rows:
+                values[blob_hash] = self.serde.loads_typed((type_, self._decompressor.decompress(data)))
+        return values
+
+    # -- reads ---------------------------------------------------------------
+
+    def _tuple(self, conn: sqlite3.Connection, row: tuple) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, c_type, c_data, m_type, m_data = row
+        checkpoint: Checkpoint = self.serde.loads_typed((c_type, c_data))
+
+        versions = checkpoint["channel_versions"]
+        refs: Dict[str, str] = {}
+        for channel, version in versions.items():
+            ref = conn.execute(
+                "SELECT blob_hash FROM channel_values"
+                " WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if ref and ref[0] is not None:
+                refs[channel] = ref[0]
+
+        writes = conn.execute(
+            "SELECT task_id, channel, blob_hash FROM writes"
+            " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+        blobs = self._load_blobs(conn, [*refs.values(), *(w[2] for w in writes)])
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint={**checkpoint, "channel_values": {k: blobs[h] for k, h in refs.items()}},
+            metadata=self.serde.loads_typed((m_type, m_data)),
+            parent_config=(
+                {"configurable": {
+                    "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id,
+                }}
+                if parent_id else None
+            ),
+            pending_writes=[(task_id, channel, blobs[h]) for task_id, channel, h in writes],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint_type, checkpoint,"
+            " metadata_type, metadata FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: List[Any] = [thread_id, checkpoint_ns]
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(query, params).fetchone()
+            return self._tuple(conn, row) if row else None
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint_type, checkpoint,"
+            " metadata_type, metadata FROM checkpoints WHERE 1 = 1"
+        )
+        params: List[Any] = []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            params.append(before_id)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(query, params).fetchall()
+            results = []
+            for row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                if filter:
+                    metadata = self.serde.loads_typed((row[6], row[7]))
+                    if not all(metadata.get(k) == v for k, v in filter.items()):
+                        continue
+                results.append(self._tuple(conn, row))
+        yield from results
+
+    # -- writes --------------------------------------------------------------
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        c = checkpoint.copy()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        values: Dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        c_type, c_data = self.serde.dumps_typed(c)
+        m_type, m_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self._lock:
+            conn = self._connection()
+            for channel, version in new_versions.items():
+                blob_hash = self._put_blob(conn, values[channel]) if channel in values else None
+                conn.execute(
+                    "INSERT OR REPLACE INTO channel_values VALUES (?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, channel, str(version), blob_hash),
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 c_type, c_data, m_type, m_data, time.time()),
+            )
+            conn.commit()
+        self._maybe_prune()
+        return {"configurable": {
+            "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"],
+        }}
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock:
+            conn = self._connection()
+            for idx, (channel, value) in enumerate(writes):
+                write_idx = WRITES_IDX_MAP.get(channel, idx)
+                # Special writes (errors, interrupts) overwrite; regular ones are write-once
+                verb = "INSERT OR REPLACE" if write_idx < 0 else "INSERT OR IGNORE"
+                conn.execute(
+                    f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint_id, task_id, write_idx, channel,
+                     self._put_blob(conn, value), task_path),
+                )
+            conn.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            self._delete_threads(conn, [thread_id])
+            self._collect_blobs(conn)
+            conn.commit()
+
+    # -- retention -----------------------------------------------------------
+
+    def _delete_threads(self, conn: sqlite3.Connection, thread_ids: List[str]) -> None:
+        for table in ("checkpoints", "channel_values", "writes"):
+            conn.executemany(f"DELETE FROM {table} WHERE thread_id = ?", [(t,) for t in thread_ids])
+
+    def _collect_blobs(self, conn: sqlite3.Connection) -> int:
+        return conn.execute(
+            "DELETE FROM blobs WHERE hash NOT IN (SELECT blob_hash FROM channel_values WHERE blob_hash IS NOT NULL)"
+            " AND hash NOT IN (SELECT blob_hash FROM writes)"
+        ).rowcount
+
+    def prune(self) -> dict:
+        """Drops expired and excess threads, then blobs nothing refers to any more."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            conn = self._connection()
+            threads = conn.execute(
+                "SELECT thread_id, MAX(created_at) AS last_active FROM checkpoints"
+                " GROUP BY thread_id ORDER BY last_active DESC"
+            ).fetchall()
+            stale = [t for i, (t, last_active) in enumerate(threads) if last_active < cutoff or i >= self.max_threads]
+            if stale:
+                self._delete_threads(conn, stale)
+            blobs_removed = self._collect_blobs(conn)
+            conn.commit()
+        if stale:
+            print(f"✓ Pruned {len(stale)} checkpoint thread(s), {blobs_removed} blob(s)")
+        return {"threads_removed": len(stale), "blobs_removed": blobs_removed}
+
+    def _maybe_prune(self) -> None:
+        now = time.time()
+        if now - self._last_prune < self.prune_interval_seconds:
+            return
+        self._last_prune = now
+        self.prune()
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connection()
+            threads = conn.execute("SELECT COUNT(DISTINCT thread_id) FROM checkpoints").fetchone()[0]
+            checkpoints = conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+            blobs, blob_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        return {"threads": threads, "checkpoints": checkpoints, "blobs": blobs, "blob_bytes": blob_bytes}
+
+    # -- async ---------------------------------------------------------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        # Same scheme as InMemorySaver: zero-padded counter plus a random suffix
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+
+checkpointer = SqliteCheckpointer()
@@ -0,0 +1,132 @@
+import os
+import tempfile
+
+# Pipeline execution mode for the chunking node:
+#   "direct" - run extract -> markdown -> header split -> chunk in-process
+#   "agent"  - let the LLM deep agent orchestrate the same tools
+#   "stream" - page-by-page pipeline that embeds and indexes as it parses
+CHUNKING_MODE = os.getenv("CHUNKING_MODE", "direct")
+
+# How final_chunk cuts the header sections (all chunking modes):
+#   "semantic" - embedding-based breakpoints (one embedding call per ingest)
+#   "token"    - overlapping windows of TOKEN_CHUNK_SIZE tiktoken tokens, no API calls
+CHUNKING_STRATEGY = os.getenv("CHUNKING_STRATEGY", "semantic")
+TOKEN_CHUNK_SIZE = int(os.getenv("TOKEN_CHUNK_SIZE", "512"))
+TOKEN_CHUNK_OVERLAP = int(os.getenv("TOKEN_CHUNK_OVERLAP", "64"))
+TOKEN_CHUNK_ENCODING = os.getenv("TOKEN_CHUNK_ENCODING", "cl100k_base")
+
+# Near-duplicate chunks of a document (MinHash + LSH over word shingles) are
+# merged before embedding; DEDUP_THRESHOLD is the estimated Jaccard similarity
+# at which two chunks count as the same
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_SHINGLE_WORDS = int(os.getenv("DEDUP_SHINGLE_WORDS", "5"))
+
+# Intermediate artifacts handed between pipeline steps
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "artifacts"))
+ARTIFACT_TTL_SECONDS = float(os.getenv("ARTIFACT_TTL_SECONDS", "900"))
+
+# Content-addressed cache of finished ingestion results. Bump PIPELINE_VERSION
+# whenever validation/chunking/embedding output changes so old entries miss.
+PIPELINE_VERSION = os.getenv("PIPELINE_VERSION", "2")
+INGESTION_CACHE_DIR = os.getenv("INGESTION_CACHE_DIR", "./cache/ingestion")
+INGESTION_CACHE_ENABLED = os.getenv("INGESTION_CACHE_ENABLED", "true").lower() == "true"
+
+VECTORSTORE_DIR = os.getenv("VECTORSTORE_DIR", "./vectorstore")
+
+# Embeddings. EMBEDDING_PROVIDER picks the backend from the registry in
+# core/embeddings.py: "openai" (concurrent executor), "openai_sequential"
+# (LangChain client, one request at a time) or "hashing" (local NumPy, offline).
+# Vectors from different providers are not comparable: rebuild collections
+# after switching.
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")
+HASHING_EMBEDDING_DIM = int(os.getenv("HASHING_EMBEDDING_DIM", "1024"))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+CHUNKER_EMBEDDING_MODEL = os.getenv("CHUNKER_EMBEDDING_MODEL", "text-embedding-ada-002")
+# Semantic chunks longer than this are cut again at their strongest internal
+# breakpoint (0 disables the limit)
+SEMANTIC_CHUNK_MAX_TOKENS = int(os.getenv("SEMANTIC_CHUNK_MAX_TOKENS", "2048"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+# Concurrent executor behind the "openai" provider: texts are packed into
+# requests of EMBEDDING_MIN_BATCH_TOKENS..EMBEDDING_BATCH_TOKENS tokens (sized
+# so there are about two requests per concurrency slot) and up to
+# EMBEDDING_MAX_CONCURRENCY requests are in flight (halved on a 429, at most
+# once per window of in-flight requests, grown back one step per window).
+EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "100000"))
+EMBEDDING_MIN_BATCH_TOKENS = int(os.getenv("EMBEDDING_MIN_BATCH_TOKENS", "2000"))
+EMBEDDING_BATCH_MAX_INPUTS = int(os.getenv("EMBEDDING_BATCH_MAX_INPUTS", "512"))
+EMBEDDING_MAX_INPUT_TOKENS = int(os.getenv("EMBEDDING_MAX_INPUT_TOKENS", "8191"))
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "8"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "8"))
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./cache/embeddings.sqlite3")
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Loaded FAISS collections kept in process memory for search
+INDEX_CACHE_MAX_BYTES = int(os.getenv("INDEX_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+INDEX_CACHE_REVALIDATE_SECONDS = float(os.getenv("INDEX_CACHE_REVALIDATE_SECONDS", "5"))
+# Collections are updated in place: deletes leave tombstones and every write is
+# appended to a log next to the index files. Compaction rewrites the index once
+# tombstones exceed COLLECTION_COMPACT_DELETED_RATIO of the stored vectors or
+# the log outgrows COLLECTION_COMPACT_LOG_RATIO times the saved index files.
+COLLECTION_COMPACT_DELETED_RATIO = float(os.getenv("COLLECTION_COMPACT_DELETED_RATIO", "0.2"))
+COLLECTION_COMPACT_LOG_RATIO = float(os.getenv("COLLECTION_COMPACT_LOG_RATIO", "1.0"))
+VECTORSTORE_PRELOAD = [name for name in os.getenv("VECTORSTORE_PRELOAD", "").split(",") if name.strip()]
+
+# Retrieval: "vector" (FAISS only), "lexical" (BM25 only, no embedding calls)
+# or "hybrid" (both legs in parallel, merged by reciprocal rank fusion). Each
+# leg contributes up to max(k, HYBRID_CANDIDATES) candidates to the fusion.
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+# Parallel PDF text extraction (process pool, one contiguous page range per worker)
+PARALLEL_EXTRACTION_ENABLED = os.getenv("PARALLEL_EXTRACTION_ENABLED", "true").lower() == "true"
+PARALLEL_EXTRACTION_MIN_PAGES = int(os.getenv("PARALLEL_EXTRACTION_MIN_PAGES", "64"))
+PAGES_PER_EXTRACTION_WORKER = int(os.getenv("PAGES_PER_EXTRACTION_WORKER", "32"))
+EXTRACTION_MAX_WORKERS = int(os.getenv("EXTRACTION_MAX_WORKERS", str(os.cpu_count() or 1)))
+
+# Streaming ingestion (CHUNKING_MODE=stream)
+STREAM_MAX_SECTION_CHARS = int(os.getenv("STREAM_MAX_SECTION_CHARS", "20000"))
+STREAM_PREFETCH_SECTIONS = int(os.getenv("STREAM_PREFETCH_SECTIONS", "8"))
+
+# Uploads are copied to disk in fixed-size chunks; larger bodies get a 413
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+
+# Bounded pool for CPU-heavy / blocking work called from async graph nodes
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", str(min(8, (os.cpu_count() or 1) + 2))))
+
+# Background ingestion jobs
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "./cache/jobs.sqlite3")
+JOBS_UPLOAD_DIR = os.getenv("JOBS_UPLOAD_DIR", "./cache/job_uploads")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "100"))
+
+# Graph checkpoints (SQLite). Threads idle longer than the TTL, and the oldest
+# threads beyond CHECKPOINT_MAX_THREADS, are pruned.
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "./cache/checkpoints.sqlite3")
+CHECKPOINT_TTL_SECONDS = float(os.getenv("CHECKPOINT_TTL_SECONDS", str(7 * 24 * 3600)))
+CHECKPOINT_MAX_THREADS = int(os.getenv("CHECKPOINT_MAX_THREADS", "1000"))
+CHECKPOINT_PRUNE_INTERVAL_SECONDS = float(os.getenv("CHECKPOINT_PRUNE_INTERVAL_SECONDS", "300"))
+
+# Process-wide request/token budgets enforced before calling the API (0 disables
+# a limit). Chat calls reserve prompt tokens plus LLM_COMPLETION_TOKENS_ESTIMATE
+# and settle against the reported usage afterwards.
+LLM_RPM = int(os.getenv("LLM_RPM", "500"))
+LLM_TPM = int(os.getenv("LLM_TPM", "200000"))
+LLM_COMPLETION_TOKENS_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", "1024"))
+# Chat retries are made by the scheduled wrapper (the client's own are off), so each attempt is booked
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+EMBEDDING_RPM = int(os.getenv("EMBEDDING_RPM", "3000"))
+EMBEDDING_TPM = int(os.getenv("EMBEDDING_TPM", "1000000"))
+
+# Opt-in cache of chat completions (including tool-call messages), keyed by
+# model/parameters and the full prompt with tool results
+LLM_CACHE = os.getenv("LLM_CACHE", "false").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./cache/llm.sqlite3")
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
@@ -0,0 +1,185 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import xxhash
+from langchain_core.embeddings import Embeddings
+
+from app.backend.core.config import EMBEDDING_CACHE_MAX_BYTES, EMBEDDING_CACHE_PATH
+
+# SQLite limits the number of bound parameters per statement
+_MAX_PARAMS = 500
+
+
+def text_hash(text: str) -> str:
+    return xxhash.xxh3_128_hexdigest(text.encode("utf-8"))
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by (model, text hash).
+
+    Vectors are stored as raw float32 blobs in SQLite. When the total size goes
+    over max_bytes the least recently used entries are evicted down to 90% of
+    the budget.
+    """
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " text_hash TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " PRIMARY KEY (model, text_hash))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, np.ndarray]:
+        """Returns the cached vectors for the given hashes (missing ones are omitted)."""
+        found: Dict[str, np.ndarray] = {}
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(hashes), _MAX_PARAMS):
+                batch = hashes[start:start + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32)
+                if rows:
+                    conn.execute(
+                        f"UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash IN ({placeholders})",
+                        [now, model, *batch],
+                    )
+            conn.commit()
+            self._counters["hits"] += len(found)
+            self._counters["misses"] += len(hashes) - len(found)
+        return found
+
+    def put_many(self, model: str, items: Dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for h, vector in items.items():
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            rows.append((model, h, blob, len(blob), now))
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.commit()
+            self._evict_if_needed(conn)
+
+    def _evict_if_needed(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        while total > target:
+            rows = conn.execute(
+                "SELECT rowid, size FROM embeddings ORDER BY last_used ASC LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                break
+            doomed = []
+            for rowid, size in rows:
+                doomed.append(rowid)
+                total -= size
+                if total <= target:
+                    break
+            for start in range(0, len(doomed), _MAX_PARAMS):
+                batch = doomed[start:start + _MAX_PARAMS]
+                conn.execute(f"DELETE FROM embeddings WHERE rowid IN ({','.join('?' * len(batch))})", batch)
+            evicted += len(doomed)
+        conn.commit()
+        self._counters["evictions"] += evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM embeddings")
+            conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connection()
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embeddings").fetchone()
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters.update({
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+        })
+        return counters
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps any LangChain embedder so repeated texts are served from EmbeddingCache."""
+
+    def __init__(self, underlying: Embeddings, model: str, cache: EmbeddingCache):
+        self.underlying = underlying
+        self.model = model
+        self.cache = cache
+
+    @property
+    def batches_internally(self) -> bool:
+        return getattr(self.underlying, "batches_internally", False)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [text_hash(t) for t in texts]
+        cached = self.cache.get_many(self.model, list(dict.fromkeys(hashes)))
+
+        # Embed each distinct missing text once
+        missing: Dict[str, str] = {}
+        for h, t in zip(hashes, texts):
+            if h not in cached and h not in missing:
+                missing[h] = t
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            fresh = {h: np.asarray(v, dtype=np.float32) for h, v in zip(missing.keys(), vectors)}
+            self.cache.put_many(self.model, fresh)
+            cached.update(fresh)
+
+        return [cached[h].tolist() for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        h = text_hash(text)
+        cached = self.cache.get_many(self.model, [h])
+        if h in cached:
+            return cached[h].tolist()
+        vector = np.asarray(self.underlying.embed_query(text), dtype=np.float32)
+        self.cache.put_many(self.model, {h: vector})
+        return vector.tolist()
+
+
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,258 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import openai
+from langchain_core.embeddings import Embeddings
+
+from app.backend.core.config import (
+    EMBEDDING_BATCH_MAX_INPUTS, EMBEDDING_BATCH_TOKENS, EMBEDDING_MAX_CONCURRENCY,
+    EMBEDDING_MAX_INPUT_TOKENS, EMBEDDING_MAX_RETRIES, EMBEDDING_MIN_BATCH_TOKENS
+)
+from app.backend.core.rate_limiter import embedding_scheduler
+from app.backend.core.tokenizer import load_encoding
+
+# Errors worth retrying; only RateLimitError also shrinks the concurrency limit
+TRANSIENT_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError,
+                     openai.InternalServerError)
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before retrying: the server's Retry-After, else exponential backoff."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        if retry_after is not None:
+            return min(60.0, float(retry_after))
+    except ValueError:
+        pass
+    return min(60.0, 0.5 * 2 ** attempt)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit: each success grows the limit by 1/limit (about +1
+    per full window of requests), a throttle halves it. Requests already in
+    flight when the limit was halved were sent at the old limit, so their
+    429s don't halve it again; the next halving needs a request admitted
+    after the last one.
+    """
+
+    def __init__(self, maximum: int, minimum: int = 1):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = float(maximum)
+        self.in_flight = 0
+        self._admitted = 0
+        self._halved_at = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self) -> int:
+        """Waits for a slot. Returns the request's admission number, for on_throttle."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            self._admitted += 1
+            return self._admitted
+
+    async def __aexit__(self, *exc_info):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self) -> None:
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_throttle(self, admitted: int) -> None:
+        if admitted <= self._halved_at:
+            return
+        self._halved_at = self._admitted
+        self.limit = max(self.minimum, self.limit / 2)
+
+
+class EmbeddingExecutor:
+    """
+    Embeds large text lists with concurrent, token-budgeted requests.
+
+    Texts are tokenized once with tiktoken and the token ids are sent as the
+    request input (no second tokenization server-side, exact truncation).
+    Consecutive texts are packed into requests whose token budget adapts to
+    the call: about two requests per currently allowed concurrency slot,
+    clamped to [min_batch_tokens, max_batch_tokens] and max_batch_inputs
+    inputs. After throttling shrinks the limit, the next calls send fewer,
+    larger requests. The requests run concurrently on one
+    AsyncOpenAI client owned by a background event loop, so sync callers in
+    worker threads and async callers share the same connection pool and the
+    same adaptive limit.
+    """
+
+    def __init__(self, model: str, max_batch_tokens: int = EMBEDDING_BATCH_TOKENS,
+                 min_batch_tokens: int = EMBEDDING_MIN_BATCH_TOKENS,
+                 max_batch_inputs: int = EMBEDDING_BATCH_MAX_INPUTS,
+                 max_input_tokens: int = EMBEDDING_MAX_INPUT_TOKENS,
+                 max_concurrency: int = EMBEDDING_MAX_CONCURRENCY, max_retries: int = EMBEDDING_MAX_RETRIES,
+                 client_factory: Optional[Callable[[], Any]] = None):
+        self.model = model
+        self.max_batch_tokens = max_batch_tokens
+        self.min_batch_tokens = min_batch_tokens
+        self.max_batch_inputs = max_batch_inputs
+        self.max_input_tokens = max_input_tokens
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        # Retries are handled here so throttling can feed the limiter
+        self._client_factory = client_factory or (lambda: openai.AsyncOpenAI(max_retries=0))
+        self._encoding = load_encoding(model)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client = None
+        self._limiter: Optional[AdaptiveLimiter] = None
+        self._counters = {"requests": 0, "inputs": 0, "tokens": 0, "throttled": 0, "retries": 0}
+
+    # -- background loop -----------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="embedding-executor", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def _submit(self, coro: Coroutine) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    # -- batching ------------------------------------------------------------
+
+    def encode(self, texts: Sequence[str]) -> List[Union[List[int], str]]:
+        """Request inputs: truncated token ids, or plain text when tiktoken is unavailable."""
+        # The API rejects empty inputs
+        texts = [text if text else " " for text in texts]
+        if self._encoding is None:
+            # ~4 bytes per token is the usual estimate for English text
+            return [text[:self.max_input_tokens * 4] for text in texts]
+        return [tokens[:self.max_input_tokens]
+                for tokens in self._encoding.encode_batch(texts, disallowed_special=())]
+
+    def _token_count(self, item: Union[List[int], str]) -> int:
+        return len(item) if isinstance(item, list) else max(1, len(item.encode("utf-8")) // 4)
+
+    def batch_budget(self, total_tokens: int) -> int:
+        """Token budget per request for a call of total_tokens tokens."""
+        slots = int(self._limiter.limit) if self._limiter else self.max_concurrency
+        target = -(-total_tokens // (2 * slots))
+        return max(self.min_batch_tokens, min(self.max_batch_tokens, target))
+
+    def pack(self, inputs: Sequence[Union[List[int], str]]) -> List[List[int]]:
+        """Greedily groups consecutive input indices under the token and input-count budgets."""
+        counts = [self._token_count(item) for item in inputs]
+        budget = self.batch_budget(sum(counts))
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for i, tokens in enumerate(counts):
+            if current and (current_tokens + tokens > budget
+                            or len(current) >= self.max_batch_inputs):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    # -- requests ------------------------------------------------------------
+
+    async def _embed_batch(self, indices: List[int], inputs: Sequence, out: List) -> None:
+        payload = [inputs[i] for i in indices]
+        tokens = sum(self._token_count(item) for item in payload)
+        for attempt in range(self.max_retries + 1):
+            await embedding_scheduler.aacquire(tokens)
+            async with self._limiter as admitted:
+                try:
+                    response = await self._client.embeddings.create(model=self.model, input=payload)
+                except TRANSIENT_ERRORS as e:
+                    if isinstance(e, openai.RateLimitError):
+                        self._limiter.on_throttle(admitted)
+                        self._counters["throttled"] += 1
+                    if attempt == self.max_retries:
+                        raise
+                    self._counters["retries"] += 1
+                    error = e
+                else:
+                    self._limiter.on_success()
+                    break
+            await asyncio.sleep(retry_delay(error, attempt))
+
+        self._counters["requests"] += 1
+        self._counters["inputs"] += len(indices)
+        self._counters["tokens"] += tokens
+        for item in response.data:
+            out[indices[item.index]] = item.embedding
+
+    async def _aembed(self, texts: Sequence[str]) -> np.ndarray:
+        if self._client is None:
+            self._client = self._client_factory()
+            self._limiter = AdaptiveLimiter(self.max_concurrency)
+        inputs = self.encode(texts)
+        out: List = [None] * len(inputs)
+        await asyncio.gather(*(self._embed_batch(batch, inputs, out) for batch in self.pack(inputs)))
+        return np.asarray(out, dtype=np.float32)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Blocking entry point for worker threads; returns an (n, dim) float32 matrix."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._submit(self._aembed(texts)).result()
+
+    async def aembed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return await asyncio.wrap_future(self._submit(self._aembed(texts)))
+
+    def stats(self) -> dict:
+        stats = dict(self._counters)
+        stats["concurrency_limit"] = round(self._limiter.limit, 2) if self._limiter else self.max_concurrency
+        stats["in_flight"] = self._limiter.in_flight if self._limiter else 0
+        return stats
+
+
+class ConcurrentOpenAIEmbeddings(Embeddings):
+    """LangChain embedder backed by a shared EmbeddingExecutor."""
+
+    # Lets embed_documents_batched hand over whole lists instead of slicing them
+    batches_internally = True
+
+    def __init__(self, executor: EmbeddingExecutor):
+        self.executor = executor
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.executor.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.executor.embed([text])[0].tolist()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return (await self.executor.aembed(texts)).tolist()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.executor.aembed([text]))[0].tolist()
+
+
+
+_executors: Dict[str, EmbeddingExecutor] = {}
+_executors_guard = threading.Lock()
+
+
+def get_executor(model: str) -> EmbeddingExecutor:
+    """One executor (client, loop, limiter) per model, shared by every caller."""
+    with _executors_guard:
+        if model not in _executors:
+            _executors[model] = EmbeddingExecutor(model)
+        return _executors[model]
+
+
+def executor_stats() -> dict:
+    with _executors_guard:
+        return {model: executor.stats() for model, executor in _executors.items()}
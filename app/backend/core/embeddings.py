@@ -0,0 +1,62 @@
+from typing import Callable, Dict, Optional, Set
+
+from langchain_core.embeddings import Embeddings
+
+from app.backend.core.config import (
+    EMBEDDING_CACHE_ENABLED, EMBEDDING_MODEL, EMBEDDING_PROVIDER, HASHING_EMBEDDING_DIM
+)
+from app.backend.core.embedding_cache import CachedEmbeddings, embedding_cache
+
+# provider name -> factory(model) returning a LangChain embedder
+EMBEDDING_PROVIDERS: Dict[str, Callable[[str], Embeddings]] = {}
+# Providers whose vectors are worth keeping in the persistent embedding cache
+_CACHED_PROVIDERS: Set[str] = set()
+
+
+def register_embedding_provider(name: str, factory: Callable[[str], Embeddings], cache: bool = True) -> None:
+    """
+    Makes an embedder selectable through EMBEDDING_PROVIDER (or get_embeddings(provider=...)).
+
+    cache=False skips the SQLite embedding cache, for local embedders that are
+    cheaper to recompute than to look up.
+    """
+    EMBEDDING_PROVIDERS[name] = factory
+    if cache:
+        _CACHED_PROVIDERS.add(name)
+    else:
+        _CACHED_PROVIDERS.discard(name)
+
+
+def _openai(model: str) -> Embeddings:
+    from app.backend.core.embedding_executor import ConcurrentOpenAIEmbeddings, get_executor
+    return ConcurrentOpenAIEmbeddings(get_executor(model))
+
+
+def _openai_sequential(model: str) -> Embeddings:
+    from langchain_openai import OpenAIEmbeddings
+    from app.backend.core.rate_limiter import ScheduledEmbeddings, embedding_scheduler
+    return ScheduledEmbeddings(OpenAIEmbeddings(model=model), embedding_scheduler)
+
+
+def _hashing(model: str) -> Embeddings:
+    from app.backend.core.local_embeddings import HashingEmbeddings
+    return HashingEmbeddings(dim=HASHING_EMBEDDING_DIM)
+
+
+register_embedding_provider("openai", _openai)
+# LangChain's client, one request at a time; kept for comparison
+register_embedding_provider("openai_sequential", _openai_sequential)
+register_embedding_provider("hashing", _hashing, cache=False)
+
+
+def get_embeddings(model: str = EMBEDDING_MODEL, provider: Optional[str] = None) -> Embeddings:
+    """Returns the embedder every tool should use, wrapped in the persistent embedding cache."""
+    provider = provider or EMBEDDING_PROVIDER
+    if provider not in EMBEDDING_PROVIDERS:
+        raise ValueError(f"Unknown embedding provider: {provider} (known: {', '.join(EMBEDDING_PROVIDERS)})")
+    embeddings = EMBEDDING_PROVIDERS[provider](model)
+    if not EMBEDDING_CACHE_ENABLED or provider not in _CACHED_PROVIDERS:
+        return embeddings
+    # OpenAI entries keep their existing cache keys; other providers are namespaced
+    cache_key = model if provider in ("openai", "openai_sequential") else f"{provider}:{model}"
+    return CachedEmbeddings(embeddings, cache_key, embedding_cache)
@@ -0,0 +1,18 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.backend.core.config import CPU_POOL_WORKERS
+
+# Dedicated pool so PDF parsing and chunking can't exhaust the event loop's
+# default executor (which FastAPI and LangGraph also use).
+cpu_pool = ThreadPoolExecutor(max_workers=CPU_POOL_WORKERS, thread_name_prefix="cpu")
+
+
+async def run_blocking(fn: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Runs a blocking function on the bounded CPU pool, preserving contextvars."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(cpu_pool, functools.partial(ctx.run, fn, *args, **kwargs))
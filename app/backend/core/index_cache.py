@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from app.backend.core.config import (
+    INDEX_CACHE_MAX_BYTES, INDEX_CACHE_REVALIDATE_SECONDS, VECTORSTORE_DIR
+)
+from app.backend.core.embeddings import get_embeddings
+from app.backend.core.vector_collection import INDEX_FILES, VectorCollection, log_files
+
+
+def collection_path(collection_name: str) -> str:
+    return os.path.join(VECTORSTORE_DIR, collection_name)
+
+
+def _signature(path: str) -> Optional[Tuple[int, ...]]:
+    """mtime/size of the on-disk index files and log records, used to detect out-of-process writes."""
+    try:
+        stats = [os.stat(os.path.join(path, name)) for name in INDEX_FILES]
+    except FileNotFoundError:
+        return None
+    return tuple(v for s in stats for v in (s.st_mtime_ns, s.st_size)) + tuple(seq for seq, _ in log_files(path))
+
+
+class IndexCache:
+    """
+    Process-wide LRU of loaded collections for search_vectordb.
+
+    Writers update the cached collection in place and re-register it (put);
+    entries are reloaded when the index files or log records change on disk; the disk check runs at
+    most once per INDEX_CACHE_REVALIDATE_SECONDS per collection, so queries
+    against a hot collection don't touch disk. Least recently used collections
+    are dropped once the estimated footprint exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = INDEX_CACHE_MAX_BYTES,
+                 revalidate_seconds: float = INDEX_CACHE_REVALIDATE_SECONDS):
+        self.max_bytes = max_bytes
+        self.revalidate_seconds = revalidate_seconds
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "loads": 0, "evictions": 0}
+
+    def get(self, collection_name: str) -> VectorCollection:
+        """Returns the loaded collection, loading it from disk on a miss or when stale."""
+        path = collection_path(collection_name)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(collection_name)
+            if entry is not None and now - entry["checked_at"] < self.revalidate_seconds:
+                self._entries.move_to_end(collection_name)
+                self._counters["hits"] += 1
+                return entry["collection"]
+
+        signature = _signature(path)
+        with self._lock:
+            entry = self._entries.get(collection_name)
+            if entry is not None and entry["signature"] == signature:
+                entry["checked_at"] = now
+                self._entries.move_to_end(collection_name)
+                self._counters["hits"] += 1
+                return entry["collection"]
+            self._counters["misses"] += 1
+
+        if signature is None:
+            self.invalidate(collection_name)
+            raise FileNotFoundError(f"Vector collection not found: {collection_name}")
+
+        collection = VectorCollection.load(path, get_embeddings())
+        self._store(collection_name, collection, signature)
+        with self._lock:
+            self._counters["loads"] += 1
+        return collection
+
+    def put(self, collection_name: str, collection: VectorCollection) -> None:
+        """Registers a collection that was just written, so the next query needs no reload."""
+        self._store(collection_name, collection, _signature(collection_path(collection_name)))
+
+    def _store(self, collection_name: str, collection: VectorCollection, signature) -> None:
+        size = collection.nbytes()
+        with self._lock:
+            self._entries[collection_name] = {
+                "collection": collection,
+                "signature": signature,
+                "size": size,
+                "checked_at": time.monotonic(),
+            }
+            self._entries.move_to_end(collection_name)
+            # Always keep the collection we just stored, even if it alone exceeds the budget
+            while len(self._entries) > 1 and self._total_bytes() > self.max_bytes:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def _total_bytes(self) -> int:
+        return sum(entry["size"] for entry in self._entries.values())
+
+    def invalidate(self, collection_name: Optional[str] = None) -> None:
+        with self._lock:
+            if collection_name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(collection_name, None)
+
+    def warm_up(self, collection_names: List[str]) -> List[str]:
+        """Preloads the given collections; missing or unreadable ones are skipped."""
+        loaded = []
+        for name in collection_names:
+            name = name.strip()
+            try:
+                self.get(name)
+                loaded.append(name)
+            except Exception as e:
+                print(f"⚠ Could not preload collection '{name}': {e}")
+        return loaded
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            counters.update({
+                "collections": {name: entry["collection"].stats() for name, entry in self._entries.items()},
+                "size_bytes": self._total_bytes(),
+                "max_bytes": self.max_bytes,
+            })
+        return counters
+
+
+index_cache = IndexCache()
@@ -0,0 +1,263 @@
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+import orjson
+import xxhash
+import zstandard
+from langchain_core.documents import Document
+
+from app.backend.core.config import (
+    CHUNKER_EMBEDDING_MODEL, CHUNKING_MODE, CHUNKING_STRATEGY, DEDUP_ENABLED, DEDUP_NUM_PERM, DEDUP_SHINGLE_WORDS,
+    DEDUP_THRESHOLD, EMBEDDING_MODEL, EMBEDDING_PROVIDER, HASHING_EMBEDDING_DIM, INGESTION_CACHE_DIR,
+    INGESTION_CACHE_ENABLED, PIPELINE_VERSION, SEMANTIC_CHUNK_MAX_TOKENS, TOKEN_CHUNK_ENCODING, TOKEN_CHUNK_OVERLAP,
+    TOKEN_CHUNK_SIZE
+)
+
+RESULT_FILE = "result.json.zst"
+CHUNKS_FILE = "chunks.json.zst"
+VECTORS_FILE = "vectors.npy"
+
+# Request-specific fields that must not be replayed from the cache
+_VOLATILE_FIELDS = ("file_path", "file_name")
+# Parsed chunk lists kept for paging through /documents/{file_hash}/chunks
+_CHUNK_LISTS_KEPT = 8
+
+
+def hash_bytes(data: bytes) -> str:
+    """Content hash of an uploaded file."""
+    return xxhash.xxh3_128_hexdigest(data)
+
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Content hash of a file on disk, read in fixed-size chunks."""
+    hasher = xxhash.xxh3_128()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _settings_version() -> str:
+    """
+    Every setting that changes the stored chunks or vectors: the ingestion
+    mode (only stream runs store vectors), the chunking strategy and its
+    parameters, the dedup settings and the embedder.
+    """
+    if CHUNKING_STRATEGY == "token":
+        chunker = f"token-{TOKEN_CHUNK_SIZE}-{TOKEN_CHUNK_OVERLAP}-{TOKEN_CHUNK_ENCODING}"
+    else:
+        chunker = f"{CHUNKING_STRATEGY}-{CHUNKER_EMBEDDING_MODEL}-{SEMANTIC_CHUNK_MAX_TOKENS}"
+    dedup = f"dedup-{DEDUP_THRESHOLD}-{DEDUP_NUM_PERM}-{DEDUP_SHINGLE_WORDS}" if DEDUP_ENABLED else "nodedup"
+    return f"{CHUNKING_MODE}-{chunker}-{dedup}-{EMBEDDING_PROVIDER}-{EMBEDDING_MODEL}-{HASHING_EMBEDDING_DIM}"
+
+
+def _default(obj: Any):
+    if isinstance(obj, Document):
+        return {"page_content": obj.page_content, "metadata": obj.metadata}
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class IngestionCache:
+    """
+    Persistent cache of finished ingestion runs, keyed by the xxhash of the
+    uploaded PDF bytes plus PIPELINE_VERSION and the chunking, dedup and
+    embedding settings, so changing any of them never replays chunks cut
+    differently or vectors from another model.
+
+    Each entry is a directory holding the final graph state (validation
+    verdict, chunks, ...) as zstd-compressed JSON and, when the run wrote to a
+    FAISS collection, that document's chunks and vectors so they can be put
+    back into the collection without any embedding calls.
+    """
+
+    def __init__(self, cache_dir: str = INGESTION_CACHE_DIR, version: str = f"{PIPELINE_VERSION}-{_settings_version()}",
+                 enabled: bool = INGESTION_CACHE_ENABLED):
+        self.cache_dir = cache_dir
+        self.version = version
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+        self._chunk_lists: "OrderedDict[str, Tuple[tuple, List[dict]]]" = OrderedDict()
+        self._compressor = zstandard.ZstdCompressor(level=3)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def key(self, file_hash: str) -> str:
+        # Hashed, since model names may contain "/"
+        return f"{file_hash}-{xxhash.xxh3_64_hexdigest(self.version)}"
+
+    def _entry_dir(self, file_hash: str) -> str:
+        return os.path.join(self.cache_dir, self.key(file_hash))
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def get(self, file_hash: str) -> Optional[dict]:
+        """Returns the cached final state for the file, or None on a miss."""
+        if not self.enabled:
+            return None
+        entry_dir = self._entry_dir(file_hash)
+        try:
+            with open(os.path.join(entry_dir, RESULT_FILE), "rb") as f:
+                result = orjson.loads(self._decompressor.decompress(f.read()))
+        except (FileNotFoundError, zstandard.ZstdError, orjson.JSONDecodeError):
+            self._count("misses")
+            return None
+
+        if not self._restore_vectorstore(entry_dir, file_hash, result):
+            self._count("misses")
+            return None
+        self._count("hits")
+        return result
+
+    def put(self, file_hash: str, result: dict) -> None:
+        """Stores a finished run. The entry is written to a temp dir and swapped in atomically."""
+        if not self.enabled:
+            return
+        entry_dir = self._entry_dir(file_hash)
+        staging_dir = f"{entry_dir}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(staging_dir, exist_ok=True)
+        try:
+            payload = {k: v for k, v in result.items() if k not in _VOLATILE_FIELDS}
+            with open(os.path.join(staging_dir, RESULT_FILE), "wb") as f:
+                f.write(self._compressor.compress(orjson.dumps(payload, default=_default)))
+
+            self._save_document_vectors(staging_dir, file_hash, result)
+
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(staging_dir, entry_dir)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        self._count("stores")
+
+    def _entry_signature(self, entry_dir: str) -> tuple:
+        signature = []
+        for name in (RESULT_FILE, CHUNKS_FILE):
+            try:
+                stat = os.stat(os.path.join(entry_dir, name))
+                signature.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def chunks(self, file_hash: str) -> Optional[List[dict]]:
+        """
+        Returns the stored chunks of a finished run, or None if there is no entry.
+
+        Read straight from the entry (no hit counting, no vectorstore restore):
+        the state's pdf_chunks when present, else the chunks saved with the
+        document's vectors (streaming runs don't keep chunks in state). The
+        last few parsed lists are kept until their entry changes on disk, so
+        paging through a document decompresses it once.
+        """
+        entry_dir = self._entry_dir(file_hash)
+        signature = self._entry_signature(entry_dir)
+        if signature == (None, None):
+            return [] if os.path.isdir(entry_dir) else None
+        with self._lock:
+            kept = self._chunk_lists.get(file_hash)
+            if kept is not None and kept[0] == signature:
+                self._chunk_lists.move_to_end(file_hash)
+                return kept[1]
+
+        chunks: List[dict] = []
+        for name in (RESULT_FILE, CHUNKS_FILE):
+            try:
+                with open(os.path.join(entry_dir, name), "rb") as f:
+                    data = orjson.loads(self._decompressor.decompress(f.read()))
+            except (FileNotFoundError, zstandard.ZstdError, orjson.JSONDecodeError):
+                continue
+            if name == CHUNKS_FILE:
+                chunks = data
+                break
+            if data.get("pdf_chunks"):
+                chunks = data["pdf_chunks"]
+                break
+        with self._lock:
+            self._chunk_lists[file_hash] = (signature, chunks)
+            self._chunk_lists.move_to_end(file_hash)
+            while len(self._chunk_lists) > _CHUNK_LISTS_KEPT:
+                self._chunk_lists.popitem(last=False)
+        return chunks
+
+    def invalidate(self, file_hash: str) -> bool:
+        """Drops the entry for one file. Returns True if an entry existed."""
+        entry_dir = self._entry_dir(file_hash)
+        existed = os.path.isdir(entry_dir)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        if existed:
+            self._count("invalidations")
+        return existed
+
+    def invalidate_all(self) -> int:
+        """Drops every entry, for all pipeline versions."""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+            removed += 1
+        with self._lock:
+            self._counters["invalidations"] += removed
+        return removed
+
+    def _save_document_vectors(self, staging_dir: str, file_hash: str, result: dict) -> None:
+        """Keeps only this document's slice of the (shared) collection, not the whole index."""
+        from app.backend.tools.embedding_tools import export_document
+
+        collection_name = result.get("collection_name")
+        if not collection_name or not result.get("vectorstore_info"):
+            return
+        exported = export_document(collection_name, file_hash)
+        if exported is None:
+            return
+        documents, vectors = exported
+        with open(os.path.join(staging_dir, CHUNKS_FILE), "wb") as f:
+            f.write(self._compressor.compress(orjson.dumps(documents, default=_default)))
+        np.save(os.path.join(staging_dir, VECTORS_FILE), vectors)
+
+    def _restore_vectorstore(self, entry_dir: str, file_hash: str, result: dict) -> bool:
+        """
+        Puts the cached chunks back if they were removed from the collection.
+        Returns False when they can't be (no stored vectors, or vectors that
+        don't fit the collection), so the entry is treated as a miss.
+        """
+        from app.backend.core.embeddings import get_embeddings
+        from app.backend.tools.embedding_tools import collection_dimension, has_document, upsert_documents
+
+        collection_name = result.get("collection_name")
+        if not collection_name or not result.get("vectorstore_info"):
+            return True
+        if has_document(collection_name, file_hash):
+            return True
+        try:
+            vectors = np.load(os.path.join(entry_dir, VECTORS_FILE))
+            with open(os.path.join(entry_dir, CHUNKS_FILE), "rb") as f:
+                chunks = orjson.loads(self._decompressor.decompress(f.read()))
+        except (FileNotFoundError, ValueError, zstandard.ZstdError, orjson.JSONDecodeError):
+            return False
+        dimension = collection_dimension(collection_name)
+        if vectors.ndim != 2 or len(vectors) != len(chunks) or dimension not in (None, vectors.shape[1]):
+            print(f"⚠ Cached vectors of {file_hash} {vectors.shape} don't fit collection "
+                  f"'{collection_name}' (dimension {dimension}); ingesting again")
+            return False
+        documents = [Document(page_content=c["page_content"], metadata=c["metadata"]) for c in chunks]
+        upsert_documents(collection_name, documents, vectors, get_embeddings())
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+        counters["enabled"] = self.enabled
+        counters["pipeline_version"] = self.version
+        return counters
+
+
+ingestion_cache = IngestionCache()
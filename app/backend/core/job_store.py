@@ -0,0 +1,158 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+import orjson
+import zstandard
+
+from app.backend.core.config import JOBS_DB_PATH
+from app.backend.core.ingestion_cache import _default
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED_STATUSES = (SUCCEEDED, FAILED)
+
+
+class JobStore:
+    """
+    SQLite persistence for background ingestion jobs and their progress events.
+
+    Queued and running jobs survive a backend restart: the job queue re-enqueues
+    them from here on startup.
+    """
+
+    def __init__(self, path: str = JOBS_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._compressor = zstandard.ZstdCompressor(level=3)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " file_name TEXT,"
+                " file_path TEXT NOT NULL,"
+                " file_hash TEXT,"
+                " current_node TEXT,"
+                " error TEXT,"
+                " result BLOB,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at);"
+                "CREATE TABLE IF NOT EXISTS job_events ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " job_id TEXT NOT NULL,"
+                " event TEXT NOT NULL,"
+                " data BLOB NOT NULL,"
+                " created_at REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events(job_id, seq);"
+            )
+            self._conn = conn
+        return self._conn
+
+    def create(self, file_name: str, file_path: str, file_hash: Optional[str]) -> dict:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO jobs (id, status, file_name, file_path, file_hash, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, file_name, file_path, file_hash, now, now),
+            )
+            conn.commit()
+        self.add_event(job_id, QUEUED, {"status": QUEUED})
+        return self.get(job_id)
+
+    def get(self, job_id: str, include_result: bool = True) -> Optional[dict]:
+        with self._lock:
+            row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        result = job.pop("result")
+        if include_result and result is not None:
+            job["result"] = orjson.loads(self._decompressor.decompress(result))
+        return job
+
+    def latest_succeeded(self, file_hash: str) -> Optional[str]:
+        """Id of the most recent succeeded job for the file, or None."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT id FROM jobs WHERE file_hash = ? AND status = ? ORDER BY updated_at DESC LIMIT 1",
+                (file_hash, SUCCEEDED),
+            ).fetchone()
+        return row["id"] if row is not None else None
+
+    def update(self, job_id: str, status: Optional[str] = None, current_node: Optional[str] = None,
+               error: Optional[str] = None, result: Optional[dict] = None) -> None:
+        fields, values = ["updated_at = ?"], [time.time()]
+        if status is not None:
+            fields.append("status = ?")
+            values.append(status)
+        if current_node is not None:
+            fields.append("current_node = ?")
+            values.append(current_node)
+        if error is not None:
+            fields.append("error = ?")
+            values.append(error)
+        if result is not None:
+            fields.append("result = ?")
+            values.append(self._compressor.compress(orjson.dumps(result, default=_default)))
+        with self._lock:
+            conn = self._connection()
+            conn.execute(f"UPDATE jobs SET {', '.join(fields)} WHERE id = ?", [*values, job_id])
+            conn.commit()
+
+    def add_event(self, job_id: str, event: str, data: dict) -> int:
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                "INSERT INTO job_events (job_id, event, data, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, event, orjson.dumps(data), time.time()),
+            )
+            conn.commit()
+            return cursor.lastrowid
+
+    def events_since(self, job_id: str, after_seq: int = 0) -> List[dict]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT seq, event, data, created_at FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after_seq),
+            ).fetchall()
+        return [
+            {"seq": row["seq"], "event": row["event"], "data": orjson.loads(row["data"]), "created_at": row["created_at"]}
+            for row in rows
+        ]
+
+    def unfinished(self) -> List[dict]:
+        """Queued and interrupted jobs, oldest first."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [self.get(row["id"], include_result=False) for row in rows]
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)
+            ).fetchone()[0]
+
+
+job_store = JobStore()
@@ -0,0 +1,224 @@
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from app.backend.core.config import BM25_B, BM25_K1
+
+LEXICAL_FILE = "lexical.npz"
+
+# Identifier-like runs ("PN-4471-A", "7.3.2", "ISO/IEC") are kept whole and
+# also indexed by their parts, so exact ids and partial ids both match
+_TOKEN_RE = re.compile(r"\w+(?:[./\-]\w+)*", re.UNICODE)
+_PART_RE = re.compile(r"[./\-]")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+        if _PART_RE.search(token):
+            tokens.extend(part for part in _PART_RE.split(token) if part)
+    return tokens
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over one collection's chunks, stored as flat arrays.
+
+    terms is sorted; the postings of terms[i] are postings_doc/postings_tf
+    [offsets[i]:offsets[i + 1]], where postings_doc indexes chunk_ids and
+    doc_len. Scoring a query touches only the postings of its terms.
+    """
+
+    def __init__(self, chunk_ids: np.ndarray, doc_len: np.ndarray, terms: np.ndarray,
+                 offsets: np.ndarray, postings_doc: np.ndarray, postings_tf: np.ndarray):
+        self.chunk_ids = chunk_ids
+        self.doc_len = doc_len
+        self.terms = terms
+        self.offsets = offsets
+        self.postings_doc = postings_doc
+        self.postings_tf = postings_tf
+        self.avg_len = max(1.0, float(doc_len.mean())) if len(doc_len) else 1.0
+        self._term_ids: Dict[str, int] = {term: i for i, term in enumerate(terms.tolist())}
+
+    @classmethod
+    def _from_postings(cls, chunk_ids: np.ndarray, doc_len: np.ndarray, term_col: np.ndarray,
+                       doc_col: np.ndarray, tf_col: np.ndarray) -> "LexicalIndex":
+        """Index from one (term, doc, tf) row per posting, in any order."""
+        terms, term_ids = np.unique(term_col, return_inverse=True)
+        order = np.lexsort((doc_col, term_ids))
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(terms)), out=offsets[1:])
+        return cls(
+            chunk_ids=chunk_ids,
+            doc_len=np.asarray(doc_len, dtype=np.int32),
+            terms=terms.astype(str),
+            offsets=offsets,
+            postings_doc=np.asarray(doc_col, dtype=np.int32)[order],
+            postings_tf=np.asarray(tf_col, dtype=np.int32)[order],
+        )
+
+    @classmethod
+    def build(cls, chunk_ids: Sequence[str], texts: Sequence[str]) -> "LexicalIndex":
+        term_col, doc_col, tf_col, doc_len = [], [], [], []
+        for doc, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_len.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                term_col.append(term)
+                doc_col.append(doc)
+                tf_col.append(tf)
+        return cls._from_postings(np.array(chunk_ids, dtype=str), np.asarray(doc_len),
+                                  np.array(term_col, dtype=str), np.asarray(doc_col), np.asarray(tf_col))
+
+    def _rows(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(term, doc, tf) per posting."""
+        term_col = self.terms[np.repeat(np.arange(len(self.terms)), np.diff(self.offsets))]
+        return term_col, self.postings_doc, self.postings_tf
+
+    @classmethod
+    def merge(cls, parts: Sequence[Tuple["LexicalIndex", np.ndarray]]) -> "LexicalIndex":
+        """
+        One index over the kept chunks of several (index, keep mask) parts.
+
+        Only postings are moved around: nothing is re-tokenized, so merging
+        costs array work proportional to the parts, not tokenizing their text.
+        """
+        columns = []
+        offset = 0
+        for index, keep in parts:
+            position = np.cumsum(keep) - 1
+            term_col, doc_col, tf_col = index._rows()
+            kept = keep[doc_col]
+            columns.append((index.chunk_ids[keep], index.doc_len[keep], term_col[kept],
+                            position[doc_col[kept]] + offset, tf_col[kept]))
+            offset += int(keep.sum())
+        return cls._from_postings(*(np.concatenate(column) for column in zip(*columns)))
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore: FAISS) -> "LexicalIndex":
+        chunk_ids = [vectorstore.index_to_docstore_id[i] for i in range(vectorstore.index.ntotal)]
+        texts = [vectorstore.docstore.search(chunk_id).page_content for chunk_id in chunk_ids]
+        return cls.build(chunk_ids, texts)
+
+    def save(self, directory: str) -> str:
+        path = os.path.join(directory, LEXICAL_FILE)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(tmp_path, chunk_ids=self.chunk_ids, doc_len=self.doc_len, terms=self.terms,
+                 offsets=self.offsets, postings_doc=self.postings_doc, postings_tf=self.postings_tf)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, directory: str) -> "LexicalIndex":
+        with np.load(os.path.join(directory, LEXICAL_FILE)) as data:
+            return cls(**{name: data[name] for name in data.files})
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.chunk_ids, self.doc_len, self.terms, self.offsets,
+                                      self.postings_doc, self.postings_tf))
+
+
+class SegmentedLexicalIndex:
+    """
+    BM25 over a collection that is updated in place.
+
+    Every write adds an immutable LexicalIndex segment holding only its own
+    chunks; removed chunks are masked out of their segment instead of
+    rewriting it. After each add the newest segments are merged while the
+    one before is less than twice the newest's size, so a collection has
+    O(log n) segments and a chunk's postings are moved O(log n) times over
+    its life. Document frequencies and lengths are taken over live chunks
+    only, so scores match a single index built from the live chunks.
+    """
+
+    def __init__(self, base: Optional[LexicalIndex] = None):
+        self.segments: List[LexicalIndex] = []
+        self.dead: List[np.ndarray] = []
+        self._where: Dict[str, Tuple[int, int]] = {}
+        self.live_docs = 0
+        self.live_len = 0
+        if base is not None:
+            self.add(base)
+
+    def _live(self, segment: int) -> int:
+        return len(self.dead[segment]) - int(self.dead[segment].sum())
+
+    def _place(self, segment: int) -> None:
+        for doc, chunk_id in enumerate(self.segments[segment].chunk_ids.tolist()):
+            self._where[chunk_id] = (segment, doc)
+
+    def add(self, segment: LexicalIndex) -> None:
+        """Adds the chunks of a freshly built segment; their ids must not be live already."""
+        if not len(segment.chunk_ids):
+            return
+        self.segments.append(segment)
+        self.dead.append(np.zeros(len(segment.chunk_ids), dtype=bool))
+        self._place(len(self.segments) - 1)
+        self.live_docs += len(segment.chunk_ids)
+        self.live_len += int(segment.doc_len.sum())
+        while len(self.segments) > 1 and self._live(-2) < 2 * self._live(-1):
+            merged = LexicalIndex.merge([(self.segments[-2], ~self.dead[-2]), (self.segments[-1], ~self.dead[-1])])
+            del self.segments[-2:], self.dead[-2:]
+            self.segments.append(merged)
+            self.dead.append(np.zeros(len(merged.chunk_ids), dtype=bool))
+            self._place(len(self.segments) - 1)
+
+    def remove(self, chunk_ids: Iterable[str]) -> None:
+        """Masks chunks out; unknown ids are ignored."""
+        for chunk_id in chunk_ids:
+            where = self._where.pop(chunk_id, None)
+            if where is None:
+                continue
+            segment, doc = where
+            self.dead[segment][doc] = True
+            self.live_docs -= 1
+            self.live_len -= int(self.segments[segment].doc_len[doc])
+
+    def merged(self) -> LexicalIndex:
+        """One segment holding exactly the live chunks, e.g. to save at compaction."""
+        if not self.segments:
+            return LexicalIndex.build([], [])
+        return LexicalIndex.merge([(segment, ~dead) for segment, dead in zip(self.segments, self.dead)])
+
+    def search(self, query: str, k: int, k1: float = BM25_K1, b: float = BM25_B) -> List[Tuple[str, float]]:
+        """Top-k (chunk_id, bm25 score) for the query; chunks sharing no term are never returned."""
+        n_docs = self.live_docs
+        if not n_docs:
+            return []
+        avg_len = max(1.0, self.live_len / n_docs)
+        postings = []
+        df: Counter = Counter()
+        for term in set(tokenize(query)):
+            for segment, (index, dead) in enumerate(zip(self.segments, self.dead)):
+                term_id = index._term_ids.get(term)
+                if term_id is None:
+                    continue
+                start, end = index.offsets[term_id], index.offsets[term_id + 1]
+                docs, tf = index.postings_doc[start:end], index.postings_tf[start:end]
+                live = ~dead[docs]
+                df[term] += int(live.sum())
+                postings.append((term, segment, docs[live], tf[live]))
+        scores = [np.zeros(len(index.chunk_ids), dtype=np.float64) for index in self.segments]
+        for term, segment, docs, tf in postings:
+            idf = np.log1p((n_docs - df[term] + 0.5) / (df[term] + 0.5))
+            norm = k1 * (1 - b + b * self.segments[segment].doc_len[docs] / avg_len)
+            scores[segment][docs] += idf * tf * (k1 + 1) / (tf + norm)
+        flat = np.concatenate(scores)
+        matched = np.flatnonzero(flat)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-flat[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-flat[matched], kind="stable")]
+        starts = np.cumsum([0] + [len(index.chunk_ids) for index in self.segments])
+        segments = np.searchsorted(starts, matched, side="right") - 1
+        return [(str(self.segments[segment].chunk_ids[i - starts[segment]]), float(flat[i]))
+                for segment, i in zip(segments.tolist(), matched.tolist())]
+
+    def nbytes(self) -> int:
+        return sum(index.nbytes() + dead.nbytes for index, dead in zip(self.segments, self.dead))
@@ -0,0 +1,170 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+import orjson
+import xxhash
+import zstandard
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from app.backend.core.config import LLM_CACHE_MAX_BYTES, LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS
+
+_UNSENT_FIELDS = ("id", "usage_metadata", "response_metadata")
+
+
+class LLMResponseCache(BaseCache):
+    """
+    SQLite cache of chat completions for ChatOpenAI(cache=...).
+
+    LangChain hands the cache the serialized message list as `prompt` (system
+    prompt, user input and every earlier tool call/result) and the model plus
+    its parameters and bound tools as `llm_string`; the key is a hash of each.
+    Generations are stored with langchain's serializer, so AIMessages carrying
+    tool calls replay exactly and a cached deep-agent run needs no network.
+    Entries expire after ttl_seconds; past max_bytes the least recently used
+    are evicted down to 90%.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+                 max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._compressor = zstandard.ZstdCompressor(level=3)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " llm_hash TEXT NOT NULL,"
+                " prompt_hash TEXT NOT NULL,"
+                " model TEXT,"
+                " generations BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " PRIMARY KEY (llm_hash, prompt_hash))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _normalize_prompt(prompt: str) -> bytes:
+        """
+        Drops fields that are never sent to the model from the serialized messages.
+
+        Graph runs stamp every message with a fresh uuid, and cache hits zero
+        an AIMessage's usage, so ids and usage/response metadata would make
+        equal conversations hash differently. Tool-call ids are kept: on
+        replay they come from the cached AIMessage, so they match the recorded
+        tool results.
+        """
+        try:
+            messages = orjson.loads(prompt)
+        except orjson.JSONDecodeError:
+            return prompt.encode("utf-8")
+        if isinstance(messages, list):
+            for message in messages:
+                if isinstance(message, dict) and isinstance(message.get("kwargs"), dict):
+                    for field in _UNSENT_FIELDS:
+                        message["kwargs"].pop(field, None)
+        return orjson.dumps(messages, option=orjson.OPT_SORT_KEYS)
+
+    def _key(self, prompt: str, llm_string: str):
+        return xxhash.xxh3_128_hexdigest(llm_string), xxhash.xxh3_128_hexdigest(self._normalize_prompt(prompt))
+
+    @staticmethod
+    def _model(llm_string: str) -> Optional[str]:
+        # llm_string is "<serialized model>---[('stop', None)]"; best effort only
+        try:
+            return orjson.loads(llm_string.split("---")[0])["kwargs"].get("model_name")
+        except Exception:
+            return None
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        llm_hash, prompt_hash = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT generations, created_at FROM responses WHERE llm_hash = ? AND prompt_hash = ?",
+                (llm_hash, prompt_hash),
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    conn.execute("DELETE FROM responses WHERE llm_hash = ? AND prompt_hash = ?",
+                                 (llm_hash, prompt_hash))
+                    conn.commit()
+                self._counters["misses"] += 1
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE llm_hash = ? AND prompt_hash = ?",
+                         (now, llm_hash, prompt_hash))
+            conn.commit()
+            self._counters["hits"] += 1
+        return [loads(g) for g in orjson.loads(self._decompressor.decompress(row[0]))]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        llm_hash, prompt_hash = self._key(prompt, llm_string)
+        blob = self._compressor.compress(orjson.dumps([dumps(g) for g in return_val]))
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (llm_hash, prompt_hash, self._model(llm_string), blob, len(blob), now, now),
+            )
+            conn.commit()
+            self._counters["stores"] += 1
+            self._evict_if_needed(conn)
+
+    def _evict_if_needed(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            target = int(self.max_bytes * 0.9)
+            doomed = []
+            for rowid, size in conn.execute("SELECT rowid, size FROM responses ORDER BY last_used ASC"):
+                doomed.append((rowid,))
+                total -= size
+                if total <= target:
+                    break
+            conn.executemany("DELETE FROM responses WHERE rowid = ?", doomed)
+            self._counters["evictions"] += len(doomed)
+        conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connection()
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters.update({
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+        })
+        return counters
+
+
+llm_cache = LLMResponseCache()
@@ -0,0 +1,57 @@
+import functools
+import re
+from typing import List, Tuple
+
+import numpy as np
+import xxhash
+from langchain_core.embeddings import Embeddings
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@functools.lru_cache(maxsize=1 << 18)
+def _feature(token: str, dim: int) -> Tuple[int, float]:
+    """Bucket and sign of a feature; one 64-bit hash covers both."""
+    h = xxhash.xxh3_64_intdigest(token)
+    return h % dim, 1.0 if (h >> 63) else -1.0
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Local, dependency-free embedder: signed feature hashing of word unigrams and
+    bigrams with sublinear term frequency, L2-normalized.
+
+    Deterministic and CPU-only, so ingestion and search run without network
+    access. Similarity is lexical, not semantic.
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = _TOKEN_RE.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            for token in self._features(text):
+                col, sign = _feature(token, self.dim)
+                rows.append(row)
+                cols.append(col)
+                signs.append(sign)
+
+        counts = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if rows:
+            np.add.at(counts, (np.asarray(rows), np.asarray(cols)), np.asarray(signs, dtype=np.float32))
+        # Sublinear tf keeps long chunks from being dominated by repeated words
+        matrix = np.sign(counts) * np.log1p(np.abs(counts))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0].tolist()
@@ -0,0 +1,87 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from pypdf import PdfReader
+
+
+class _Entry:
+    def __init__(self):
+        self.reader: Optional[PdfReader] = None
+        self.refs = 0
+        # PdfReader resolves objects lazily from a shared stream, so only one
+        # thread may touch it at a time
+        self.lock = threading.RLock()
+
+
+class ParsedPdfCache:
+    """
+    Shares one parsed PdfReader per file hash for the lifetime of a graph run.
+
+    Validation, extraction and page-level steps all look up the reader by file
+    path; the xref table and page tree are parsed once, on first use. Entries
+    exist only inside scope() and the reader is dropped when the last scope
+    for that hash exits.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}  # file hash -> entry
+        self._paths: Dict[str, str] = {}  # file path -> file hash
+        self._lock = threading.Lock()
+        self.parses = 0
+        self.hits = 0
+
+    @contextmanager
+    def scope(self, file_path: str, file_hash: str) -> Iterator[None]:
+        """Makes file_path's reader shareable until the block exits."""
+        with self._lock:
+            entry = self._entries.setdefault(file_hash, _Entry())
+            entry.refs += 1
+            self._paths[file_path] = file_hash
+        try:
+            yield
+        finally:
+            self.release(file_path, file_hash)
+
+    def release(self, file_path: str, file_hash: str) -> None:
+        with self._lock:
+            self._paths.pop(file_path, None)
+            entry = self._entries.get(file_hash)
+            if entry is None:
+                return
+            entry.refs -= 1
+            if entry.refs <= 0:
+                del self._entries[file_hash]
+                entry.reader = None
+
+    @contextmanager
+    def reader(self, file_path: str) -> Iterator[PdfReader]:
+        """
+        Yields the shared reader for file_path, holding its lock.
+
+        Outside a scope (tools called on their own) a private reader is parsed
+        and discarded afterwards.
+        """
+        with self._lock:
+            file_hash = self._paths.get(file_path)
+            entry = self._entries.get(file_hash) if file_hash else None
+
+        if entry is None:
+            yield PdfReader(file_path)
+            return
+
+        with entry.lock:
+            if entry.reader is None:
+                entry.reader = PdfReader(file_path)
+                self.parses += 1
+            else:
+                self.hits += 1
+            yield entry.reader
+
+    def stats(self) -> dict:
+        with self._lock:
+            open_readers = sum(1 for entry in self._entries.values() if entry.reader is not None)
+            return {"parses": self.parses, "hits": self.hits, "open_readers": open_readers}
+
+
+pdf_cache = ParsedPdfCache()
@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import time
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from app.backend.core.config import EMBEDDING_RPM, EMBEDDING_TPM, LLM_RPM, LLM_TPM
+
+
+class _Bucket:
+    """Token bucket refilled continuously at capacity per minute. The level may go negative (debt)."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+
+    def refill(self, elapsed: float) -> None:
+        self.level = min(self.capacity, self.level + elapsed * self.rate)
+
+    def delay(self) -> float:
+        return -self.level / self.rate if self.level < 0 else 0.0
+
+
+class RateScheduler:
+    """
+    Enforces requests-per-minute and tokens-per-minute budgets ahead of time.
+
+    Each call reserves one request and its estimated tokens under a lock,
+    letting the buckets go into debt, and is told how long to wait until the
+    debt is paid off. Reservations are handed out in arrival order, so callers
+    are served FIFO across threads and event loops, and nobody busy-retries on
+    429s. Once a call finishes, settle() corrects the reservation with the
+    tokens it actually used.
+    """
+
+    def __init__(self, name: str, rpm: int, tpm: int):
+        self.name = name
+        self._requests = _Bucket(rpm) if rpm > 0 else None
+        self._tokens = _Bucket(tpm) if tpm > 0 else None
+        self._lock = threading.Lock()
+        self._last = time.monotonic()
+        self._counters = {"calls": 0, "delayed_calls": 0, "queue_depth": 0, "max_queue_depth": 0,
+                          "total_wait_seconds": 0.0, "max_wait_seconds": 0.0, "reserved_tokens": 0,
+                          "used_tokens": 0}
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed, self._last = now - self._last, now
+        for bucket in (self._requests, self._tokens):
+            if bucket:
+                bucket.refill(elapsed)
+
+    def reserve(self, tokens: int) -> float:
+        """Books one request of `tokens` tokens; returns the seconds to wait before sending it."""
+        with self._lock:
+            self._refill()
+            delay = 0.0
+            if self._requests:
+                self._requests.level -= 1
+                delay = max(delay, self._requests.delay())
+            if self._tokens:
+                # A single call larger than the whole budget only waits for a full bucket
+                self._tokens.level -= min(tokens, self._tokens.capacity)
+                delay = max(delay, self._tokens.delay())
+
+            counters = self._counters
+            counters["calls"] += 1
+            counters["reserved_tokens"] += tokens
+            if delay > 0:
+                counters["delayed_calls"] += 1
+                counters["queue_depth"] += 1
+                counters["max_queue_depth"] = max(counters["max_queue_depth"], counters["queue_depth"])
+                counters["total_wait_seconds"] += delay
+                counters["max_wait_seconds"] = max(counters["max_wait_seconds"], delay)
+            return delay
+
+    def _done_waiting(self) -> None:
+        with self._lock:
+            self._counters["queue_depth"] -= 1
+
+    def acquire(self, tokens: int) -> None:
+        delay = self.reserve(tokens)
+        if delay > 0:
+            try:
+                time.sleep(delay)
+            finally:
+                self._done_waiting()
+
+    async def aacquire(self, tokens: int) -> None:
+        delay = self.reserve(tokens)
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self._done_waiting()
+
+    def settle(self, reserved: int, used: Optional[int]) -> None:
+        """Refunds (or charges) the difference between the estimate and the reported usage."""
+        if used is None:
+            return
+        with self._lock:
+            self._counters["used_tokens"] += used
+            if self._tokens:
+                self._tokens.level = min(self._tokens.capacity, self._tokens.level + reserved - used)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refill()
+            stats = dict(self._counters)
+            delayed = stats["delayed_calls"]
+            stats["avg_wait_seconds"] = round(stats["total_wait_seconds"] / delayed, 4) if delayed else 0.0
+            stats["total_wait_seconds"] = round(stats["total_wait_seconds"], 4)
+            stats["max_wait_seconds"] = round(stats["max_wait_seconds"], 4)
+            stats["requests_available"] = round(self._requests.level, 2) if self._requests else None
+            stats["tokens_available"] = round(self._tokens.level) if self._tokens else None
+            return stats
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap upper-ish estimate (~4 characters per token); good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+class ScheduledEmbeddings(Embeddings):
+    """
+    Books every request of a wrapped embedder with a scheduler.
+
+    Clients such as OpenAIEmbeddings send one request per `chunk_size`
+    texts, so the texts are handed over in batches of that size and each
+    batch is booked as the request it becomes.
+    """
+
+    def __init__(self, underlying: Embeddings, scheduler: RateScheduler):
+        self.underlying = underlying
+        self.scheduler = scheduler
+        self.batch_size = getattr(underlying, "chunk_size", None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        batch_size = self.batch_size or max(1, len(texts))
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            self.scheduler.acquire(sum(estimate_tokens(text) for text in batch))
+            vectors.extend(self.underlying.embed_documents(batch))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        self.scheduler.acquire(estimate_tokens(text))
+        return self.underlying.embed_query(text)
+
+
+chat_scheduler = RateScheduler("chat", LLM_RPM, LLM_TPM)
+embedding_scheduler = RateScheduler("embeddings", EMBEDDING_RPM, EMBEDDING_TPM)
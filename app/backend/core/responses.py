@@ -0,0 +1,36 @@
+from typing import Any, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+
+from app.backend.core.ingestion_cache import _default
+
+# Bulky state fields left out unless explicitly requested; chunks are served
+# page by page from GET /documents/{file_hash}/chunks instead.
+HEAVY_FIELDS = {"docs", "markdown", "structured_docs", "chunks", "pdf_chunks"}
+
+
+class ORJSONStateResponse(JSONResponse):
+    """JSON response rendered with orjson; Documents and numpy values are encoded natively."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+
+
+def project(result: dict, fields: Optional[str] = None) -> dict:
+    """
+    Selects the state fields a caller asked for.
+
+    fields=None drops HEAVY_FIELDS, fields="*" returns everything, and a
+    comma-separated list returns just those keys.
+    """
+    if fields is None:
+        return {k: v for k, v in result.items() if k not in HEAVY_FIELDS}
+    if fields.strip() == "*":
+        return result
+    wanted = {name.strip() for name in fields.split(",") if name.strip()}
+    return {k: v for k, v in result.items() if k in wanted}
@@ -5,9 +5,18 @@ from typing_extensions import TypedDict
 class State(TypedDict):
     file_path: str
     file_name: str
+    file_hash: str
     pdf_validation_status: Optional[Literal["pass", "fail", "warning"]]
     docs: List[Document]
     markdown: str
     structured_docs: List[Document]
     chunks: List[Document]
     missing_information: Optional[str]
+    pdf_chunks: List[Dict[str, Any]]
+    chunking_status: Optional[Literal["success", "partial", "fail"]]
+    total_chunks: int
+    error_message: Optional[str]
+    collection_name: str
+    embedding_status: Optional[Literal["success", "fail"]]
+    embedding_error: Optional[str]
+    vectorstore_info: Optional[Dict[str, Any]]
@@ -0,0 +1,23 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def load_encoding(name: str):
+    """
+    tiktoken encoding for a model name ("text-embedding-3-small") or an
+    encoding name ("cl100k_base"), or None when its BPE file can't be loaded
+    (e.g. air-gapped without TIKTOKEN_CACHE_DIR). Unknown names get cl100k_base.
+    """
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(name)
+        except KeyError:
+            pass
+        try:
+            return tiktoken.get_encoding(name)
+        except ValueError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"⚠ tiktoken encoding for '{name}' unavailable ({e}); using approximate token counts")
+        return None
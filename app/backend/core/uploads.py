@@ -0,0 +1,132 @@
+import asyncio
+import os
+import tempfile
+import threading
+from collections import Counter
+from typing import Optional, Tuple
+
+import xxhash
+from fastapi import HTTPException, UploadFile
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.backend.core.config import MAX_UPLOAD_BYTES, UPLOAD_CHUNK_BYTES
+
+# Allowance for multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Uploads are stored under their content hash, so two requests with the same
+# bytes share one file; it is removed when the last of them releases it
+_holders: Counter = Counter()
+_holders_lock = threading.Lock()
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES."""
+
+    def __init__(self, limit: int = MAX_UPLOAD_BYTES):
+        super().__init__(f"Upload exceeds the maximum size of {limit} bytes")
+        self.limit = limit
+
+
+def content_length_exceeds_limit(content_length: Optional[str], limit: int = MAX_UPLOAD_BYTES) -> bool:
+    """Early check on the request's Content-Length, before the body is read."""
+    try:
+        return content_length is not None and int(content_length) > limit + MULTIPART_OVERHEAD_BYTES
+    except ValueError:
+        return False
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Caps POST bodies at MAX_UPLOAD_BYTES (plus multipart overhead) while they stream in.
+
+    Starlette parses and spools the whole multipart body before a handler
+    runs, so the check in save_upload alone comes after the bytes were
+    received. A declared Content-Length over the limit is refused before
+    anything is read; bodies without one (chunked uploads) are counted as
+    they arrive and cut off with a 413 once they go over.
+    """
+
+    def __init__(self, app: ASGIApp, limit: int = MAX_UPLOAD_BYTES):
+        self.app = app
+        self.limit = limit
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length_exceeds_limit(content_length.decode("latin-1") if content_length else None, self.limit):
+            await JSONResponse(status_code=413, content={"error": "Upload too large"})(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.limit + MULTIPART_OVERHEAD_BYTES:
+                    # Re-raised by FastAPI's body parsing, answered as a 413
+                    raise HTTPException(status_code=413, detail=str(UploadTooLarge(self.limit)))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def save_upload(file: UploadFile, directory: Optional[str] = None,
+                      limit: int = MAX_UPLOAD_BYTES) -> Tuple[str, str, int]:
+    """
+    Copies an upload to disk in UPLOAD_CHUNK_BYTES chunks, hashing it in the same pass.
+
+    The file is never held in memory as a whole, and the content hash comes
+    for free so later stages don't have to re-read the file. It ends up at
+    <directory>/<hash>.pdf: the path reaches the chunking agent's prompt and
+    tool calls, and a path that only depends on the bytes keeps repeat
+    uploads on the LLM response cache. Call release_upload when done with it.
+
+    Returns:
+        Tuple[str, str, int]: (path on disk, xxh3-128 content hash, size in bytes)
+    """
+    hasher = xxhash.xxh3_128()
+    size = 0
+    directory = directory or tempfile.gettempdir()
+    os.makedirs(directory, exist_ok=True)
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".part", dir=directory)
+    try:
+        with tmp:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > limit:
+                    raise UploadTooLarge(limit)
+                hasher.update(chunk)
+                await asyncio.to_thread(tmp.write, chunk)
+    except BaseException:
+        os.remove(tmp.name)
+        raise
+    file_hash = hasher.hexdigest()
+    path = os.path.join(directory, f"{file_hash}.pdf")
+    with _holders_lock:
+        # Same bytes as any file already there, so replacing it under a reader is harmless
+        os.replace(tmp.name, path)
+        _holders[path] += 1
+    return path, file_hash, size
+
+
+def retain_upload(path: str) -> None:
+    """Registers one more user of a stored upload (e.g. a job re-queued after a restart)."""
+    with _holders_lock:
+        _holders[path] += 1
+
+
+def release_upload(path: str) -> None:
+    """Drops one user of a stored upload, deleting the file when it was the last."""
+    with _holders_lock:
+        _holders[path] -= 1
+        if _holders[path] > 0:
+            return
+        del _holders[path]
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,332 @@
+import os
+import pickle
+import shutil
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import faiss
+import numpy as np
+import zstandard
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from app.backend.core.config import COLLECTION_COMPACT_DELETED_RATIO, COLLECTION_COMPACT_LOG_RATIO
+from app.backend.core.lexical_index import LEXICAL_FILE, LexicalIndex, SegmentedLexicalIndex
+
+INDEX_FILES = ("index.faiss", "index.pkl")
+LOG_DIR = "log"
+_LOG_SUFFIX = ".pkl.zst"
+
+_compressor = zstandard.ZstdCompressor(level=3)
+_decompressor = zstandard.ZstdDecompressor()
+
+
+class ReadWriteLock:
+    """Many readers or one writer. A waiting writer holds back new readers, so writes aren't starved."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+def log_files(directory: str) -> List[Tuple[int, str]]:
+    """(sequence number, path) of the collection's pending log records, oldest first."""
+    log_dir = os.path.join(directory, LOG_DIR)
+    try:
+        names = os.listdir(log_dir)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        (int(name[:-len(_LOG_SUFFIX)]), os.path.join(log_dir, name))
+        for name in names if name.endswith(_LOG_SUFFIX) and name[:-len(_LOG_SUFFIX)].isdigit()
+    )
+
+
+def _doc_id(chunk_id: str) -> str:
+    return chunk_id.split(":", 1)[0]
+
+
+def _files_size(directory: str, names: Iterable[str]) -> int:
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in names
+               if os.path.exists(os.path.join(directory, name)))
+
+
+class VectorCollection:
+    """
+    One FAISS collection plus its BM25 index, updated in place.
+
+    Writes add their vectors to the loaded index and delete by tombstoning:
+    the stale positions stay in the FAISS index but are skipped by every
+    read, so neither costs more than the chunks it touches. Each write is
+    also appended to a log record next to the saved index files (written
+    before it is applied), and loading replays the log on top of them.
+    Replaying is idempotent, since a record's adds replace any live chunk
+    with the same id.
+
+    compact() physically removes the tombstoned vectors, saves the index
+    files and lexical.npz and clears the log. It runs after a write once the
+    tombstones exceed COLLECTION_COMPACT_DELETED_RATIO of the stored vectors
+    or the log outgrows COLLECTION_COMPACT_LOG_RATIO times the saved files,
+    so the full rewrite is amortized over the writes that made it necessary.
+
+    Callers hold the collection's ReadWriteLock: read() around searches and
+    lookups, write() around write() and compact().
+    """
+
+    def __init__(self, directory: str, vectorstore: FAISS, lexical: LexicalIndex):
+        self.directory = directory
+        self.vectorstore = vectorstore
+        self.lexical = SegmentedLexicalIndex(lexical)
+        self.positions: Dict[str, int] = {}
+        self.documents: Dict[str, Set[str]] = defaultdict(set)
+        self.deleted: Set[int] = set()
+        self.seq = 0
+        self.log_bytes = 0
+        self.log_records = 0
+        self.base_bytes = 0
+        self.deletions = 0
+        self.compactions = 0
+        self.needs_compaction = False
+        for position in range(vectorstore.index.ntotal):
+            self._place(vectorstore.index_to_docstore_id[position], position)
+
+    @classmethod
+    def load(cls, directory: str, embeddings: Embeddings) -> "VectorCollection":
+        """Loads the saved index files and replays the log. Raises FileNotFoundError if there are none."""
+        if not all(os.path.exists(os.path.join(directory, name)) for name in INDEX_FILES):
+            raise FileNotFoundError(f"Vector collection not found: {directory}")
+        vectorstore = FAISS.load_local(directory, embeddings, allow_dangerous_deserialization=True)
+        try:
+            lexical = LexicalIndex.load(directory)
+        except FileNotFoundError:
+            lexical = None
+        stale = lexical is None or len(lexical.chunk_ids) != vectorstore.index.ntotal
+        if stale:
+            print(f"⚠ Lexical index of '{directory}' is missing or stale; rebuilding it from the docstore")
+            lexical = LexicalIndex.from_vectorstore(vectorstore)
+        collection = cls(directory, vectorstore, lexical)
+        collection.needs_compaction = stale
+        collection.base_bytes = _files_size(directory, INDEX_FILES)
+        for seq, path in log_files(directory):
+            with open(path, "rb") as f:
+                data = f.read()
+            collection._apply(pickle.loads(_decompressor.decompress(data)))
+            collection.seq = seq
+            collection.log_bytes += len(data)
+            collection.log_records += 1
+        return collection
+
+    def _place(self, chunk_id: str, position: int) -> None:
+        self.positions[chunk_id] = position
+        self.documents[_doc_id(chunk_id)].add(chunk_id)
+
+    def _tombstone(self, chunk_id: str) -> None:
+        position = self.positions.pop(chunk_id)
+        self.deleted.add(position)
+        self.deletions += 1
+        # The docstore entry goes now, so the id can be added again before compaction
+        self.vectorstore.docstore.delete([chunk_id])
+        chunk_ids = self.documents[_doc_id(chunk_id)]
+        chunk_ids.discard(chunk_id)
+        if not chunk_ids:
+            del self.documents[_doc_id(chunk_id)]
+
+    def _apply(self, record: dict, lexical: Optional[LexicalIndex] = None) -> None:
+        add = record.get("add")
+        replaced = add["ids"] if add else ()
+        removed = [chunk_id for chunk_id in dict.fromkeys([*record["delete"], *replaced])
+                   if chunk_id in self.positions]
+        for chunk_id in removed:
+            self._tombstone(chunk_id)
+        self.lexical.remove(removed)
+        if add:
+            start = self.vectorstore.index.ntotal
+            self.vectorstore.add_embeddings(
+                text_embeddings=zip(add["texts"], add["vectors"]),
+                metadatas=add["metadatas"],
+                ids=add["ids"],
+            )
+            for offset, chunk_id in enumerate(add["ids"]):
+                self._place(chunk_id, start + offset)
+            self.lexical.add(lexical if lexical is not None else LexicalIndex.build(add["ids"], add["texts"]))
+        for chunk_id, metadata in record["updates"].items():
+            document = self.document(chunk_id)
+            if document is not None:
+                document.metadata.update(metadata)
+
+    def _append_log(self, record: dict) -> None:
+        log_dir = os.path.join(self.directory, LOG_DIR)
+        os.makedirs(log_dir, exist_ok=True)
+        data = _compressor.compress(pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL))
+        seq = self.seq + 1
+        path = os.path.join(log_dir, f"{seq:010d}{_LOG_SUFFIX}")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.seq = seq
+        self.log_bytes += len(data)
+        self.log_records += 1
+
+    def write(self, documents: Sequence[Document] = (), vectors: Optional[np.ndarray] = None,
+              delete: Iterable[str] = (), updates: Optional[Dict[str, dict]] = None,
+              lexical: Optional[LexicalIndex] = None) -> List[str]:
+        """
+        Applies one change: removes the `delete` chunk ids, adds the documents
+        (their metadata carries the chunk_id) with their vectors, then merges
+        `updates` into stored chunks' metadata. `lexical` is the documents'
+        prebuilt segment, if the caller tokenized them outside the lock.
+        Returns the chunk ids that were removed.
+        """
+        removed = [chunk_id for chunk_id in dict.fromkeys(delete) if chunk_id in self.positions]
+        record = {"delete": removed, "updates": dict(updates or {})}
+        if documents:
+            record["add"] = {
+                "ids": [doc.metadata["chunk_id"] for doc in documents],
+                "texts": [doc.page_content for doc in documents],
+                "metadatas": [doc.metadata for doc in documents],
+                "vectors": np.asarray(vectors, dtype=np.float32),
+            }
+        if not removed and not documents and not record["updates"]:
+            return []
+        self._append_log(record)
+        self._apply(record, lexical)
+        if self._should_compact():
+            try:
+                self.compact()
+            except OSError as e:
+                # The change is already in the log; the next write tries again
+                print(f"⚠ Could not compact '{self.directory}', keeping its log: {e}")
+        return removed
+
+    def _should_compact(self) -> bool:
+        stored = self.vectorstore.index.ntotal
+        return (self.needs_compaction
+                or len(self.deleted) > COLLECTION_COMPACT_DELETED_RATIO * stored
+                or self.log_bytes > COLLECTION_COMPACT_LOG_RATIO * self.base_bytes)
+
+    def compact(self) -> None:
+        """Drops the tombstoned vectors, saves the index files and lexical.npz, and clears the log."""
+        index = self.vectorstore.index
+        survivors = [self.vectorstore.index_to_docstore_id[position] for position in range(index.ntotal)
+                     if position not in self.deleted]
+        if self.deleted:
+            index.remove_ids(np.fromiter(self.deleted, dtype=np.int64, count=len(self.deleted)))
+        self.vectorstore.index_to_docstore_id = dict(enumerate(survivors))
+        self.positions = {chunk_id: position for position, chunk_id in enumerate(survivors)}
+        self.deleted.clear()
+        lexical = self.lexical.merged()
+        self.lexical = SegmentedLexicalIndex(lexical)
+
+        # Saved next to the live files first, so a failed save leaves them intact
+        staging_dir = os.path.join(self.directory, f".compact.{os.getpid()}.{threading.get_ident()}")
+        try:
+            self.vectorstore.save_local(staging_dir)
+            lexical.save(staging_dir)
+            for name in (*INDEX_FILES, LEXICAL_FILE):
+                os.replace(os.path.join(staging_dir, name), os.path.join(self.directory, name))
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        for seq, path in log_files(self.directory):
+            if seq <= self.seq:
+                os.remove(path)
+        self.log_bytes = 0
+        self.log_records = 0
+        self.base_bytes = _files_size(self.directory, INDEX_FILES)
+        self.needs_compaction = False
+        self.compactions += 1
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    @property
+    def dimension(self) -> int:
+        return self.vectorstore.index.d
+
+    def chunk_ids(self, doc_id: str) -> List[str]:
+        """One document's chunk ids, in chunk order."""
+        return sorted(self.documents.get(doc_id, ()))
+
+    def document(self, chunk_id: str) -> Optional[Document]:
+        document = self.vectorstore.docstore.search(chunk_id)
+        return document if isinstance(document, Document) else None
+
+    def vectors(self, chunk_ids: Sequence[str]) -> np.ndarray:
+        """The stored vectors of the given (live) chunks, one row each."""
+        index = self.vectorstore.index
+        if not chunk_ids:
+            return np.empty((0, index.d), dtype=np.float32)
+        return np.vstack([index.reconstruct(self.positions[chunk_id]) for chunk_id in chunk_ids]).astype(np.float32)
+
+    def vector_search(self, query: str, k: int) -> List[Tuple[Document, float]]:
+        """Top-k (Document, distance) by vector similarity, skipping tombstoned positions."""
+        index = self.vectorstore.index
+        fetch = min(index.ntotal, k + len(self.deleted))
+        if fetch <= 0:
+            return []
+        vector = np.asarray([self.vectorstore._embed_query(query)], dtype=np.float32)
+        if self.vectorstore._normalize_L2:
+            faiss.normalize_L2(vector)
+        scores, positions = index.search(vector, fetch)
+        results = []
+        for score, position in zip(scores[0].tolist(), positions[0].tolist()):
+            if position < 0 or position in self.deleted:
+                continue
+            document = self.document(self.vectorstore.index_to_docstore_id[position])
+            if document is not None:
+                results.append((document, score))
+            if len(results) == k:
+                break
+        return results
+
+    def lexical_search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        return self.lexical.search(query, k)
+
+    def nbytes(self) -> int:
+        return self.base_bytes + self.log_bytes + self.lexical.nbytes()
+
+    def stats(self) -> dict:
+        return {
+            "chunks": len(self.positions),
+            "tombstones": len(self.deleted),
+            "deletions": self.deletions,
+            "compactions": self.compactions,
+            "log_records": self.log_records,
+            "lexical_segments": len(self.lexical.segments),
+        }
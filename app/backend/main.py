@@ -1,31 +1,202 @@
-from app.backend.workflows.pdf_graph import pdf_graph
-from fastapi import FastAPI, UploadFile, File
-import tempfile
-import os
+from app.backend.workflows.ingestion import run_ingestion
+from app.backend.workflows.jobs import QueueFull, job_queue
+from app.backend.core.job_store import FINISHED_STATUSES
+from app.backend.core.ingestion_cache import ingestion_cache
+from app.backend.core.uploads import UploadSizeLimitMiddleware, UploadTooLarge, release_upload, save_upload
+from app.backend.core.embedding_cache import embedding_cache
+from app.backend.core.embedding_executor import executor_stats
+from app.backend.core.rate_limiter import chat_scheduler, embedding_scheduler
+from app.backend.core.llm_cache import llm_cache
+from app.backend.core.index_cache import index_cache
+from app.backend.core.pdf_cache import pdf_cache
+from app.backend.core.checkpointer import checkpointer
+from app.backend.core.responses import ORJSONStateResponse, project
+from app.backend.tools.chunking_tools import _serialize_documents
+from app.backend.tools.embedding_tools import delete_documents, document_chunks, retrieval_stats
+from app.backend.agents.pdf_agents.pdf_validation_agent import validation_stats
+from app.backend.tools.dedup import dedup_stats
+from app.backend.core.config import JOBS_UPLOAD_DIR, LLM_CACHE, VECTORSTORE_PRELOAD
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+import asyncio
+import functools
+import orjson
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if VECTORSTORE_PRELOAD:
+        loaded = await asyncio.to_thread(index_cache.warm_up, VECTORSTORE_PRELOAD)
+        print(f"✓ Preloaded vector collections: {loaded}")
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONStateResponse)
+
+
+app.add_middleware(UploadSizeLimitMiddleware)
 
-app = FastAPI()
 
 @app.post("/")
-async def run_graph(file: UploadFile = File(...)):
+async def run_graph(file: UploadFile = File(...), fields: Optional[str] = None):
     # 1. Validate input
     if file.content_type != "application/pdf":
         return {"error": "Only PDF files are allowed"}
 
-    # 2. Save to a temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(await file.read())
-        temp_path = tmp.name
+    # 2. Stream to a temporary file, hashing as we go
+    try:
+        temp_path, file_hash, _ = await save_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
-    # 3. Pass to LangGraph
+    # 3. Pass to LangGraph (or serve a previous run of the same bytes)
     try:
-        result = await pdf_graph.ainvoke({
-            "file_path": temp_path,
-            "file_name": file.filename,
-            # "content_type": file.content_type,
-            # "file_size": file.size if hasattr(file, "size") else None
-        })
+        result = await run_ingestion(temp_path, file.filename, file_hash=file_hash)
     finally:
         # 4. Clean up temp file after processing
-        os.remove(temp_path)
+        release_upload(temp_path)
+
+    return project(result, fields)
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(file: UploadFile = File(...)):
+    if file.content_type != "application/pdf":
+        return {"error": "Only PDF files are allowed"}
+
+    try:
+        path, file_hash, _ = await save_upload(file, directory=JOBS_UPLOAD_DIR)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    try:
+        job = await job_queue.submit(path, file.filename, file_hash=file_hash)
+    except QueueFull as e:
+        release_upload(path)
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return {"job_id": job["id"], "status": job["status"]}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, fields: Optional[str] = None):
+    job = await asyncio.to_thread(job_queue.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.pop("file_path", None)
+    if job.get("result") is not None:
+        job["result"] = project(job["result"], fields)
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request, last_event_id: Optional[int] = None):
+    if await asyncio.to_thread(job_queue.store.get, job_id, False) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    # EventSource reconnects send the last seen id as a header
+    after = int(request.headers.get("last-event-id") or last_event_id or 0)
+
+    async def event_stream():
+        nonlocal after
+        while True:
+            updated = job_queue.subscribe(job_id)
+            events = await asyncio.to_thread(job_queue.store.events_since, job_id, after)
+            for event in events:
+                after = event["seq"]
+                yield f"id: {event['seq']}\nevent: {event['event']}\ndata: {orjson.dumps(event['data']).decode()}\n\n"
+                if event["event"] in FINISHED_STATUSES:
+                    return
+            if await request.is_disconnected():
+                return
+            try:
+                await asyncio.wait_for(updated.wait(), timeout=15)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+@functools.lru_cache(maxsize=8)
+def _job_chunks(job_id: str) -> List[dict]:
+    # A finished job's result never changes, so its parsed chunks can be kept
+    job = job_queue.store.get(job_id)
+    return ((job or {}).get("result") or {}).get("pdf_chunks") or []
+
+
+def _document_chunks(file_hash: str, collection_name: str) -> Optional[List[dict]]:
+    """
+    Chunks of an ingested document: from the ingestion cache, else the latest
+    succeeded job for it, else the collection its vectors were written to.
+    """
+    chunks = ingestion_cache.chunks(file_hash)
+    if chunks:
+        return chunks
+    job_id = job_queue.store.latest_succeeded(file_hash)
+    if job_id is not None and _job_chunks(job_id):
+        return _job_chunks(job_id)
+    documents = document_chunks(collection_name, file_hash)
+    if documents:
+        return _serialize_documents(documents)
+    return chunks
+
+
+@app.get("/documents/{file_hash}/chunks")
+async def list_chunks(file_hash: str, offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500),
+                      collection_name: str = "pdf_chunks"):
+    chunks = await asyncio.to_thread(_document_chunks, file_hash, collection_name)
+    if chunks is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {
+        "file_hash": file_hash,
+        "total": len(chunks),
+        "offset": offset,
+        "limit": limit,
+        "chunks": chunks[offset:offset + limit],
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "ingestion_cache": ingestion_cache.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "embedding_executor": executor_stats(),
+        "llm_cache": llm_cache.stats() if LLM_CACHE else {"enabled": False},
+        "rate_limits": {
+            "chat": chat_scheduler.stats(),
+            "embeddings": embedding_scheduler.stats(),
+        },
+        "index_cache": index_cache.stats(),
+        "pdf_cache": pdf_cache.stats(),
+        "checkpoints": checkpointer.stats(),
+        "validation": validation_stats(),
+        "dedup": dedup_stats(),
+        "retrieval": retrieval_stats(),
+        "jobs": {
+            status: job_queue.store.count(status)
+            for status in ("queued", "running", "succeeded", "failed")
+        },
+    }
+
+
+@app.delete("/cache/{file_hash}")
+async def invalidate_cache_entry(file_hash: str):
+    return {"file_hash": file_hash, "invalidated": ingestion_cache.invalidate(file_hash)}
+
+
+@app.delete("/cache")
+async def invalidate_cache():
+    return {"invalidated": ingestion_cache.invalidate_all()}
+
 
-    return result
+@app.delete("/collections/{collection_name}/documents/{doc_id}")
+async def delete_collection_document(collection_name: str, doc_id: str):
+    removed = await asyncio.to_thread(delete_documents, collection_name, [doc_id])
+    return {"collection_name": collection_name, "doc_id": doc_id, "removed_chunks": removed}
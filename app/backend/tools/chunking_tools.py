@@ -1,26 +1,139 @@
 from langchain_core.tools import tool
-from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
 from langchain_text_splitters import MarkdownHeaderTextSplitter
-from langchain_experimental.text_splitter import SemanticChunker
-from langchain_openai import OpenAIEmbeddings
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
 import json
-import os
-import tempfile
-import uuid
-
-def _save_to_temp_file(data: dict) -> str:
-    """Helper to save data to a temp file and return the path."""
-    temp_dir = tempfile.gettempdir()
-    file_name = f"chunking_data_{uuid.uuid4()}.json"
-    file_path = os.path.join(temp_dir, file_name)
-    with open(file_path, 'w') as f:
-        json.dump(data, f)
-    return file_path
-
-def _read_from_temp_file(file_path: str) -> dict:
-    """Helper to read data from a temp file."""
-    with open(file_path, 'r') as f:
-        return json.load(f)
+from app.backend.core.artifacts import artifact_store
+from app.backend.core.config import CHUNKER_EMBEDDING_MODEL, CHUNKING_STRATEGY, SEMANTIC_CHUNK_MAX_TOKENS
+from app.backend.core.embeddings import get_embeddings
+from app.backend.core.pdf_cache import pdf_cache
+from app.backend.tools.pdf_extraction import choose_workers, extract_pages_parallel
+from app.backend.tools.semantic_chunker import VectorizedSemanticChunker
+from app.backend.tools.token_chunker import TokenChunker
+
+
+@dataclass
+class ExtractedText:
+    """Raw text of a PDF as produced by the extraction step."""
+    text: str
+    page_count: int
+    metadata: dict = field(default_factory=dict)
+
+
+@dataclass
+class MarkdownText:
+    """Heuristically structured Markdown produced from extracted text."""
+    markdown: str
+    metadata: dict = field(default_factory=dict)
+
+
+HEADERS_TO_SPLIT_ON = [
+    ("#", "Header 1"),
+    ("##", "Header 2"),
+    ("###", "Header 3"),
+]
+
+
+def _resolve_input(input_json: str) -> Any:
+    """Parses a previous step's JSON output and returns the artifact it points to."""
+    input_data = json.loads(input_json)
+    if "artifact" not in input_data:
+        raise ValueError("No artifact handle provided in input")
+    return artifact_store.get(input_data["artifact"])
+
+def _extract_text(file_path: str) -> ExtractedText:
+    """
+    Extracts every page of the PDF and joins the page texts.
+
+    Large documents are sharded by page range across a process pool; small ones
+    are extracted in-process with the same pypdf call PyPDFLoader uses, on the
+    reader validation already parsed when running inside a graph run.
+    """
+    with pdf_cache.reader(file_path) as reader:
+        page_count = len(reader.pages)
+        workers = choose_workers(page_count)
+        if workers <= 1:
+            texts = [page.extract_text() for page in reader.pages]
+    if workers > 1:
+        texts = extract_pages_parallel(file_path, page_count, workers)
+        print(f"✓ Extracted {page_count} pages with {workers} workers")
+    full_text = "\n\n".join(texts)
+    return ExtractedText(text=full_text, page_count=page_count, metadata={"source": file_path})
+
+def _markdown_line(line: str) -> str:
+    """Simple heuristic: short, all-caps lines are promoted to headers."""
+    clean_line = line.strip()
+    if clean_line and len(clean_line) < 100 and clean_line.isupper():
+        return f"## {clean_line}"
+    return clean_line
+
+def _to_markdown(extracted: ExtractedText) -> MarkdownText:
+    md_lines = [_markdown_line(line) for line in extracted.text.split('\n')]
+    return MarkdownText(markdown="\n".join(md_lines), metadata=extracted.metadata)
+
+def _split_by_headers(markdown: MarkdownText) -> List[Document]:
+    """Splits Markdown on the configured header levels."""
+    markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=HEADERS_TO_SPLIT_ON)
+    return markdown_splitter.split_text(markdown.markdown)
+
+def _make_semantic_chunker() -> VectorizedSemanticChunker:
+    return VectorizedSemanticChunker(get_embeddings(CHUNKER_EMBEDDING_MODEL),
+                                     max_chunk_tokens=SEMANTIC_CHUNK_MAX_TOKENS or None,
+                                     token_model=CHUNKER_EMBEDDING_MODEL)
+
+def _semantic_chunk(splits: List[Document]) -> List[Document]:
+    """Semantic split based on embedding similarity (all sections embedded in one call)."""
+    return _make_semantic_chunker().split_documents(splits)
+
+def _make_chunker():
+    """Chunker for the configured CHUNKING_STRATEGY; both expose split_documents."""
+    if CHUNKING_STRATEGY == "token":
+        return TokenChunker()
+    if CHUNKING_STRATEGY == "semantic":
+        return _make_semantic_chunker()
+    raise ValueError(f"Unknown CHUNKING_STRATEGY: {CHUNKING_STRATEGY}")
+
+def _final_chunk(splits: List[Document]) -> List[Document]:
+    """Cuts header sections into embedding-ready chunks with the configured strategy."""
+    return _make_chunker().split_documents(splits)
+
+def _serialize_documents(documents: List[Document]) -> List[dict]:
+    return [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents]
+
+def tag_document_id(chunks: List[Document], doc_id: Optional[str]) -> List[Document]:
+    """Records the source document's content hash on every chunk (used for stable chunk ids)."""
+    if doc_id:
+        for chunk in chunks:
+            chunk.metadata["doc_id"] = doc_id
+    return chunks
+
+def run_chunking_pipeline(file_path: str, doc_id: Optional[str] = None) -> List[Document]:
+    """
+    Runs extract -> markdown -> header split -> final chunk in-process.
+
+    This is the "direct" execution mode of the chunking agent: the same steps
+    the LLM-driven agent performs, without an LLM deciding the (fixed) order.
+
+    Args:
+        file_path (str): The path to the PDF file.
+        doc_id (str, optional): Content hash of the file, stored on every chunk.
+
+    Returns:
+        List[Document]: The final embedding-ready chunks.
+    """
+    extracted = _extract_text(file_path)
+    print(f"✓ PDF text extraction successful ({extracted.page_count} pages)")
+    if not extracted.text.strip():
+        raise ValueError("No text could be extracted from the PDF")
+
+    markdown = _to_markdown(extracted)
+    splits = _split_by_headers(markdown)
+    print(f"✓ Structure split produced {len(splits)} sections")
+
+    chunks = tag_document_id(_final_chunk(splits), doc_id)
+    print(f"✓ Final chunking ({CHUNKING_STRATEGY}) produced {len(chunks)} chunks")
+    return chunks
 
 def extract_pdf(file_path: str) -> str:
     """
@@ -30,28 +143,19 @@ def extract_pdf(file_path: str) -> str:
         file_path (str): The path to the PDF file.
         
     Returns:        
-        str: JSON string containing the status and path to the extracted text file.
+        str: JSON string containing the status and a handle to the extracted text.
     """
     try:
         print(f"Extracting text from PDF: {file_path}")
-        loader = PyPDFLoader(file_path)
-        pages = loader.load()
-        
-        # Combine text from all pages
-        full_text = "\n\n".join([page.page_content for page in pages])
+        extracted = _extract_text(file_path)
         print("✓ PDF text extraction successful")
         
-        output_data = {
-            "text": full_text,
-            "page_count": len(pages),
-            "metadata": {"source": file_path}
-        }
-        output_path = _save_to_temp_file(output_data)
-        print(f"Extracted text saved to: {output_path}")
+        handle = artifact_store.put(extracted)
         return json.dumps({
             "status": "success",
-            "file_path": output_path,
-            "message": "Text extracted and saved to file."
+            "artifact": handle,
+            "page_count": extracted.page_count,
+            "message": "Text extracted and stored as an artifact."
         })
     except Exception as e:
         return json.dumps({"status": "error", "message": str(e)})
@@ -61,48 +165,21 @@ def convert_to_md(input_json: str) -> str:
     Converts extracted text to Markdown format (heuristic based).
     
     Args:
-        input_json (str): JSON string from extract_pdf containing 'file_path'.
+        input_json (str): JSON string from extract_pdf containing 'artifact'.
         
     Returns:
-        str: JSON string with status and path to markdown file.
+        str: JSON string with status and a handle to the markdown.
     """
     try:
-        # Parse input to get file path
-        input_data = json.loads(input_json)
-        if "file_path" not in input_data:
-            return json.dumps({"status": "error", "message": "No file_path provided in input"})
-            
-        # Read data from file
-        data = _read_from_temp_file(input_data["file_path"])
-        text = data.get("text", "")
-        
-        # Simple heuristic: Try to identify headers based on capitalization and length
-        lines = text.split('\n')
-        md_lines = []
-        for line in lines:
-            clean_line = line.strip()
-            if not clean_line:
-                md_lines.append("")
-                continue
-            
-            # Assume short, all-caps lines are headers
-            if len(clean_line) < 100 and clean_line.isupper():
-                md_lines.append(f"## {clean_line}")
-            else:
-                md_lines.append(clean_line)
-                
-        md_text = "\n".join(md_lines)
-        print("✓ Conversion to Markdown successful", md_text[:100])
-        output_data = {
-            "markdown": md_text,
-            "metadata": data.get("metadata", {})
-        }
-        output_path = _save_to_temp_file(output_data)
+        extracted = _resolve_input(input_json)
+        markdown = _to_markdown(extracted)
+        print("✓ Conversion to Markdown successful", markdown.markdown[:100])
         
+        handle = artifact_store.put(markdown)
         return json.dumps({
             "status": "success",
-            "file_path": output_path,
-            "message": "Markdown converted and saved to file."
+            "artifact": handle,
+            "message": "Markdown converted and stored as an artifact."
         })
     except Exception as e:
         return json.dumps({"status": "error", "message": str(e)})
@@ -112,46 +189,21 @@ def structure_split(input_json: str) -> str:
     Splits markdown text by headers (Content-Based Chunking).
     
     Args:
-        input_json (str): JSON string from convert_to_md containing 'file_path'.
+        input_json (str): JSON string from convert_to_md containing 'artifact'.
         
     Returns:
-        str: JSON string with status and path to splits file.
+        str: JSON string with status and a handle to the splits.
     """
     try:
-        input_data = json.loads(input_json)
-        if "file_path" not in input_data:
-            return json.dumps({"status": "error", "message": "No file_path provided in input"})
-            
-        data = _read_from_temp_file(input_data["file_path"])
-        markdown_text = data.get("markdown", "")
+        markdown = _resolve_input(input_json)
+        md_header_splits = _split_by_headers(markdown)
         
-        headers_to_split_on = [
-            ("#", "Header 1"),
-            ("##", "Header 2"),
-            ("###", "Header 3"),
-        ]
-        
-        markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=headers_to_split_on)
-        md_header_splits = markdown_splitter.split_text(markdown_text)
-        
-        # Serialize splits
-        splits_data = []
-        for split in md_header_splits:
-            splits_data.append({
-                "page_content": split.page_content,
-                "metadata": split.metadata
-            })
-            
-        output_data = {
-            "splits": splits_data,
-            "count": len(splits_data)
-        }
-        output_path = _save_to_temp_file(output_data)
-            
+        handle = artifact_store.put(md_header_splits)
         return json.dumps({
             "status": "success",
-            "file_path": output_path,
-            "message": "Structure split completed and saved to file."
+            "artifact": handle,
+            "count": len(md_header_splits),
+            "message": "Structure split completed and stored as an artifact."
         })
     except Exception as e:
         return json.dumps({"status": "error", "message": str(e)})
@@ -161,46 +213,21 @@ def final_chunk(input_json: str) -> str:
     Creates final overlapping chunks from structural splits for embedding.
     
     Args:
-        input_json (str): JSON string from structure_split containing 'file_path'.
+        input_json (str): JSON string from structure_split containing 'artifact'.
         
     Returns:
-        str: JSON string with status and path to final chunks file.
+        str: JSON string with status and a handle to the final chunks.
     """
     try:
-        input_data = json.loads(input_json)
-        if "file_path" not in input_data:
-            return json.dumps({"status": "error", "message": "No file_path provided in input"})
-            
-        data = _read_from_temp_file(input_data["file_path"])
-        splits_data = data.get("splits", [])
-        
-        # Convert back to documents
-        from langchain_core.documents import Document
-        documents = [Document(page_content=s["page_content"], metadata=s["metadata"]) for s in splits_data]
-        
-        # Semantic split based on embedding similarity
-        text_splitter = SemanticChunker(OpenAIEmbeddings())
-        final_splits = text_splitter.split_documents(documents)
+        documents = _resolve_input(input_json)
+        final_splits = _final_chunk(documents)
         
-        # Serialize
-        final_chunks = []
-        for split in final_splits:
-            final_chunks.append({
-                "page_content": split.page_content,
-                "metadata": split.metadata
-            })
-            
-        output_data = {
-            "chunks": final_chunks,
-            "total_chunks": len(final_chunks)
-        }
-        output_path = _save_to_temp_file(output_data)
-            
+        handle = artifact_store.put(final_splits)
         return json.dumps({
             "status": "success",
-            "file_path": output_path,
-            "total_chunks": len(final_chunks),
-            "message": "Final chunking completed and saved to file."
+            "artifact": handle,
+            "total_chunks": len(final_splits),
+            "message": "Final chunking completed and stored as an artifact."
         })
     except Exception as e:
         return json.dumps({"status": "error", "message": str(e)})
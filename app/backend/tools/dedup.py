@@ -0,0 +1,198 @@
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import xxhash
+from langchain_core.documents import Document
+
+from app.backend.core.config import DEDUP_NUM_PERM, DEDUP_SHINGLE_WORDS, DEDUP_THRESHOLD
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Keys that describe the stored chunk itself rather than where its text came from
+_NON_LOCATION_KEYS = {"doc_id", "chunk_id", "sources", "duplicate_count"}
+
+_totals: Counter = Counter()
+
+
+@lru_cache(maxsize=None)
+def _permutations(num_perm: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Fixed-seed (a, b) pairs for the universal hashes h(x) = (a*x + b) mod p."""
+    rng = np.random.RandomState(1)
+    a = rng.randint(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+@lru_cache(maxsize=None)
+def _lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    (bands, rows) minimising the equally weighted false-positive and
+    false-negative areas of the LSH S-curve around the threshold.
+    """
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        below = np.linspace(0, threshold, 64)
+        above = np.linspace(threshold, 1, 64)
+        false_pos = np.trapezoid(1 - (1 - below ** rows) ** bands, below)
+        false_neg = np.trapezoid((1 - above ** rows) ** bands, above)
+        if false_pos + false_neg < best_error:
+            best, best_error = (bands, rows), false_pos + false_neg
+    return best
+
+
+def minhash_signature(text: str, num_perm: int = DEDUP_NUM_PERM,
+                      shingle_words: int = DEDUP_SHINGLE_WORDS) -> np.ndarray:
+    """MinHash signature (uint64, num_perm values) over the lower-cased word shingles of text."""
+    words = _WORD_RE.findall(text.lower())
+    n = max(1, len(words) - shingle_words + 1)
+    shingles = {" ".join(words[i:i + shingle_words]) for i in range(n)}
+    hashes = np.fromiter((xxhash.xxh3_64_intdigest(s) & 0xFFFFFFFF for s in shingles),
+                         dtype=np.uint64, count=len(shingles))
+    a, b = _permutations(num_perm)
+    # uint64 arithmetic wraps, as in the usual NumPy MinHash implementations
+    permuted = (a[:, None] * hashes[None, :] + b[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=1)
+
+
+def _location(metadata: dict, index: int) -> dict:
+    location = {k: v for k, v in metadata.items() if k not in _NON_LOCATION_KEYS}
+    location["chunk_index"] = index
+    return location
+
+
+def merge_sources(metadata: dict, index: int, locations: List[dict]) -> dict:
+    """
+    The "sources" / "duplicate_count" metadata of a kept chunk (at stream
+    position `index`) once the given duplicate locations are merged into it.
+    """
+    sources = list(metadata.get("sources") or [_location(metadata, index)])
+    sources.extend(locations)
+    return {"sources": sources, "duplicate_count": len(sources) - 1}
+
+
+class Deduplicator:
+    """
+    Incremental near-duplicate filter for one document's chunks.
+
+    Each chunk gets a MinHash signature; the signature's bands are looked up
+    in an LSH table of the chunks kept so far, and candidates whose estimated
+    Jaccard similarity reaches the threshold count as duplicates. The first
+    occurrence is kept as the representative: a duplicate is dropped and its
+    source location (header metadata and chunk position) is added to the
+    representative's "sources", so nothing that pointed at the copy is lost.
+    Chunks are processed one at a time, so the filter works on a stream.
+
+    Only signatures, LSH buckets and positions are kept, not the chunks: the
+    representative may already be embedded and stored by the time a
+    duplicate shows up, so merged sources wait in drain() until the caller
+    applies them (see merge_sources).
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = DEDUP_NUM_PERM,
+                 shingle_words: int = DEDUP_SHINGLE_WORDS):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_words = shingle_words
+        self.bands, self.rows = _lsh_params(threshold, num_perm)
+        self._tables: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: List[np.ndarray] = []
+        self._kept_index: List[int] = []
+        self._pending: Dict[int, List[dict]] = {}
+        self.seen = 0
+        self.seen_chars = 0
+        self.kept_chars = 0
+
+    def _bands(self, signature: np.ndarray) -> Iterator[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _match(self, signature: np.ndarray) -> Optional[int]:
+        candidates = {kept for band, key in self._bands(signature) for kept in self._tables[band].get(key, ())}
+        best, best_similarity = None, self.threshold
+        for kept in candidates:
+            similarity = float(np.mean(self._signatures[kept] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = kept, similarity
+        return best
+
+    def add(self, doc: Document) -> bool:
+        """Registers a chunk. Returns True if it is new and should be embedded."""
+        index = self.seen
+        self.seen += 1
+        self.seen_chars += len(doc.page_content)
+        _totals["chunks"] += 1
+        signature = minhash_signature(doc.page_content, self.num_perm, self.shingle_words)
+        match = self._match(signature)
+        if match is not None:
+            self._pending.setdefault(match, []).append(_location(doc.metadata, index))
+            _totals["duplicates"] += 1
+            return False
+        kept = len(self._kept_index)
+        for band, key in self._bands(signature):
+            self._tables[band].setdefault(key, []).append(kept)
+        self._signatures.append(signature)
+        self._kept_index.append(index)
+        self.kept_chars += len(doc.page_content)
+        return True
+
+    def filter(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Yields the chunks worth embedding as they arrive."""
+        for doc in documents:
+            if self.add(doc):
+                yield doc
+
+    def drain(self, limit: int) -> List[Tuple[int, int, List[dict]]]:
+        """
+        Takes the duplicate locations merged into the first `limit` kept chunks
+        since the last drain, as (kept ordinal, stream position, locations).
+        """
+        return [(kept, self._kept_index[kept], self._pending.pop(kept))
+                for kept in sorted(self._pending) if kept < limit]
+
+    def report(self, dimension: int) -> dict:
+        """
+        What the dedup saved for this document.
+
+        Index bytes count what a flat FAISS collection holds per chunk: the
+        float32 vector plus the stored text.
+        """
+        kept = len(self._kept_index)
+        duplicates = self.seen - kept
+        bytes_before = self.seen * 4 * dimension + self.seen_chars
+        bytes_after = kept * 4 * dimension + self.kept_chars
+        return {
+            "chunks": self.seen,
+            "unique_chunks": kept,
+            "duplicates_merged": duplicates,
+            "threshold": self.threshold,
+            "embeddings_saved_pct": round(100 * duplicates / self.seen, 2) if self.seen else 0.0,
+            "index_bytes_saved": bytes_before - bytes_after,
+            "index_bytes_saved_pct": round(100 * (bytes_before - bytes_after) / bytes_before, 2)
+            if bytes_before else 0.0,
+        }
+
+
+def deduplicate_chunks(documents: List[Document], threshold: float = DEDUP_THRESHOLD
+                       ) -> Tuple[List[Document], Deduplicator]:
+    """Drops near-duplicate chunks of one document. Returns the kept chunks and the deduplicator (for report())."""
+    deduplicator = Deduplicator(threshold)
+    kept = list(deduplicator.filter(documents))
+    for ordinal, index, locations in deduplicator.drain(len(kept)):
+        kept[ordinal].metadata.update(merge_sources(kept[ordinal].metadata, index, locations))
+    if len(kept) < len(documents):
+        print(f"✓ Dedup merged {len(documents) - len(kept)} of {len(documents)} chunks into near-duplicates")
+    return kept, deduplicator
+
+
+def dedup_stats() -> dict:
+    chunks, duplicates = _totals["chunks"], _totals["duplicates"]
+    return {
+        "chunks": chunks,
+        "duplicates": duplicates,
+        "duplicate_ratio": round(duplicates / chunks, 4) if chunks else 0.0,
+    }
@@ -1,9 +1,307 @@
 from langchain_core.tools import tool
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
+from app.backend.core.artifacts import artifact_store
+from app.backend.core.config import (
+    DEDUP_ENABLED, EMBEDDING_BATCH_SIZE, EMBEDDING_MODEL, HYBRID_CANDIDATES, RETRIEVAL_MODE, RRF_K
+)
+from app.backend.core.embeddings import get_embeddings
+from app.backend.core.index_cache import collection_path, index_cache
+from app.backend.core.lexical_index import LexicalIndex
+from app.backend.core.vector_collection import ReadWriteLock, VectorCollection
+from app.backend.tools.dedup import Deduplicator, deduplicate_chunks, merge_sources
+import contextlib
 import json
-from typing import List
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import xxhash
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_collection_locks: Dict[str, ReadWriteLock] = {}
+_collection_locks_guard = threading.Lock()
+
+# The lexical leg of a hybrid query runs here while the caller runs the vector leg
+_lexical_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lexical")
+_query_counts: Counter = Counter()
+_lexical_seconds: Deque[float] = deque(maxlen=1000)
+_hybrid_added_seconds: Deque[float] = deque(maxlen=1000)
+
+
+def _load_documents(data: dict, key: str) -> List[Document]:
+    """Accepts either an artifact handle holding Documents or an inline list of chunk dicts."""
+    if "artifact" in data:
+        payload = artifact_store.get(data["artifact"])
+        return payload["documents"] if isinstance(payload, dict) else payload
+    return [
+        Document(page_content=chunk["page_content"], metadata=chunk["metadata"])
+        for chunk in data.get(key, [])
+    ]
+
+
+def embed_documents_batched(documents: List[Document], embeddings: Embeddings,
+                            batch_size: int = EMBEDDING_BATCH_SIZE) -> np.ndarray:
+    """
+    Embeds documents in batches into a single (n, dim) float32 matrix.
+
+    The matrix is allocated once the first batch reveals the dimension, and
+    each batch is written into its slice, so no per-vector Python lists are kept.
+    Embedders that pack and parallelize requests themselves get the whole list.
+    """
+    if getattr(embeddings, "batches_internally", False):
+        batch_size = max(batch_size, len(documents))
+    vectors = None
+    for start in range(0, len(documents), batch_size):
+        batch = [doc.page_content for doc in documents[start:start + batch_size]]
+        batch_vectors = np.asarray(embeddings.embed_documents(batch), dtype=np.float32)
+        if vectors is None:
+            vectors = np.empty((len(documents), batch_vectors.shape[1]), dtype=np.float32)
+        vectors[start:start + len(batch)] = batch_vectors
+    if vectors is None:
+        return np.empty((0, 0), dtype=np.float32)
+    return vectors
+
+
+def build_vectorstore(documents: List[Document], vectors: np.ndarray, embeddings: Embeddings,
+                      ids: Optional[List[str]] = None) -> FAISS:
+    """Builds a FAISS index from precomputed vectors, without another embedding pass."""
+    return FAISS.from_embeddings(
+        text_embeddings=zip([doc.page_content for doc in documents], vectors),
+        embedding=embeddings,
+        metadatas=[doc.metadata for doc in documents],
+        ids=ids,
+    )
+
+
+def assign_chunk_ids(documents: List[Document], start: int = 0) -> List[str]:
+    """
+    Gives every chunk a stable id of the form "<doc_id>:<ordinal>".
+
+    doc_id comes from the chunk metadata (the uploaded file's content hash);
+    chunks without one are grouped under a hash of their combined text, so the
+    same content always maps to the same ids. `start` offsets the ordinals when
+    a document arrives in several batches.
+    """
+    fallback_doc_id = None
+    ordinals: Dict[str, int] = {}
+    ids = []
+    for doc in documents:
+        doc_id = doc.metadata.get("doc_id")
+        if not doc_id:
+            if fallback_doc_id is None:
+                untagged = "\n".join(d.page_content for d in documents if not d.metadata.get("doc_id"))
+                fallback_doc_id = xxhash.xxh3_128_hexdigest(untagged.encode("utf-8"))
+            doc_id = fallback_doc_id
+            doc.metadata["doc_id"] = doc_id
+        ordinal = ordinals.get(doc_id, start)
+        ordinals[doc_id] = ordinal + 1
+        chunk_id = f"{doc_id}:{ordinal:06d}"
+        doc.metadata["chunk_id"] = chunk_id
+        ids.append(chunk_id)
+    return ids
+
+
+def _collection_lock(collection_name: str) -> ReadWriteLock:
+    with _collection_locks_guard:
+        return _collection_locks.setdefault(collection_name, ReadWriteLock())
+
+
+def _load_collection(collection_name: str) -> Optional[VectorCollection]:
+    try:
+        return index_cache.get(collection_name)
+    except FileNotFoundError:
+        return None
+
+
+@contextlib.contextmanager
+def _collection_writer(collection_name: str) -> Iterator[Optional[VectorCollection]]:
+    """
+    Holds the collection's write lock and yields the loaded collection to
+    modify in place (None if it doesn't exist yet).
+
+    Searches wait on the read side of the same lock, so they never see a
+    half-applied change. If anything fails, the cache entry is dropped and
+    the next read reloads the saved files and log from disk.
+    """
+    with _collection_lock(collection_name).write():
+        try:
+            yield _load_collection(collection_name)
+        except BaseException:
+            index_cache.invalidate(collection_name)
+            raise
+
+
+def _write(collection_name: str, collection: Optional[VectorCollection], documents: List[Document],
+           vectors: np.ndarray, embeddings: Embeddings, lexical: LexicalIndex,
+           delete: Iterable[str] = (), updates: Optional[Dict[str, dict]] = None) -> Tuple[VectorCollection, List[str]]:
+    """
+    Writes documents (with chunk ids assigned) into the collection, creating
+    it on the first write. Call inside _collection_writer. Returns the
+    collection and the chunk ids removed.
+    """
+    if collection is None:
+        ids = [doc.metadata["chunk_id"] for doc in documents]
+        collection = VectorCollection(collection_path(collection_name),
+                                      build_vectorstore(documents, vectors, embeddings, ids=ids), lexical)
+        collection.compact()
+        removed = []
+    else:
+        removed = collection.write(documents, vectors, delete=delete, updates=updates, lexical=lexical)
+    index_cache.put(collection_name, collection)
+    return collection, removed
+
+
+def upsert_documents(collection_name: str, documents: List[Document], vectors: np.ndarray,
+                     embeddings: Embeddings) -> dict:
+    """
+    Adds chunks to a collection, replacing any chunks previously stored for the same documents.
+
+    Only the given vectors are added and only the replaced chunks are
+    tombstoned; the rest of the collection is neither re-embedded, copied
+    nor rewritten (see VectorCollection for when it gets compacted).
+    """
+    ids = assign_chunk_ids(documents)
+    lexical = LexicalIndex.build(ids, [doc.page_content for doc in documents])
+    with _collection_writer(collection_name) as collection:
+        stale = [] if collection is None else [
+            chunk_id for doc_id in {doc.metadata["doc_id"] for doc in documents}
+            for chunk_id in collection.chunk_ids(doc_id)
+        ]
+        collection, replaced = _write(collection_name, collection, documents, vectors, embeddings, lexical, stale)
+    return {
+        "added": len(ids),
+        "replaced": len(replaced),
+        "total": len(collection),
+        "save_path": collection.directory,
+    }
+
+
+def _merged_sources(collection: Optional[VectorCollection], deduplicator: Deduplicator, doc_id: str,
+                    documents: List[Document], start: int) -> Dict[str, dict]:
+    """
+    Applies the duplicate sources merged since the last write: directly to
+    this batch's documents (whose ordinals begin at `start`), and as returned
+    metadata updates for chunks already written to the collection.
+    """
+    updates = {}
+    for ordinal, index, locations in deduplicator.drain(start + len(documents)):
+        if ordinal >= start:
+            metadata = documents[ordinal - start].metadata
+            metadata.update(merge_sources(metadata, index, locations))
+            continue
+        chunk_id = f"{doc_id}:{ordinal:06d}"
+        stored = collection.document(chunk_id) if collection is not None else None
+        if stored is not None:
+            updates[chunk_id] = merge_sources(stored.metadata, index, locations)
+    return updates
+
+
+def stream_into_collection(collection_name: str, doc_id: str,
+                           batches: Iterable[Tuple[List[Document], np.ndarray]],
+                           embeddings: Embeddings, deduplicator: Optional[Deduplicator] = None) -> dict:
+    """
+    Replaces one document's chunks with (documents, vectors) batches as they are produced.
+
+    Each batch is written into the collection as it arrives (the first one
+    also removes the document's earlier chunks), so only one batch is held
+    at a time. The write lock is taken per batch, not across the embedding
+    calls, and searches in between see the document partly ingested. If
+    parsing or embedding fails mid-stream, the chunks written so far are
+    deleted again and the error is re-raised. With a deduplicator, sources
+    merged into chunks that are already written go out as metadata updates
+    with the next write.
+    """
+    added = 0
+    replaced = 0
+    collection: Optional[VectorCollection] = None
+    try:
+        for documents, vectors in batches:
+            for doc in documents:
+                doc.metadata["doc_id"] = doc_id
+            ids = assign_chunk_ids(documents, start=added)
+            lexical = LexicalIndex.build(ids, [doc.page_content for doc in documents])
+            with _collection_writer(collection_name) as collection:
+                stale = collection.chunk_ids(doc_id) if collection is not None and not added else []
+                updates = _merged_sources(collection, deduplicator, doc_id, documents, added) if deduplicator else None
+                collection, removed = _write(collection_name, collection, documents, vectors, embeddings,
+                                             lexical, stale, updates)
+            replaced += len(removed)
+            added += len(ids)
+        if deduplicator and added:
+            with _collection_writer(collection_name) as collection:
+                updates = _merged_sources(collection, deduplicator, doc_id, [], added)
+                if updates:
+                    collection.write(updates=updates)
+                    index_cache.put(collection_name, collection)
+    except BaseException:
+        if added:
+            print(f"⚠ Stream into '{collection_name}' failed; removing the {added} chunks written for {doc_id}")
+            delete_documents(collection_name, [doc_id])
+        raise
+    if collection is None:
+        return {"added": 0, "replaced": 0, "total": 0, "save_path": None}
+    return {
+        "added": added,
+        "replaced": replaced,
+        "total": len(collection),
+        "dimension": collection.dimension,
+        "save_path": collection.directory,
+    }
+
+
+def export_document(collection_name: str, doc_id: str) -> Optional[Tuple[List[Document], np.ndarray]]:
+    """Returns one document's chunks and their stored vectors, in chunk order."""
+    with _collection_lock(collection_name).read():
+        collection = _load_collection(collection_name)
+        chunk_ids = collection.chunk_ids(doc_id) if collection is not None else []
+        if not chunk_ids:
+            return None
+        return [collection.document(chunk_id) for chunk_id in chunk_ids], collection.vectors(chunk_ids)
+
+
+def document_chunks(collection_name: str, doc_id: str) -> List[Document]:
+    """One document's chunks from the collection's docstore, in chunk order."""
+    with _collection_lock(collection_name).read():
+        collection = _load_collection(collection_name)
+        if collection is None:
+            return []
+        return [collection.document(chunk_id) for chunk_id in collection.chunk_ids(doc_id)]
+
+
+def has_document(collection_name: str, doc_id: str) -> bool:
+    with _collection_lock(collection_name).read():
+        collection = _load_collection(collection_name)
+        return collection is not None and bool(collection.chunk_ids(doc_id))
+
+
+def collection_dimension(collection_name: str) -> Optional[int]:
+    """Vector dimension of the collection, or None if it doesn't exist yet."""
+    with _collection_lock(collection_name).read():
+        collection = _load_collection(collection_name)
+        return collection.dimension if collection is not None else None
+
+
+def delete_documents(collection_name: str, doc_ids: List[str]) -> int:
+    """Removes every chunk of the given documents from a collection. Returns the number removed."""
+    with _collection_writer(collection_name) as collection:
+        if collection is None:
+            return 0
+        removed = collection.write(delete=[chunk_id for doc_id in doc_ids for chunk_id in collection.chunk_ids(doc_id)])
+        index_cache.put(collection_name, collection)
+    return len(removed)
+
+
+def delete_chunks(collection_name: str, chunk_ids: List[str]) -> int:
+    """Removes individual chunks by id; unknown ids are ignored."""
+    with _collection_writer(collection_name) as collection:
+        if collection is None:
+            return 0
+        removed = collection.write(delete=chunk_ids)
+        index_cache.put(collection_name, collection)
+    return len(removed)
 
 
 @tool
@@ -12,34 +310,35 @@ def create_embeddings(chunks_json: str) -> str:
     Create vector embeddings from text chunks using OpenAI embeddings.
     
     Args:
-        chunks_json (str): JSON string containing chunks with page_content and metadata.
+        chunks_json (str): JSON string containing either an 'artifact' handle from
+            final_chunk or 'chunks' with page_content and metadata.
         
     Returns:
-        str: JSON with embedding info (count, dimension, status).
+        str: JSON with embedding info (artifact handle, count, dimension, status).
     """
-    data = json.loads(chunks_json)
-    chunks = data.get("chunks", [])
+    try:
+        documents = _load_documents(json.loads(chunks_json), "chunks")
+    except Exception as e:
+        return json.dumps({"error": str(e), "status": "fail"})
     
-    if not chunks:
+    if not documents:
         return json.dumps({"error": "No chunks provided", "status": "fail"})
     
-    # Convert to LangChain documents
-    documents = [
-        Document(page_content=chunk["page_content"], metadata=chunk["metadata"])
-        for chunk in chunks
-    ]
-    
-    # Initialize embeddings model
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-    
-    # Create embeddings (happens automatically when creating vectorstore)
+    deduplicator = None
+    if DEDUP_ENABLED:
+        documents, deduplicator = deduplicate_chunks(documents)
     print(f"✓ Creating embeddings for {len(documents)} chunks...")
+    vectors = embed_documents_batched(documents, get_embeddings())
+    dedup = deduplicator.report(int(vectors.shape[1])) if deduplicator else None
     
-    # This will be passed to the vectorstore tool
+    # The matrix is handed to store_in_vectordb by reference, not as a JSON list
+    handle = artifact_store.put({"documents": documents, "vectors": vectors, "dedup": dedup})
     return json.dumps({
-        "documents": chunks,  # Keep as serializable format
-        "count": len(chunks),
-        "embedding_model": "text-embedding-3-small",
+        "artifact": handle,
+        "count": len(documents),
+        "dimension": int(vectors.shape[1]),
+        "embedding_model": EMBEDDING_MODEL,
+        "dedup": dedup,
         "status": "success"
     })
 
@@ -50,49 +349,160 @@ def store_in_vectordb(embeddings_json: str, collection_name: str = "pdf_chunks")
     Store embedded documents in FAISS vector database.
     
     Args:
-        embeddings_json (str): JSON from create_embeddings with documents.
+        embeddings_json (str): JSON from create_embeddings with the artifact handle
+            (or inline 'documents', which are embedded here).
         collection_name (str): Name for the vector collection.
         
     Returns:
         str: JSON with storage status and vector store info.
     """
-    data = json.loads(embeddings_json)
-    chunks = data.get("documents", [])
+    try:
+        data = json.loads(embeddings_json)
+        payload = artifact_store.get(data["artifact"]) if "artifact" in data else None
+    except Exception as e:
+        return json.dumps({"error": str(e), "status": "fail"})
+
+    embeddings = get_embeddings()
+    if isinstance(payload, dict) and "vectors" in payload:
+        documents, vectors, dedup = payload["documents"], payload["vectors"], payload.get("dedup")
+    else:
+        # Chunks that were not run through create_embeddings (or the dedup) yet
+        documents = payload if payload is not None else _load_documents(data, "documents")
+        deduplicator = None
+        if DEDUP_ENABLED and documents:
+            documents, deduplicator = deduplicate_chunks(documents)
+        vectors = embed_documents_batched(documents, embeddings)
+        dedup = deduplicator.report(int(vectors.shape[1])) if deduplicator else None
     
-    if not chunks:
+    if not documents:
         return json.dumps({"error": "No documents to store", "status": "fail"})
     
-    # Convert back to LangChain documents
-    documents = [
-        Document(page_content=chunk["page_content"], metadata=chunk["metadata"])
-        for chunk in chunks
-    ]
-    
-    # Initialize embeddings model
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-    
-    # Create FAISS vectorstore
+    # Append the precomputed vectors to the collection (replacing earlier
+    # versions of the same documents) and save to disk
     print(f"✓ Storing {len(documents)} documents in FAISS vector database...")
-    vectorstore = FAISS.from_documents(documents, embeddings)
-    
-    # Save to disk
-    save_path = f"./vectorstore/{collection_name}"
-    vectorstore.save_local(save_path)
+    result = upsert_documents(collection_name, documents, vectors, embeddings)
     
-    print(f"✓ Vector database saved to: {save_path}")
+    print(f"✓ Vector database saved to: {result['save_path']} ({result['total']} chunks total)")
     
     return json.dumps({
         "status": "success",
         "collection_name": collection_name,
         "document_count": len(documents),
-        "save_path": save_path,
-        "embedding_model": "text-embedding-3-small",
+        "replaced_count": result["replaced"],
+        "collection_size": result["total"],
+        "save_path": result["save_path"],
+        "embedding_model": EMBEDDING_MODEL,
+        "dedup": dedup,
         "vectorstore_type": "FAISS"
     })
 
 
+def _chunk_id(doc: Document) -> Optional[str]:
+    return doc.id or doc.metadata.get("chunk_id")
+
+
+def _lexical_leg(collection: VectorCollection, query: str, k: int) -> Tuple[List[Tuple[str, float]], float]:
+    started = time.perf_counter()
+    hits = collection.lexical_search(query, k)
+    return hits, time.perf_counter() - started
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Merges ranked id lists: each id scores sum(1 / (k + rank)) over the lists it appears in."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
+
+
+def hybrid_search(query: str, collection_name: str, k: int, mode: str = RETRIEVAL_MODE) -> List[dict]:
+    """
+    Searches a collection in "vector", "lexical" or "hybrid" mode.
+
+    Hybrid runs the BM25 leg on a worker thread while this thread runs the
+    vector leg, then fuses the two candidate lists with reciprocal rank
+    fusion. The lexical mode makes no embedding calls. The lexical leg's own
+    time and the time hybrid adds on top of the vector leg are kept for
+    retrieval_stats().
+    """
+    if mode not in ("vector", "lexical", "hybrid"):
+        raise ValueError(f"Unknown retrieval mode: {mode}")
+    with _collection_lock(collection_name).read():
+        collection = index_cache.get(collection_name)
+        _query_counts[mode] += 1
+        return _search(collection, query, k, mode)
+
+
+def _search(collection: VectorCollection, query: str, k: int, mode: str) -> List[dict]:
+    if mode == "vector":
+        return [{"content": doc.page_content, "metadata": doc.metadata, "similarity_score": score}
+                for doc, score in collection.vector_search(query, k)]
+
+    candidates = max(k, HYBRID_CANDIDATES)
+    if mode == "lexical":
+        lexical, lexical_seconds = _lexical_leg(collection, query, k)
+        _lexical_seconds.append(lexical_seconds)
+        results = []
+        for chunk_id, bm25 in lexical:
+            doc = collection.document(chunk_id)
+            if doc is not None:
+                results.append({"content": doc.page_content, "metadata": doc.metadata, "bm25_score": bm25})
+        return results
+
+    started = time.perf_counter()
+    lexical_future = _lexical_pool.submit(_lexical_leg, collection, query, candidates)
+    vector = collection.vector_search(query, candidates)
+    vector_seconds = time.perf_counter() - started
+    lexical, lexical_seconds = lexical_future.result()
+    _lexical_seconds.append(lexical_seconds)
+
+    docs: Dict[str, Document] = {}
+    distances: Dict[str, float] = {}
+    for doc, score in vector:
+        docs[_chunk_id(doc)] = doc
+        distances[_chunk_id(doc)] = score
+    bm25 = dict(lexical)
+    vector_ranks = {chunk_id: rank for rank, chunk_id in enumerate(distances, start=1)}
+    lexical_ranks = {chunk_id: rank for rank, (chunk_id, _) in enumerate(lexical, start=1)}
+    results = []
+    for chunk_id, fused in reciprocal_rank_fusion([list(distances), [chunk_id for chunk_id, _ in lexical]]):
+        doc = docs.get(chunk_id) or collection.document(chunk_id)
+        if doc is None:
+            continue
+        results.append({
+            "content": doc.page_content,
+            "metadata": doc.metadata,
+            "similarity_score": distances.get(chunk_id),
+            "bm25_score": bm25.get(chunk_id),
+            "rrf_score": fused,
+            "vector_rank": vector_ranks.get(chunk_id),
+            "lexical_rank": lexical_ranks.get(chunk_id),
+        })
+        if len(results) == k:
+            break
+    _hybrid_added_seconds.append(max(0.0, time.perf_counter() - started - vector_seconds))
+    return results
+
+
+def _percentiles_ms(samples: Deque[float]) -> dict:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0}
+    p50, p95 = np.percentile(np.fromiter(samples, dtype=np.float64), [50, 95]) * 1000
+    return {"p50": round(float(p50), 3), "p95": round(float(p95), 3)}
+
+
+def retrieval_stats() -> dict:
+    return {
+        "queries": dict(_query_counts),
+        "lexical_leg_ms": _percentiles_ms(_lexical_seconds),
+        "hybrid_added_ms": _percentiles_ms(_hybrid_added_seconds),
+    }
+
+
 @tool
-def search_vectordb(query: str, collection_name: str = "pdf_chunks", k: int = 5) -> str:
+def search_vectordb(query: str, collection_name: str = "pdf_chunks", k: int = 5,
+                    mode: str = RETRIEVAL_MODE) -> str:
     """
     Search the vector database for relevant documents.
     
@@ -100,40 +510,22 @@ def search_vectordb(query: str, collection_name: str = "pdf_chunks", k: int = 5)
         query (str): Search query text.
         collection_name (str): Name of the vector collection to search.
         k (int): Number of results to return (default: 5).
+        mode (str): "hybrid" (BM25 + vectors, rank-fused), "vector" or
+            "lexical" (BM25 only, no embedding call).
         
     Returns:
         str: JSON with search results.
     """
     try:
-        # Load embeddings
-        embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-        
-        # Load vectorstore
-        load_path = f"./vectorstore/{collection_name}"
-        vectorstore = FAISS.load_local(
-            load_path, 
-            embeddings,
-            allow_dangerous_deserialization=True
-        )
-        
-        # Perform similarity search
-        print(f"🔍 Searching for: {query[:50]}...")
-        results = vectorstore.similarity_search_with_score(query, k=k)
-        
-        # Format results
-        search_results = []
-        for doc, score in results:
-            search_results.append({
-                "content": doc.page_content,
-                "metadata": doc.metadata,
-                "similarity_score": float(score)
-            })
+        print(f"🔍 Searching ({mode}) for: {query[:50]}...")
+        search_results = hybrid_search(query, collection_name, k, mode)
         
         print(f"✓ Found {len(search_results)} relevant documents")
         
         return json.dumps({
             "status": "success",
             "query": query,
+            "mode": mode,
             "results": search_results,
             "result_count": len(search_results)
         })
@@ -0,0 +1,79 @@
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from pypdf import PdfReader
+
+from app.backend.core.config import (
+    EXTRACTION_MAX_WORKERS, PAGES_PER_EXTRACTION_WORKER,
+    PARALLEL_EXTRACTION_ENABLED, PARALLEL_EXTRACTION_MIN_PAGES
+)
+
+# This module is imported by the extraction worker processes, so it must stay
+# light: pypdf only, no LangChain.
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Lazily starts one shared pool; 'spawn' avoids forking a threaded server process."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=EXTRACTION_MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def choose_workers(page_count: int, cpu_count: Optional[int] = None) -> int:
+    """One worker per PAGES_PER_EXTRACTION_WORKER pages, capped by the CPU count and the pool size."""
+    if not PARALLEL_EXTRACTION_ENABLED or page_count < PARALLEL_EXTRACTION_MIN_PAGES:
+        return 1
+    cpu_count = cpu_count or os.cpu_count() or 1
+    wanted = math.ceil(page_count / PAGES_PER_EXTRACTION_WORKER)
+    return max(1, min(wanted, cpu_count, EXTRACTION_MAX_WORKERS))
+
+
+def shard_pages(page_count: int, workers: int) -> List[Tuple[int, int]]:
+    """Splits [0, page_count) into `workers` contiguous, nearly equal ranges."""
+    size, extra = divmod(page_count, workers)
+    ranges, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _extract_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """Worker entry point: extracts the text of pages [start, end)."""
+    reader = PdfReader(file_path)
+    return [reader.pages[i].extract_text() for i in range(start, end)]
+
+
+def extract_pages_parallel(file_path: str, page_count: int, workers: int) -> List[str]:
+    """Extracts every page's text across the process pool and returns them in page order."""
+    pool = _get_pool()
+    futures = [
+        pool.submit(_extract_page_range, file_path, start, end)
+        for start, end in shard_pages(page_count, workers)
+    ]
+    pages: List[str] = []
+    for future in futures:  # submission order == page order
+        pages.extend(future.result())
+    return pages
@@ -1,8 +1,82 @@
 from langchain_core.tools import tool
 from pypdf import PdfReader
+from app.backend.core.pdf_cache import pdf_cache
 import os
 import datetime
 
+def _build_report(file_path: str, reader: PdfReader) -> dict:
+    """Builds the validation report from an already parsed reader."""
+    # File Info
+    file_stats = os.stat(file_path)
+    file_info = {
+        "filename": os.path.basename(file_path),
+        "size_bytes": file_stats.st_size,
+        "pdf_version": str(reader.pdf_header),
+        "page_count": len(reader.pages),
+        "created_date": datetime.datetime.fromtimestamp(file_stats.st_ctime).isoformat(),
+        "modified_date": datetime.datetime.fromtimestamp(file_stats.st_mtime).isoformat()
+    }
+
+    # Metadata
+    meta = reader.metadata
+    metadata = {}
+    if meta:
+        metadata = {
+            "title": meta.title,
+            "author": meta.author,
+            "subject": meta.subject,
+            "producer": meta.producer,
+            "creator": meta.creator
+        }
+
+    # Findings & Compliance
+    findings = []
+    compliance = {
+        "pdf_a": "NOT_CHECKED",
+        "pdf_x": "NOT_CHECKED",
+        "pdf_ua": "NOT_CHECKED"
+    }
+
+    # Basic Checks
+    if reader.is_encrypted:
+        findings.append({
+            "severity": "INFO",
+            "category": "SECURITY",
+            "code": "ENCRYPTED",
+            "message": "The PDF is encrypted.",
+            "location": "Document Level",
+            "recommendation": "Ensure you have the password if content extraction is needed."
+        })
+
+    # Check for PDF/A (Basic check via XMP or Metadata)
+    # This is a heuristic check as full PDF/A validation is complex
+    try:
+        xmp = reader.xmp_metadata
+        if xmp:
+            # Simple check for PDF/A schema in XMP
+            # Note: pypdf's xmp_metadata might need specific handling or might be None
+            pass 
+    except Exception:
+        pass
+
+    # Construct Report
+    report = {
+        "validation_status": "PASS", # Default to PASS, change if critical errors found
+        "file_info": file_info,
+        "summary": {
+            "critical_errors": 0,
+            "errors": 0,
+            "warnings": 0,
+            "info": len(findings)
+        },
+        "findings": findings,
+        "compliance": compliance,
+        "metadata": metadata
+    }
+    
+    return report
+
+
 @tool
 def validate_pdf_tool(file_path: str) -> dict:
     """
@@ -18,77 +92,8 @@ def validate_pdf_tool(file_path: str) -> dict:
         return {"error": f"File not found: {file_path}"}
 
     try:
-        reader = PdfReader(file_path)
-        
-        # File Info
-        file_stats = os.stat(file_path)
-        file_info = {
-            "filename": os.path.basename(file_path),
-            "size_bytes": file_stats.st_size,
-            "pdf_version": str(reader.pdf_header),
-            "page_count": len(reader.pages),
-            "created_date": datetime.datetime.fromtimestamp(file_stats.st_ctime).isoformat(),
-            "modified_date": datetime.datetime.fromtimestamp(file_stats.st_mtime).isoformat()
-        }
-
-        # Metadata
-        meta = reader.metadata
-        metadata = {}
-        if meta:
-            metadata = {
-                "title": meta.title,
-                "author": meta.author,
-                "subject": meta.subject,
-                "producer": meta.producer,
-                "creator": meta.creator
-            }
-
-        # Findings & Compliance
-        findings = []
-        compliance = {
-            "pdf_a": "NOT_CHECKED",
-            "pdf_x": "NOT_CHECKED",
-            "pdf_ua": "NOT_CHECKED"
-        }
-
-        # Basic Checks
-        if reader.is_encrypted:
-            findings.append({
-                "severity": "INFO",
-                "category": "SECURITY",
-                "code": "ENCRYPTED",
-                "message": "The PDF is encrypted.",
-                "location": "Document Level",
-                "recommendation": "Ensure you have the password if content extraction is needed."
-            })
-
-        # Check for PDF/A (Basic check via XMP or Metadata)
-        # This is a heuristic check as full PDF/A validation is complex
-        try:
-            xmp = reader.xmp_metadata
-            if xmp:
-                # Simple check for PDF/A schema in XMP
-                # Note: pypdf's xmp_metadata might need specific handling or might be None
-                pass 
-        except Exception:
-            pass
-
-        # Construct Report
-        report = {
-            "validation_status": "PASS", # Default to PASS, change if critical errors found
-            "file_info": file_info,
-            "summary": {
-                "critical_errors": 0,
-                "errors": 0,
-                "warnings": 0,
-                "info": len(findings)
-            },
-            "findings": findings,
-            "compliance": compliance,
-            "metadata": metadata
-        }
-        
-        return report
+        with pdf_cache.reader(file_path) as reader:
+            return _build_report(file_path, reader)
 
     except Exception as e:
         return {
@@ -0,0 +1,189 @@
+import copy
+import re
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from app.backend.core.rate_limiter import estimate_tokens
+from app.backend.core.tokenizer import load_encoding
+
+# Same defaults as langchain_experimental's SemanticChunker
+BREAKPOINT_DEFAULTS: Dict[str, float] = {
+    "percentile": 95,
+    "standard_deviation": 3,
+    "interquartile": 1.5,
+    "gradient": 95,
+}
+
+
+def count_tokens(texts: Sequence[str], model: str) -> np.ndarray:
+    """Token count per text: tiktoken when available, the ~4 chars/token estimate otherwise."""
+    encoding = load_encoding(model)
+    if encoding is None:
+        return np.array([estimate_tokens(text) for text in texts], dtype=np.int64)
+    return np.array([len(ids) for ids in encoding.encode_batch(list(texts), disallowed_special=())],
+                    dtype=np.int64)
+
+
+def _lerp(low: np.ndarray, high: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """Linear interpolation computed the way np.percentile does it (bit-for-bit thresholds)."""
+    diff = high - low
+    return np.where(t >= 0.5, high - diff * (1 - t), low + diff * t)
+
+
+def _segment_percentile(values: np.ndarray, seg: np.ndarray, starts: np.ndarray,
+                        counts: np.ndarray, q: float) -> np.ndarray:
+    """np.percentile(values[segment], q) for every segment at once (segments are contiguous)."""
+    ordered = values[np.lexsort((values, seg))]
+    pos = q / 100 * (counts - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, counts - 1)
+    return _lerp(ordered[starts + lo], ordered[starts + hi], pos - lo)
+
+
+def _segment_gradient(values: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """np.gradient per segment (central differences, one-sided at the ends); segments have >= 2 values."""
+    grad = np.empty_like(values)
+    grad[1:-1] = (values[2:] - values[:-2]) / 2
+    ends = starts + counts - 1
+    grad[starts] = values[starts + 1] - values[starts]
+    grad[ends] = values[ends] - values[ends - 1]
+    return grad
+
+
+class VectorizedSemanticChunker:
+    """
+    Drop-in replacement for SemanticChunker.split_documents that embeds every
+    sentence window of every input document in one embed_documents call.
+
+    SemanticChunker embeds one document at a time and computes each
+    neighbour distance with its own cosine_similarity call. Here all windows
+    are embedded together, rows are L2-normalised once and every neighbour
+    distance is one row-wise dot product over the whole matrix, with the
+    pairs that straddle two documents masked out. Thresholds are still
+    computed per document (segmented NumPy reductions), so given the same
+    embeddings the chunk texts and metadata match SemanticChunker's.
+
+    Chunks longer than max_chunk_tokens are split again at their strongest
+    internal breakpoint until they fit. A single sentence over the limit is
+    split on word boundaries.
+    """
+
+    def __init__(self, embeddings: Embeddings, buffer_size: int = 1,
+                 breakpoint_threshold_type: str = "percentile",
+                 breakpoint_threshold_amount: Optional[float] = None,
+                 sentence_split_regex: str = r"(?<=[.?!])\s+",
+                 max_chunk_tokens: Optional[int] = None,
+                 token_model: str = "text-embedding-ada-002"):
+        if breakpoint_threshold_type not in BREAKPOINT_DEFAULTS:
+            raise ValueError(f"Got unexpected `breakpoint_threshold_type`: {breakpoint_threshold_type}")
+        self.embeddings = embeddings
+        self.buffer_size = buffer_size
+        self.breakpoint_threshold_type = breakpoint_threshold_type
+        self.breakpoint_threshold_amount = (BREAKPOINT_DEFAULTS[breakpoint_threshold_type]
+                                            if breakpoint_threshold_amount is None
+                                            else breakpoint_threshold_amount)
+        self.sentence_split_regex = sentence_split_regex
+        self.max_chunk_tokens = max_chunk_tokens
+        self.token_model = token_model
+
+    def _windows(self, sentences: List[str]) -> List[str]:
+        """Each sentence joined with buffer_size neighbours on both sides (combine_sentences)."""
+        b = self.buffer_size
+        return [" ".join(sentences[max(0, i - b):i + b + 1]) for i in range(len(sentences))]
+
+    def _distances(self, windows: List[str], starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """Cosine distance from every window to the next one, for all documents in one pass."""
+        matrix = np.asarray(self.embeddings.embed_documents(windows), dtype=np.float64)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        distances = 1 - np.einsum("ij,ij->i", matrix[:-1], matrix[1:])
+        # Drop the pair spanning each document's last and the next one's first sentence
+        keep = np.ones(len(distances), dtype=bool)
+        keep[(starts + counts - 1)[:-1]] = False
+        return distances[keep]
+
+    def _breakpoints(self, distances: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """Boolean mask over distances: True where a document is cut after that sentence."""
+        n_pairs = counts - 1
+        starts = np.concatenate(([0], np.cumsum(n_pairs)[:-1]))
+        seg = np.repeat(np.arange(len(counts)), n_pairs)
+        amount = self.breakpoint_threshold_amount
+        values = distances
+        if self.breakpoint_threshold_type == "percentile":
+            threshold = _segment_percentile(distances, seg, starts, n_pairs, amount)
+        elif self.breakpoint_threshold_type == "standard_deviation":
+            mean = np.add.reduceat(distances, starts) / n_pairs
+            std = np.sqrt(np.add.reduceat((distances - mean[seg]) ** 2, starts) / n_pairs)
+            threshold = mean + amount * std
+        elif self.breakpoint_threshold_type == "interquartile":
+            q1 = _segment_percentile(distances, seg, starts, n_pairs, 25)
+            q3 = _segment_percentile(distances, seg, starts, n_pairs, 75)
+            threshold = np.add.reduceat(distances, starts) / n_pairs + amount * (q3 - q1)
+        else:
+            values = _segment_gradient(distances, starts, n_pairs)
+            threshold = _segment_percentile(values, seg, starts, n_pairs, amount)
+        return values > threshold[seg]
+
+    def _fit(self, sentences: List[str], tokens: np.ndarray, gaps: np.ndarray) -> List[List[str]]:
+        """
+        Splits one chunk's sentences until every part fits max_chunk_tokens.
+
+        gaps[i] is the distance between sentences i and i+1; the largest one
+        is the cut point, i.e. the breakpoint the threshold only just missed.
+        """
+        if tokens.sum() <= self.max_chunk_tokens:
+            return [sentences]
+        if len(sentences) == 1:
+            words = sentences[0].split(" ")
+            parts = min(len(words), int(np.ceil(tokens[0] / self.max_chunk_tokens)))
+            bounds = np.linspace(0, len(words), parts + 1).astype(np.int64)
+            return [[" ".join(words[a:b])] for a, b in zip(bounds, bounds[1:])]
+        cut = int(np.argmax(gaps)) + 1
+        return (self._fit(sentences[:cut], tokens[:cut], gaps[:cut - 1])
+                + self._fit(sentences[cut:], tokens[cut:], gaps[cut:]))
+
+    def split_texts(self, texts: Sequence[str]) -> List[List[str]]:
+        """Chunk texts for every input text, in input order."""
+        split = [re.split(self.sentence_split_regex, text) for text in texts]
+        counts = np.array([len(sentences) for sentences in split], dtype=np.int64)
+        # Texts too short for a threshold are kept as split, like SemanticChunker does
+        min_sentences = 3 if self.breakpoint_threshold_type == "gradient" else 2
+        chunked = np.flatnonzero(counts >= min_sentences)
+
+        gaps: List[np.ndarray] = [np.zeros(0)] * len(split)
+        groups: List[List[List[str]]] = [[[sentence] for sentence in sentences] for sentences in split]
+        if len(chunked):
+            sizes = counts[chunked]
+            starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+            windows = [window for i in chunked for window in self._windows(split[i])]
+            distances = self._distances(windows, starts, sizes)
+            cuts = self._breakpoints(distances, sizes)
+            pair_starts = starts - np.arange(len(sizes))
+            for k, i in enumerate(chunked):
+                span = slice(pair_starts[k], pair_starts[k] + sizes[k] - 1)
+                gaps[i] = distances[span]
+                bounds = [0, *(np.flatnonzero(cuts[span]) + 1).tolist(), int(sizes[k])]
+                groups[i] = [split[i][a:b] for a, b in zip(bounds, bounds[1:])]
+
+        if self.max_chunk_tokens:
+            # +1 per sentence covers the joining space merging into a token
+            flat = [sentence for sentences in split for sentence in sentences]
+            tokens = np.split(count_tokens(flat, self.token_model) + 1, np.cumsum(counts)[:-1])
+            for i, doc_groups in enumerate(groups):
+                fitted, offset = [], 0
+                for group in doc_groups:
+                    end = offset + len(group)
+                    fitted.extend(self._fit(group, tokens[i][offset:end], gaps[i][offset:end - 1]))
+                    offset = end
+                groups[i] = fitted
+        return [[" ".join(group) for group in doc_groups] for doc_groups in groups]
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        """Same contract as SemanticChunker.split_documents: one Document per chunk, metadata deep-copied."""
+        documents = list(documents)
+        chunks = self.split_texts([doc.page_content for doc in documents])
+        return [Document(page_content=chunk, metadata=copy.deepcopy(doc.metadata))
+                for doc, doc_chunks in zip(documents, chunks) for chunk in doc_chunks]
@@ -0,0 +1,203 @@
+import queue
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import MarkdownHeaderTextSplitter
+
+from app.backend.core.config import (
+    DEDUP_ENABLED, EMBEDDING_BATCH_SIZE, STREAM_MAX_SECTION_CHARS, STREAM_PREFETCH_SECTIONS
+)
+from app.backend.core.embeddings import get_embeddings
+from app.backend.core.pdf_cache import pdf_cache
+from app.backend.tools.chunking_tools import HEADERS_TO_SPLIT_ON, _markdown_line, _make_chunker
+from app.backend.tools.dedup import Deduplicator
+from app.backend.tools.embedding_tools import embed_documents_batched, stream_into_collection
+
+# Longest separator first, mirroring MarkdownHeaderTextSplitter
+_HEADER_SEPARATORS = sorted((sep for sep, _ in HEADERS_TO_SPLIT_ON), key=len, reverse=True)
+
+
+def iter_pages(file_path: str) -> Iterator[str]:
+    """
+    Yields page texts one at a time.
+
+    The reader lock is taken per page rather than for the whole stream, so the
+    shared reader stays usable by other steps while pages are consumed.
+    """
+    with pdf_cache.reader(file_path) as reader:
+        page_count = len(reader.pages)
+    for page_no in range(page_count):
+        with pdf_cache.reader(file_path) as reader:
+            text = reader.pages[page_no].extract_text()
+        yield text
+
+
+def iter_markdown_lines(pages: Iterable[str]) -> Iterator[str]:
+    """
+    Applies the convert_to_md heuristic line by line.
+
+    Pages are separated exactly as extract_pdf joins them ("\\n\\n"), so the
+    stream of lines matches what the batch path would produce.
+    """
+    for page_no, text in enumerate(pages):
+        if page_no:
+            yield ""
+        for line in text.split("\n"):
+            yield _markdown_line(line)
+
+
+def _header_separator(line: str) -> Optional[str]:
+    for sep in _HEADER_SEPARATORS:
+        if line.startswith(sep) and (len(line) == len(sep) or line[len(sep)] == " "):
+            return sep
+    return None
+
+
+def iter_sections(lines: Iterable[str], max_chars: int = STREAM_MAX_SECTION_CHARS) -> Iterator[Document]:
+    """
+    Streaming equivalent of structure_split.
+
+    Lines are buffered until the next header (or until the buffer reaches
+    max_chars at a blank line) and the buffer is split with the regular
+    MarkdownHeaderTextSplitter. The headers that were active when the buffer
+    started are prepended, so section metadata is the same as when splitting
+    the whole document at once.
+    """
+    splitter = MarkdownHeaderTextSplitter(headers_to_split_on=HEADERS_TO_SPLIT_ON)
+    levels = {sep: len(sep) for sep in _HEADER_SEPARATORS}
+    active: Dict[str, str] = {}
+    context: List[str] = []
+    buffer: List[str] = []
+    buffered_chars = 0
+    has_content = False
+
+    def flush():
+        return splitter.split_text("\n".join(context + buffer))
+
+    for line in lines:
+        sep = _header_separator(line)
+        overflow = buffered_chars >= max_chars and not line
+        if has_content and (sep or overflow):
+            yield from flush()
+            context = [active[s] for s in sorted(active, key=levels.get)]
+            buffer, buffered_chars, has_content = [], 0, False
+            if overflow:
+                continue
+
+        if sep:
+            for other in [s for s in active if levels[s] >= levels[sep]]:
+                del active[other]
+            active[sep] = line
+        elif line:
+            has_content = True
+        buffer.append(line)
+        buffered_chars += len(line) + 1
+
+    if has_content:
+        yield from flush()
+
+
+class _ProducerError:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def prefetch(iterable: Iterable, size: int = STREAM_PREFETCH_SECTIONS) -> Iterator:
+    """
+    Runs an iterator in a background thread, buffering at most `size` items.
+
+    Lets page parsing continue while the consumer waits on embedding calls,
+    without letting the producer run arbitrarily far ahead.
+    """
+    items: queue.Queue = queue.Queue(maxsize=size)
+    done = object()
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        """Blocks until the item is queued or the consumer has gone away."""
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        source = iter(iterable)
+        try:
+            for item in source:
+                if not put(item):
+                    return
+            put(done)
+        except BaseException as e:
+            put(_ProducerError(e))
+        finally:
+            # Release the upstream generator (and the PDF reader it holds) in this thread
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+
+    producer = threading.Thread(target=produce, name="stream-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                break
+            if isinstance(item, _ProducerError):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+def stream_chunks(file_path: str) -> Iterator[Document]:
+    """Pages -> markdown lines -> header sections -> final chunks, one section at a time."""
+    sections = prefetch(iter_sections(iter_markdown_lines(iter_pages(file_path))))
+    chunker = _make_chunker()
+    for section in sections:
+        yield from chunker.split_documents([section])
+
+
+def iter_embedding_batches(chunks: Iterable[Document], embeddings: Embeddings,
+                           batch_size: int = EMBEDDING_BATCH_SIZE) -> Iterator[Tuple[List[Document], np.ndarray]]:
+    """Groups chunks into batches and embeds each batch as soon as it is full."""
+    batch: List[Document] = []
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) >= batch_size:
+            yield batch, embed_documents_batched(batch, embeddings, batch_size)
+            batch = []
+    if batch:
+        yield batch, embed_documents_batched(batch, embeddings, batch_size)
+
+
+def stream_ingest(file_path: str, collection_name: str, doc_id: str) -> dict:
+    """
+    Streams a PDF into a vector collection with memory bounded by a window of pages.
+
+    The first chunks are embedded and written to the collection while later
+    pages are still being parsed in the prefetch thread; a failure midway
+    removes what was written. Near-duplicate chunks are dropped as they
+    arrive, before they reach an embedding batch.
+
+    Returns:
+        dict: added / replaced / total chunk counts, the collection save path
+        and the dedup report.
+    """
+    embeddings = get_embeddings()
+    chunks = stream_chunks(file_path)
+    deduplicator = Deduplicator() if DEDUP_ENABLED else None
+    if deduplicator:
+        chunks = deduplicator.filter(chunks)
+    batches = iter_embedding_batches(chunks, embeddings)
+    result = stream_into_collection(collection_name, doc_id, batches, embeddings, deduplicator)
+    if deduplicator and result["save_path"]:
+        result["dedup"] = deduplicator.report(result["dimension"])
+        print(f"✓ Dedup saved {result['dedup']['embeddings_saved_pct']}% of embeddings")
+    return result
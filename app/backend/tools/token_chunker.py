@@ -0,0 +1,75 @@
+import copy
+import re
+from typing import Iterable, List, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.backend.core.config import TOKEN_CHUNK_ENCODING, TOKEN_CHUNK_OVERLAP, TOKEN_CHUNK_SIZE
+from app.backend.core.tokenizer import load_encoding
+
+# Stand-in pre-tokenizer when the BPE file isn't available: words, punctuation
+# runs and newlines with their leading whitespace. Each piece is at least one
+# BPE token, so budgets measured with it are approximate (chunks run longer).
+_FALLBACK_PIECE_RE = re.compile(r"\s*\w+|\s*[^\w\s]+|\s+")
+
+
+class TokenChunker:
+    """
+    Structural chunking with token budgets, no embedding calls.
+
+    Every header section is tokenized (all sections in one tiktoken
+    encode_batch call) and cut into windows of at most chunk_tokens tokens,
+    consecutive windows sharing overlap_tokens tokens. Chunk texts are exact
+    slices of the section text taken at token boundaries, so the output is a
+    pure function of the input and the encoding. Sections that fit the
+    budget are kept whole; sections are never merged, so each chunk keeps its
+    section's header metadata.
+
+    tiktoken loads its BPE file from TIKTOKEN_CACHE_DIR (the Docker image
+    bakes it in); set that for hosts without network access.
+    """
+
+    def __init__(self, chunk_tokens: int = TOKEN_CHUNK_SIZE, overlap_tokens: int = TOKEN_CHUNK_OVERLAP,
+                 encoding_name: str = TOKEN_CHUNK_ENCODING):
+        if not 0 <= overlap_tokens < chunk_tokens:
+            raise ValueError(f"overlap_tokens must be in [0, {chunk_tokens}), got {overlap_tokens}")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.encoding_name = encoding_name
+
+    def _token_offsets(self, texts: Sequence[str]) -> List[np.ndarray]:
+        """Character offset where each token starts, plus len(text) as the end sentinel."""
+        encoding = load_encoding(self.encoding_name)
+        if encoding is None:
+            return [np.array([m.start() for m in _FALLBACK_PIECE_RE.finditer(text)] + [len(text)],
+                             dtype=np.int64) for text in texts]
+        offsets = []
+        for text, ids in zip(texts, encoding.encode_batch(list(texts), disallowed_special=())):
+            _, starts = encoding.decode_with_offsets(ids)
+            offsets.append(np.array(starts + [len(text)], dtype=np.int64))
+        return offsets
+
+    def _windows(self, n_tokens: int) -> np.ndarray:
+        """(start, end) token indices of every window over n_tokens tokens."""
+        if n_tokens <= self.chunk_tokens:
+            return np.array([[0, n_tokens]], dtype=np.int64)
+        stride = self.chunk_tokens - self.overlap_tokens
+        starts = np.arange(0, n_tokens - self.overlap_tokens, stride, dtype=np.int64)
+        return np.stack([starts, np.minimum(starts + self.chunk_tokens, n_tokens)], axis=1)
+
+    def split_texts(self, texts: Sequence[str]) -> List[List[str]]:
+        """Chunk texts for every input text, in input order."""
+        results = []
+        for text, offsets in zip(texts, self._token_offsets(texts)):
+            n_tokens = len(offsets) - 1
+            chunks = [text[offsets[a]:offsets[b]].strip() for a, b in self._windows(n_tokens)]
+            results.append([chunk for chunk in chunks if chunk])
+        return results
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        """One Document per chunk, metadata deep-copied from its section (like the semantic chunker)."""
+        documents = list(documents)
+        chunks = self.split_texts([doc.page_content for doc in documents])
+        return [Document(page_content=chunk, metadata=copy.deepcopy(doc.metadata))
+                for doc, doc_chunks in zip(documents, chunks) for chunk in doc_chunks]
@@ -0,0 +1,62 @@
+import asyncio
+import uuid
+from typing import AsyncIterator, Optional, Tuple
+
+from app.backend.core.ingestion_cache import ingestion_cache, hash_file
+from app.backend.core.pdf_cache import pdf_cache
+from app.backend.workflows.pdf_graph import pdf_graph
+
+
+async def stream_ingestion(file_path: str, file_name: str, file_hash: Optional[str] = None,
+                           thread_id: Optional[str] = None) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    Runs a PDF through pdf_graph and yields progress as (event, payload) pairs.
+
+    Events:
+      - "cache_hit": the result was served from the ingestion cache
+      - "node": a graph node finished; payload is {"node": <name>}
+      - "result": the final state (always the last event)
+    """
+    file_hash = file_hash or await asyncio.to_thread(hash_file, file_path)
+
+    cached = await asyncio.to_thread(ingestion_cache.get, file_hash)
+    if cached is not None:
+        print(f"⚡ Ingestion cache hit for {file_name} ({file_hash})")
+        yield "cache_hit", {"file_hash": file_hash}
+        yield "result", {**cached, "file_name": file_name, "file_hash": file_hash, "cache_hit": True}
+        return
+
+    config = {"configurable": {"thread_id": thread_id or str(uuid.uuid4())}}
+    result: dict = {}
+    # Nodes share one parsed PdfReader for this file; it is dropped when the run ends
+    with pdf_cache.scope(file_path, file_hash):
+        async for mode, chunk in pdf_graph.astream({
+            "file_path": file_path,
+            "file_name": file_name,
+            "file_hash": file_hash,
+        }, config=config, stream_mode=["updates", "values"]):
+            if mode == "values":
+                result = chunk
+            else:
+                for node in chunk:
+                    yield "node", {"node": node}
+
+    # Only finished runs are cached; failures may be transient (API errors, timeouts)
+    if result.get("chunking_status") == "success":
+        await asyncio.to_thread(ingestion_cache.put, file_hash, result)
+    yield "result", {**result, "cache_hit": False}
+
+
+async def run_ingestion(file_path: str, file_name: str, file_hash: Optional[str] = None,
+                        thread_id: Optional[str] = None) -> dict:
+    """
+    Runs a PDF through pdf_graph, short-circuiting on the ingestion cache.
+
+    A repeat upload of the same bytes (under the same PIPELINE_VERSION) returns
+    the stored result without any LLM or embedding calls.
+    """
+    result: dict = {}
+    async for event, payload in stream_ingestion(file_path, file_name, file_hash, thread_id):
+        if event == "result":
+            result = payload
+    return result
@@ -0,0 +1,137 @@
+import asyncio
+from typing import Dict, List, Optional
+
+from app.backend.core.config import JOB_QUEUE_MAX, JOB_WORKERS
+from app.backend.core.job_store import FAILED, QUEUED, RUNNING, SUCCEEDED, JobStore, job_store
+from app.backend.core.uploads import release_upload, retain_upload
+from app.backend.workflows.ingestion import stream_ingestion
+
+
+class QueueFull(Exception):
+    """Raised when JOB_QUEUE_MAX jobs are already waiting."""
+
+
+def _pipeline_error(result: dict) -> Optional[str]:
+    """Error of a run that finished without chunks, None when it succeeded."""
+    if result.get("chunking_status") == "fail" or result.get("error_message"):
+        return result.get("error_message") or "Chunking failed"
+    return None
+
+
+class JobQueue:
+    """
+    Runs ingestion jobs on a fixed number of background workers.
+
+    Jobs and their progress events live in the JobStore, so a client can poll
+    or follow them from any request, and unfinished jobs are picked up again
+    when the backend restarts.
+    """
+
+    def __init__(self, store: JobStore = job_store, workers: int = JOB_WORKERS, max_queued: int = JOB_QUEUE_MAX):
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._updates: Dict[str, asyncio.Event] = {}
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        # Jobs interrupted by a restart run again from the start; the graph is idempotent
+        for job in await asyncio.to_thread(self.store.unfinished):
+            if job["status"] == RUNNING:
+                await asyncio.to_thread(self.store.update, job["id"], status=QUEUED)
+                await asyncio.to_thread(self.store.add_event, job["id"], QUEUED, {"status": QUEUED, "requeued": True})
+            retain_upload(job["file_path"])
+            self._queue.put_nowait((job["id"], job["file_path"]))
+        if self._queue.qsize():
+            print(f"✓ Re-queued {self._queue.qsize()} unfinished ingestion job(s)")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, file_path: str, file_name: str, file_hash: Optional[str] = None) -> dict:
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+        if self._queue.qsize() >= self.max_queued:
+            raise QueueFull(f"{self._queue.qsize()} jobs already queued")
+        job = await asyncio.to_thread(self.store.create, file_name, file_path, file_hash)
+        self._queue.put_nowait((job["id"], file_path))
+        return job
+
+    def subscribe(self, job_id: str) -> asyncio.Event:
+        """
+        Returns an event that is set on the job's next progress event.
+
+        Subscribe before reading the store so an event recorded in between is not missed.
+        """
+        return self._updates.setdefault(job_id, asyncio.Event())
+
+    def _notify(self, job_id: str) -> None:
+        event = self._updates.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _record(self, job_id: str, event: str, data: dict, **fields) -> None:
+        if fields:
+            await asyncio.to_thread(self.store.update, job_id, **fields)
+        await asyncio.to_thread(self.store.add_event, job_id, event, data)
+        self._notify(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, file_path = await self._queue.get()
+            try:
+                await self._run(job_id, file_path)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str, file_path: str) -> None:
+        """Runs one queued job, then drops the queue's hold on its upload (also if the job was skipped)."""
+        cancelled = False
+        try:
+            await self._execute(job_id)
+        except asyncio.CancelledError:
+            # Shutdown: the job stays running and keeps its upload, so the next start re-queues it
+            cancelled = True
+            raise
+        finally:
+            if not cancelled:
+                release_upload(file_path)
+
+    async def _execute(self, job_id: str) -> None:
+        job = await asyncio.to_thread(self.store.get, job_id, False)
+        if job is None or job["status"] != QUEUED:
+            return
+
+        await self._record(job_id, RUNNING, {"status": RUNNING}, status=RUNNING)
+        try:
+            async for event, payload in stream_ingestion(
+                job["file_path"], job["file_name"], file_hash=job["file_hash"], thread_id=job_id
+            ):
+                if event == "node":
+                    await self._record(job_id, "node", payload, current_node=payload["node"])
+                elif event == "cache_hit":
+                    await self._record(job_id, "cache_hit", payload)
+                elif event == "result":
+                    error = _pipeline_error(payload)
+                    if error is not None:
+                        print(f"✗ Ingestion job {job_id} failed: {error}")
+                        await self._record(job_id, FAILED, {"status": FAILED, "error": error},
+                                           status=FAILED, error=error, result=payload)
+                        continue
+                    await self._record(
+                        job_id, SUCCEEDED,
+                        {"status": SUCCEEDED, "cache_hit": payload.get("cache_hit", False)},
+                        status=SUCCEEDED, result=payload,
+                    )
+        except Exception as e:
+            print(f"✗ Ingestion job {job_id} failed: {e}")
+            await self._record(job_id, FAILED, {"status": FAILED, "error": str(e)}, status=FAILED, error=str(e))
+
+
+job_queue = JobQueue()
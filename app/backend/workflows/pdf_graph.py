@@ -1,15 +1,15 @@
 from langgraph.graph import StateGraph, START, END
 from app.backend.core.state import State
-from app.backend.agents.pdf_agents.pdf_validation_agent import pdf_validation_agent
-from app.backend.agents.pdf_agents.pdf_chunking_agent import pdf_chunking_agent
-from app.backend.agents.pdf_agents.embedding_agent import embedding_agent
+from app.backend.agents.pdf_agents.pdf_validation_agent import apdf_validation_agent
+from app.backend.agents.pdf_agents.pdf_chunking_agent import apdf_chunking_agent
+from app.backend.agents.pdf_agents.embedding_agent import aembedding_agent
 
 pdf_graph = StateGraph(State)
 
-# Add node
-pdf_graph.add_node("pdf_validation_agent", pdf_validation_agent)
-pdf_graph.add_node("pdf_chunking_agent", pdf_chunking_agent)
-pdf_graph.add_node("embedding_agent", embedding_agent)
+# Add node (async variants: the graph is always run with ainvoke/astream)
+pdf_graph.add_node("pdf_validation_agent", apdf_validation_agent)
+pdf_graph.add_node("pdf_chunking_agent", apdf_chunking_agent)
+pdf_graph.add_node("embedding_agent", aembedding_agent)
 
 # Correct edges (use string node names)
 pdf_graph.add_edge(START, "pdf_validation_agent")
@@ -17,10 +17,7 @@ pdf_graph.add_edge("pdf_validation_agent", "pdf_chunking_agent")
 pdf_graph.add_edge("pdf_chunking_agent", END)
 # pdf_graph.add_edge("embedding_agent", END)
 
-from langgraph.checkpoint.memory import MemorySaver
+from app.backend.core.checkpointer import checkpointer
 
-# ... existing imports ...
-
-# Compile (IMPORTANT) with persistence
-checkpointer = MemorySaver()
+# Compile (IMPORTANT) with persistence: SQLite on disk, pruned by TTL/thread count
 pdf_graph = pdf_graph.compile(checkpointer=checkpointer)
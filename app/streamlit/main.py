@@ -1,27 +1,112 @@
 import streamlit as st
-import tempfile
+import httpx
+import json
 import os
+import time
 import uuid
-import asyncio
-import sys
+import xxhash
+from httpx_sse import connect_sse
+from typing import Optional
 
-# Ensure the root directory is in sys.path so we can import app.backend
-# Assuming this script is run from the project root or app/streamlit
-current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.abspath(os.path.join(current_dir, "../../"))
-if project_root not in sys.path:
-    sys.path.append(project_root)
+BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
 
-from app.backend.workflows.pdf_graph import pdf_graph
+CHUNK_PREVIEW_LIMIT = 20
+# Times the progress stream is reopened after dropping before the job finished
+FOLLOW_RECONNECTS = 5
+
+NODE_LABELS = {
+    "pdf_validation_agent": "Validated PDF",
+    "pdf_chunking_agent": "Chunked PDF",
+}
 
 st.set_page_config(page_title="PDF Graph Streamlit", layout="wide")
 st.title("PDF Graph Streamlit App 🦜🕸️")
 
+
+@st.cache_resource
+def get_client() -> httpx.Client:
+    # One pooled client per server process; reruns reuse its keep-alive connections
+    return httpx.Client(
+        base_url=BACKEND_URL,
+        timeout=httpx.Timeout(30.0, read=60.0),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def submit_file(file_hash: str, file_name: str, _file_content: bytes) -> str:
+    """Submits an upload as a background job; cached so the same bytes are only submitted once."""
+    response = get_client().post(
+        "/jobs", files={"file": (file_name, _file_content, "application/pdf")}
+    )
+    response.raise_for_status()
+    body = response.json()
+    if "error" in body:
+        raise ValueError(body["error"])
+    return body["job_id"]
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def fetch_result(job_id: str) -> dict:
+    """The job with its result; only call it for finished jobs, since the answer is cached."""
+    response = get_client().get(f"/jobs/{job_id}")
+    response.raise_for_status()
+    return response.json()
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def fetch_chunks(file_hash: str, offset: int, limit: int) -> Optional[dict]:
+    """One page of the document's chunks, or None when the backend has none stored for it."""
+    response = get_client().get(f"/documents/{file_hash}/chunks", params={"offset": offset, "limit": limit})
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
+def follow_job(job_id: str, status) -> Optional[str]:
+    """
+    Streams the job's progress events into a st.status box until it finishes.
+
+    A dropped stream is reopened from the last event seen (Last-Event-ID), so
+    no event is shown twice. Returns "succeeded" or "failed", or None if the
+    stream kept dropping before the job finished.
+    """
+    last_event_id = None
+    for attempt in range(FOLLOW_RECONNECTS + 1):
+        if attempt:
+            time.sleep(min(2 ** attempt, 10))
+        headers = {"Last-Event-ID": last_event_id} if last_event_id else {}
+        try:
+            with connect_sse(get_client(), "GET", f"/jobs/{job_id}/events", headers=headers) as event_source:
+                for sse in event_source.iter_sse():
+                    last_event_id = sse.id or last_event_id
+                    data = json.loads(sse.data)
+                    if sse.event == "running":
+                        status.update(label="Processing through LangGraph...")
+                    elif sse.event == "cache_hit":
+                        status.write("⚡ Served from the ingestion cache")
+                    elif sse.event == "node":
+                        status.write(f"✓ {NODE_LABELS.get(data['node'], data['node'])}")
+                    elif sse.event == "failed":
+                        status.update(label="Processing failed", state="error")
+                        return "failed"
+                    elif sse.event == "succeeded":
+                        status.update(label="Processing Complete!", state="complete")
+                        return "succeeded"
+        except httpx.TransportError:
+            pass
+        status.update(label="Reconnecting to the job's progress stream...")
+    status.update(label="Lost the job's progress stream", state="error")
+    return None
+
+
 # Initialize Thread ID
 if "thread_id" not in st.session_state:
     st.session_state.thread_id = str(uuid.uuid4())
 
 st.sidebar.text(f"Session Thread ID:\n{st.session_state.thread_id}")
+st.sidebar.text(f"Backend:\n{BACKEND_URL}")
 
 st.write("Upload a PDF to process it through the LangGraph workflow.")
 
@@ -29,54 +114,49 @@ uploaded_file = st.file_uploader(
     "Upload PDF", accept_multiple_files=False, type="pdf"
 )
 
-async def process_file(file_content, file_name, thread_id):
-    # Save to temp file as the graph expects a file path
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(file_content)
-        temp_path = tmp.name
-
-    try:
-        config = {"configurable": {"thread_id": thread_id}}
-        # Initial state
-        initial_state = {
-            "file_path": temp_path,
-            "file_name": file_name,
-        }
-        
-        # Invoke the graph
-        result = await pdf_graph.ainvoke(initial_state, config=config)
-        return result
-    finally:
-        # Cleanup temp file
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-
 if uploaded_file:
     if st.button("Process File"):
-        with st.spinner("Processing through LangGraph..."):
-            try:
-                # Read file content once
-                file_content = uploaded_file.read()
-                
-                # Run the async processing
-                result = asyncio.run(process_file(file_content, uploaded_file.name, st.session_state.thread_id))
-                
-                st.success("Processing Complete!")
-                
+        try:
+            # Read file content once; the hash keys every cache below
+            file_content = uploaded_file.getvalue()
+            file_hash = xxhash.xxh3_128_hexdigest(file_content)
+
+            job_id = submit_file(file_hash, uploaded_file.name, file_content)
+            with st.status("Queued...", expanded=True) as status:
+                outcome = follow_job(job_id, status)
+
+            if outcome is None:
+                # The job is still queued or running; the next click follows the same job
+                st.warning("Lost track of the job's progress. It keeps running on the backend; "
+                           "click Process File again to check on it.")
+            elif outcome == "failed":
+                # Don't pin a failed run to this file; the next click retries it
+                job = fetch_result(job_id)
+                submit_file.clear(file_hash, uploaded_file.name, file_content)
+                fetch_result.clear(job_id)
+                st.error(f"An error occurred: {job.get('error')}")
+            else:
+                job = fetch_result(job_id)
+                result = job["result"]
+
                 # Display Results
                 with st.expander("Full State Output", expanded=False):
                     st.json(result)
-                
+
                 # Show specific interesting parts if available
                 if "pdf_validation_status" in result:
                     st.info(f"Validation Status: {result['pdf_validation_status']}")
-                
-                if "docs" in result:
-                    st.write(f"Number of Documents: {len(result['docs'])}")
-                    
-            except Exception as e:
-                st.error(f"An error occurred: {str(e)}")
-                st.exception(e)
+
+                if result.get("total_chunks"):
+                    st.write(f"Number of Chunks: {result['total_chunks']}")
+                    page = fetch_chunks(file_hash, 0, CHUNK_PREVIEW_LIMIT)
+                    if page is not None:
+                        with st.expander(f"First {CHUNK_PREVIEW_LIMIT} chunks", expanded=False):
+                            st.json(page["chunks"])
+
+        except Exception as e:
+            st.error(f"An error occurred: {str(e)}")
+            st.exception(e)
 
 # Chat Interface (Future extension)
 if prompt := st.chat_input("Ask something about the processed PDF..."):
@@ -84,4 +164,4 @@ if prompt := st.chat_input("Ask something about the processed PDF..."):
         st.markdown(prompt)
     
     with st.chat_message("assistant"):
-        st.write("Chat functionality not yet connected to graph edges... (Update graph to support chat)")
\ No newline at end of file
+        st.write("Chat functionality not yet connected to graph edges... (Update graph to support chat)")
@@ -0,0 +1,101 @@
+"""
+Compares per-document latency of the chunking agent in "direct" mode versus
+the LLM-driven "agent" mode.
+
+The LLM is replaced by a scripted chat model that issues the four tool calls in
+order with a fixed simulated round-trip latency, and embeddings are replaced by
+the local hashing embedder, so the benchmark runs offline.
+
+Usage:
+    python -m benchmarks.bench_chunking_modes --pages 20 --runs 3 --llm-latency 0.8
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from typing import Any, List, Optional
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["EMBEDDING_PROVIDER"] = "hashing"
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from benchmarks._pdf import make_pdf
+from app.backend.agents.pdf_agents import pdf_chunking_agent as chunking_module
+
+PIPELINE = ["extract_pdf", "convert_to_md", "structure_split", "final_chunk"]
+
+
+class ScriptedToolCallingModel(BaseChatModel):
+    """Chat model stub that walks the chunking tools in order, like the real agent should."""
+
+    latency: float = 0.8
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-tool-caller"
+
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        return self
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        self.calls += 1
+        tool_messages = [m for m in messages if isinstance(m, ToolMessage)]
+        step = len(tool_messages)
+        if step >= len(PIPELINE):
+            message = AIMessage(content="Chunking complete.")
+        elif step == 0:
+            file_path = str(messages[-1].content).split(": ", 1)[-1]
+            message = AIMessage(content="", tool_calls=[{
+                "name": PIPELINE[0], "args": {"file_path": file_path}, "id": str(uuid.uuid4())
+            }])
+        else:
+            message = AIMessage(content="", tool_calls=[{
+                "name": PIPELINE[step], "args": {"input_json": tool_messages[-1].content}, "id": str(uuid.uuid4())
+            }])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _time_mode(mode: str, file_path: str, runs: int) -> List[float]:
+    chunking_module.CHUNKING_MODE = mode
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        state = chunking_module.pdf_chunking_agent({"file_path": file_path})
+        timings.append(time.perf_counter() - started)
+        if state.get("chunking_status") != "success":
+            raise RuntimeError(f"{mode} mode failed: {state.get('error_message')}")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="Simulated seconds per LLM call")
+    args = parser.parse_args()
+
+    model = ScriptedToolCallingModel(latency=args.llm_latency)
+    chunking_module.llm_model = model
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = make_pdf(os.path.join(tmp_dir, "bench.pdf"), pages=args.pages)
+        results = {}
+        for mode in ("direct", "agent"):
+            model.calls = 0
+            results[mode] = (_time_mode(mode, pdf_path, args.runs), model.calls / args.runs)
+
+    print(f"{'mode':<8} {'median s':>10} {'min s':>10} {'LLM calls/doc':>14}")
+    for mode, (timings, llm_calls) in results.items():
+        print(f"{mode:<8} {statistics.median(timings):>10.3f} {min(timings):>10.3f} {llm_calls:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Chunks/second of the sequential LangChain OpenAI embedder versus the
+concurrent token-budgeted EmbeddingExecutor, against a local fake
+/v1/embeddings server.
+
+The fake server charges a fixed latency per request plus a cost per input and
+answers 429 (with Retry-After) when more than --capacity requests are in
+flight, so the executor's adaptive concurrency is exercised.
+
+Usage:
+    python -m benchmarks.bench_embedding_throughput --chunks 4000 --capacity 6
+"""
+import argparse
+import asyncio
+import base64
+import multiprocessing
+import os
+import random
+import socket
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+# The fake server has no rate budget; only its 429s should limit the executor
+os.environ["EMBEDDING_RPM"] = "0"
+os.environ["EMBEDDING_TPM"] = "0"
+
+import numpy as np
+import openai
+import uvicorn
+import xxhash
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from langchain_core.documents import Document
+from langchain_openai import OpenAIEmbeddings
+
+from app.backend.core.embedding_executor import ConcurrentOpenAIEmbeddings, EmbeddingExecutor
+from app.backend.core.tokenizer import load_encoding
+from app.backend.tools.embedding_tools import embed_documents_batched
+
+DIM = 64
+MODEL = "text-embedding-3-small"
+WORDS = "pdf graph chunk vector index section report table figure page token model embedding".split()
+
+
+def _fake_server(capacity: int, request_latency: float, input_latency: float) -> FastAPI:
+    app = FastAPI()
+    state = {"in_flight": 0}
+    encoding = load_encoding(MODEL)
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body["input"]
+        if state["in_flight"] >= capacity:
+            return JSONResponse(status_code=429, headers={"retry-after": "0.2"},
+                                content={"error": {"message": "Rate limit reached", "type": "rate_limit"}})
+        state["in_flight"] += 1
+        try:
+            await asyncio.sleep(request_latency + input_latency * len(inputs))
+        finally:
+            state["in_flight"] -= 1
+        data = []
+        for i, item in enumerate(inputs):
+            # Seed from the text, so token-id inputs (executor) and text inputs
+            # (LangChain client) of the same chunk get the same vector
+            text = item if isinstance(item, str) else encoding.decode(item)
+            seed = xxhash.xxh3_64_intdigest(text.encode("utf-8")) & 0xFFFFFFFF
+            vector = np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+            # The OpenAI client asks for base64 by default, like the real API serves it
+            embedding = (base64.b64encode(vector.tobytes()).decode()
+                         if body.get("encoding_format") == "base64" else vector.tolist())
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        return {"object": "list", "data": data, "model": body["model"],
+                "usage": {"prompt_tokens": 0, "total_tokens": 0}}
+
+    return app
+
+
+def _run_server(port: int, capacity: int, request_latency: float, input_latency: float) -> None:
+    app = _fake_server(capacity, request_latency, input_latency)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="error")
+
+
+def _serve(capacity: int, request_latency: float, input_latency: float) -> str:
+    """Starts the fake server in its own process so it doesn't compete with the client for the GIL."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = multiprocessing.get_context("spawn").Process(
+        target=_run_server, args=(port, capacity, request_latency, input_latency), daemon=True
+    )
+    process.start()
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    return f"http://127.0.0.1:{port}/v1"
+
+
+def _documents(count: int) -> list:
+    rng = random.Random(0)
+    return [Document(page_content=" ".join(rng.choice(WORDS) for _ in range(rng.randint(80, 300))))
+            for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=4000)
+    parser.add_argument("--capacity", type=int, default=6, help="Concurrent requests before the server returns 429")
+    parser.add_argument("--request-latency", type=float, default=0.15)
+    parser.add_argument("--input-latency", type=float, default=0.0005)
+    parser.add_argument("--concurrency", type=int, default=16, help="Executor's starting/maximum concurrency")
+    args = parser.parse_args()
+
+    base_url = _serve(args.capacity, args.request_latency, args.input_latency)
+    documents = _documents(args.chunks)
+
+    sequential = OpenAIEmbeddings(model=MODEL, base_url=base_url,
+                                  check_embedding_ctx_length=False)
+    executor = EmbeddingExecutor(
+        MODEL, max_concurrency=args.concurrency,
+        client_factory=lambda: openai.AsyncOpenAI(base_url=base_url, max_retries=0),
+    )
+    concurrent = ConcurrentOpenAIEmbeddings(executor)
+
+    results = {}
+    for name, embeddings in (("sequential", sequential), ("concurrent", concurrent)):
+        started = time.perf_counter()
+        vectors = embed_documents_batched(documents, embeddings)
+        elapsed = time.perf_counter() - started
+        results[name] = (elapsed, vectors)
+
+    assert np.allclose(results["sequential"][1], results["concurrent"][1]), "vectors differ between embedders"
+    print(f"chunks={args.chunks} server_capacity={args.capacity} request_latency={args.request_latency}s")
+    print(f"{'embedder':<12} {'seconds':>9} {'chunks/s':>10}")
+    for name, (elapsed, _) in results.items():
+        print(f"{name:<12} {elapsed:>9.2f} {args.chunks / elapsed:>10.1f}")
+    print(f"executor: {executor.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Measures how extract_pdf's page-range process pool scales with worker count
+on a generated many-page PDF.
+
+Usage:
+    python -m benchmarks.bench_parallel_extraction --pages 1000 --runs 3
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from pypdf import PdfReader
+
+from benchmarks._pdf import make_pdf
+from app.backend.tools import pdf_extraction
+
+
+def _sequential(file_path: str) -> list:
+    return [page.extract_text() for page in PdfReader(file_path).pages]
+
+
+def _time(fn, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    cpu_count = os.cpu_count() or 1
+    worker_counts = sorted({w for w in (2, 4, 8, 16, cpu_count) if w <= cpu_count})
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = make_pdf(os.path.join(tmp_dir, "bench.pdf"), pages=args.pages)
+        expected = _sequential(pdf_path)
+
+        # Start the pool once so the first timed run doesn't pay the spawn cost
+        pdf_extraction.extract_pages_parallel(pdf_path, args.pages, max(worker_counts or [1]))
+
+        baseline = _time(lambda: _sequential(pdf_path), args.runs)
+        print(f"pages={args.pages} cpus={cpu_count} auto_workers={pdf_extraction.choose_workers(args.pages)}")
+        print(f"{'workers':>8} {'median s':>10} {'pages/s':>10} {'speedup':>8}")
+        print(f"{1:>8} {baseline:>10.3f} {args.pages / baseline:>10.1f} {1.0:>8.2f}")
+        for workers in worker_counts:
+            pages = pdf_extraction.extract_pages_parallel(pdf_path, args.pages, workers)
+            assert pages == expected, "parallel extraction changed the page text or order"
+            elapsed = _time(lambda: pdf_extraction.extract_pages_parallel(pdf_path, args.pages, workers), args.runs)
+            print(f"{workers:>8} {elapsed:>10.3f} {args.pages / elapsed:>10.1f} {baseline / elapsed:>8.2f}")
+
+    pdf_extraction.shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Compares langchain_experimental's SemanticChunker with VectorizedSemanticChunker
+on the same header splits: chunk parity (identical chunk texts per section)
+and wall time.
+
+Embeddings come from the local hashing embedder wrapped with a simulated
+per-request latency, so the numbers reflect both the request count (one per
+section vs one in total) and the distance/threshold work.
+
+The generated PDF repeats one sentence template, so some sections have
+distances that tie with their threshold. Two implementations can round those
+differently in the last bit. Sections that differ only because of such a tie
+are reported separately from real mismatches.
+
+Usage:
+    python -m benchmarks.bench_semantic_chunker --pages 200 --runs 3 --latency 0.05
+"""
+import argparse
+import os
+import re
+import statistics
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from langchain_core.embeddings import Embeddings
+from langchain_experimental.text_splitter import SemanticChunker
+
+from benchmarks._pdf import make_pdf
+from app.backend.core.local_embeddings import HashingEmbeddings
+from app.backend.tools import chunking_tools
+from app.backend.tools.semantic_chunker import VectorizedSemanticChunker, count_tokens
+
+
+class LatencyEmbeddings(Embeddings):
+    """Hashing embedder that sleeps once per request, like a remote API round trip."""
+
+    def __init__(self, latency: float, dim: int = 256):
+        self.inner = HashingEmbeddings(dim)
+        self.latency = latency
+        self.requests = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        self.requests += 1
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def _time(make_chunker, splits, runs: int, latency: float):
+    timings, chunks, requests = [], None, 0
+    for _ in range(runs):
+        embeddings = LatencyEmbeddings(latency)
+        chunker = make_chunker(embeddings)
+        started = time.perf_counter()
+        chunks = chunker.split_documents(splits)
+        timings.append(time.perf_counter() - started)
+        requests = embeddings.requests
+    return statistics.median(timings), chunks, requests
+
+
+def _is_tie(text: str, embeddings: Embeddings, chunker: SemanticChunker) -> bool:
+    """True when one of the section's distances sits within 1e-9 of its breakpoint threshold."""
+    distances, _ = chunker._calculate_sentence_distances(re.split(chunker.sentence_split_regex, text))
+    threshold, values = chunker._calculate_breakpoint_threshold(distances)
+    return bool(np.min(np.abs(np.asarray(values) - threshold)) < 1e-9)
+
+
+def _parity(splits, threshold_type: str) -> str:
+    embeddings = HashingEmbeddings(256)
+    reference = SemanticChunker(embeddings, breakpoint_threshold_type=threshold_type)
+    grouped = VectorizedSemanticChunker(embeddings, breakpoint_threshold_type=threshold_type).split_texts(
+        [split.page_content for split in splits])
+    differ = [split for split, chunks in zip(splits, grouped) if reference.split_text(split.page_content) != chunks]
+    ties = sum(_is_tie(split.page_content, embeddings, reference) for split in differ)
+    return (f"{len(splits) - len(differ)}/{len(splits)} sections identical, "
+            f"{ties} differ only at threshold ties, {len(differ) - ties} real mismatches")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated seconds per embedding request")
+    parser.add_argument("--threshold-type", default="percentile",
+                        choices=["percentile", "standard_deviation", "interquartile", "gradient"])
+    parser.add_argument("--max-tokens", type=int, default=256, help="limit for the extra max-token run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = make_pdf(os.path.join(tmp_dir, "bench.pdf"), pages=args.pages)
+        extracted = chunking_tools._extract_text(pdf_path)
+    splits = chunking_tools._split_by_headers(chunking_tools._to_markdown(extracted))
+    print(f"pages={args.pages} sections={len(splits)} threshold={args.threshold_type}")
+
+    baseline_s, baseline, baseline_requests = _time(
+        lambda e: SemanticChunker(e, breakpoint_threshold_type=args.threshold_type), splits, args.runs, args.latency)
+    vector_s, vectorized, vector_requests = _time(
+        lambda e: VectorizedSemanticChunker(e, breakpoint_threshold_type=args.threshold_type), splits, args.runs, args.latency)
+    limited_s, limited, _ = _time(
+        lambda e: VectorizedSemanticChunker(e, breakpoint_threshold_type=args.threshold_type,
+                                            max_chunk_tokens=args.max_tokens), splits, args.runs, args.latency)
+
+    print(f"{'chunker':>26} {'seconds':>8} {'requests':>9} {'chunks':>7}")
+    print(f"{'SemanticChunker':>26} {baseline_s:>8.3f} {baseline_requests:>9} {len(baseline):>7}")
+    print(f"{'Vectorized':>26} {vector_s:>8.3f} {vector_requests:>9} {len(vectorized):>7}")
+    print(f"{f'Vectorized max={args.max_tokens}':>26} {limited_s:>8.3f} {vector_requests:>9} {len(limited):>7}")
+    print(f"speedup: {baseline_s / vector_s:.1f}x")
+    print(f"parity: {_parity(splits, args.threshold_type)}")
+    longest = max(count_tokens([c.page_content for c in limited], "text-embedding-ada-002"))
+    print(f"longest chunk with max-token limit: {longest} tokens")
+
+
+if __name__ == "__main__":
+    main()
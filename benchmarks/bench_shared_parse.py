@@ -0,0 +1,64 @@
+"""
+Measures time-to-first-page (validation + first extracted page) and
+validation + full extraction with and without the shared per-run PdfReader.
+
+Usage:
+    python -m benchmarks.bench_shared_parse --pages 2000 --runs 3
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks._pdf import make_pdf
+from app.backend.core.pdf_cache import pdf_cache
+from app.backend.tools import chunking_tools
+from app.backend.tools.pdf_tools import validate_pdf_tool
+from app.backend.tools.streaming_tools import iter_pages
+
+
+def _first_page(file_path: str) -> None:
+    validate_pdf_tool.invoke({"file_path": file_path})
+    next(iter_pages(file_path))
+
+
+def _full_extract(file_path: str) -> None:
+    validate_pdf_tool.invoke({"file_path": file_path})
+    chunking_tools._extract_text(file_path)
+
+
+def _time(fn, file_path: str, shared: bool, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        scope = pdf_cache.scope(file_path, "bench") if shared else contextlib.nullcontext()
+        started = time.perf_counter()
+        with scope:
+            fn(file_path)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    # In-process extraction only; the process pool parses its own readers
+    chunking_tools.choose_workers = lambda page_count: 1
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = make_pdf(os.path.join(tmp_dir, "bench.pdf"), pages=args.pages)
+        print(f"pages={args.pages} size={os.path.getsize(pdf_path) / 1e6:.1f}MB")
+        print(f"{'step':>22} {'separate s':>11} {'shared s':>10} {'speedup':>8}")
+        for name, fn in (("validate+first page", _first_page), ("validate+extract all", _full_extract)):
+            separate = _time(fn, pdf_path, False, args.runs)
+            shared = _time(fn, pdf_path, True, args.runs)
+            print(f"{name:>22} {separate:>11.3f} {shared:>10.3f} {separate / shared:>8.2f}")
+        print(f"pdf_cache: {pdf_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Load test: N concurrent uploads against the FastAPI app, comparing the graph
+built from the sync nodes with the graph built from the async nodes.
+
+The validation LLM is a stub with a fixed simulated latency and embeddings come
+from the local hashing provider, so the test runs offline. For each variant it reports the
+wall time for all N uploads, the overlap factor (sum of per-request latency /
+wall time; ~N means fully concurrent, ~1 means serialized) and the worst event
+loop stall observed while the uploads were running.
+
+Usage:
+    python -m benchmarks.load_concurrent_uploads --uploads 8 --llm-latency 1.0
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from typing import Any, List, Optional
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["INGESTION_CACHE_ENABLED"] = "false"
+os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+os.environ["EMBEDDING_PROVIDER"] = "hashing"
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from benchmarks._pdf import make_pdf
+from app.backend import main
+from app.backend.agents.pdf_agents import pdf_chunking_agent as chunking_module
+from app.backend.agents.pdf_agents import pdf_validation_agent as validation_module
+from app.backend.core.state import State
+from app.backend.workflows import ingestion
+
+
+class StubValidationModel(BaseChatModel):
+    """Calls validate_pdf_tool once, then answers with a passing verdict."""
+
+    latency: float = 1.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-validation"
+
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        return self
+
+    def _reply(self, messages: List[BaseMessage]) -> ChatResult:
+        if any(isinstance(m, ToolMessage) for m in messages):
+            message = AIMessage(content='{"pdf_validation_status": "pass", "missing_information": ""}')
+        else:
+            file_path = str(messages[-1].content).split("path: ", 1)[-1]
+            message = AIMessage(content="", tool_calls=[{
+                "name": "validate_pdf_tool", "args": {"file_path": file_path}, "id": str(uuid.uuid4())
+            }])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+
+def _build_graph(validation_node, chunking_node):
+    graph = StateGraph(State)
+    graph.add_node("pdf_validation_agent", validation_node)
+    graph.add_node("pdf_chunking_agent", chunking_node)
+    graph.add_edge(START, "pdf_validation_agent")
+    graph.add_edge("pdf_validation_agent", "pdf_chunking_agent")
+    graph.add_edge("pdf_chunking_agent", END)
+    return graph.compile(checkpointer=MemorySaver())
+
+
+async def _watch_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def _run_variant(graph, pdf_paths: List[str]) -> dict:
+    ingestion.pdf_graph = graph
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+        async def upload(path: str) -> float:
+            started = time.perf_counter()
+            with open(path, "rb") as f:
+                response = await client.post("/", files={"file": (os.path.basename(path), f, "application/pdf")})
+            response.raise_for_status()
+            return time.perf_counter() - started
+
+        stop = asyncio.Event()
+        watcher = asyncio.create_task(_watch_loop_lag(stop))
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(upload(p) for p in pdf_paths))
+        wall = time.perf_counter() - started
+        stop.set()
+        worst_lag = await watcher
+
+    return {"wall": wall, "overlap": sum(latencies) / wall, "worst_lag": worst_lag}
+
+
+async def main_async(args):
+    validation_module.llm_model = StubValidationModel(latency=args.llm_latency)
+    chunking_module.CHUNKING_MODE = "direct"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_paths = [
+            make_pdf(os.path.join(tmp_dir, f"upload_{i}.pdf"), pages=args.pages + i)  # distinct bytes per upload
+            for i in range(args.uploads)
+        ]
+        variants = {
+            "sync": _build_graph(validation_module.pdf_validation_agent, chunking_module.pdf_chunking_agent),
+            "async": _build_graph(validation_module.apdf_validation_agent, chunking_module.apdf_chunking_agent),
+        }
+        print(f"uploads={args.uploads} llm_latency={args.llm_latency}s pages~{args.pages}")
+        print(f"{'nodes':<6} {'wall s':>8} {'overlap':>8} {'max loop stall s':>17}")
+        for name, graph in variants.items():
+            result = await _run_variant(graph, pdf_paths)
+            print(f"{name:<6} {result['wall']:>8.2f} {result['overlap']:>8.2f} {result['worst_lag']:>17.3f}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main_cli()